@@ -5,7 +5,7 @@ This package organizes CLI commands into modules:
 - pull.py: Pull emails from IMAP
 - push.py: Push emails to IMAP
 - status.py: Status, web dashboard, stats
-- index_cmds.py: Index, backfill, uids, fsck
+- index_cmds.py: Index, backfill, uids, fsck, compact
 - attachments.py: Attachment manipulation
 - misc.py: init, folders, ls, tags, convert, migrate, ingest
 - utils.py: Shared utilities and helpers
@@ -19,7 +19,7 @@ from .utils import AliasGroup
 # Import command groups and commands
 from .account import account
 from .attachments import attachments
-from .index_cmds import fsck, index, index_fts, uids
+from .index_cmds import compact, fsck, index, index_fts, uids
 from .migrate_db import rebuild_index
 from .misc import convert, folders, init, ingest, ls, tags
 from .parquet_cmds import export_uids, import_uids, uids_stats
@@ -51,6 +51,7 @@ main.add_command(account)
 main.add_command(attachments)
 
 # Register individual commands
+main.add_command(compact)
 main.add_command(convert)
 main.add_command(folders)
 main.add_command(fsck)
@@ -77,6 +78,7 @@ __all__ = [
     'main',
     'account',
     'attachments',
+    'compact',
     'convert',
     'export_uids',
     'folders',
@@ -1,4 +1,4 @@
-"""Index, uids, and fsck commands."""
+"""Index, uids, fsck, and compact commands."""
 
 import email
 import re
@@ -641,6 +641,7 @@ def index_fts(jobs: int, limit: int | None, rebuild: bool, verbose: bool):
                         VALUES (?, ?, ?, ?, ?)
                     """, (r["message_id"], r["subject"], r["body_text"], r["from_addr"], r["to_addr"]))
                 pulls_db.conn.commit()
+                pulls_db.optimize_fts()
 
         echo()
         echo(f"Indexed: {indexed:,}")
@@ -651,3 +652,35 @@ def index_fts(jobs: int, limit: int | None, rebuild: bool, verbose: bool):
 
     finally:
         pulls_db.disconnect()
+
+
+@click.command()
+@require_init
+def compact():
+    """Compact pulls.db and msgs.db (reclaim free pages).
+
+    Each database is copied with `VACUUM INTO` (which doesn't block writers
+    the way a plain `VACUUM` does), then swapped into place. Run it
+    periodically (e.g. weekly from cron) while no pull/push is running.
+    """
+    from ..storage import MessageStorage, get_msgs_db_path
+
+    pulls_db = get_pulls_db()
+    msgs_path = get_msgs_db_path()
+    targets = []
+    if pulls_db.db_path.exists():
+        targets.append((pulls_db.db_path.name, pulls_db))
+    if msgs_path.exists():
+        targets.append((msgs_path.name, MessageStorage(msgs_path)))
+    if not targets:
+        echo("No databases to compact.")
+        return
+
+    for name, db in targets:
+        with db:
+            try:
+                before, after = db.compact()
+            except RuntimeError as e:
+                err(str(e))
+                sys.exit(1)
+        echo(f"{name}: {humanize.naturalsize(before)} → {humanize.naturalsize(after)}")
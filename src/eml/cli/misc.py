@@ -39,6 +39,7 @@ from ..storage import (
     EML_DIR,
     GLOBAL_CONFIG_DIR,
     MessageStorage,
+    clear_eml_dir_cache,
     find_eml_dir,
     get_msgs_db_path,
 )
@@ -133,6 +134,7 @@ def init(use_global: bool, layout: str):
 
     # Create .eml directory structure
     eml_dir.mkdir(parents=True, exist_ok=True)
+    clear_eml_dir_cache()  # may be nested inside another project
     (eml_dir / "sync-state").mkdir(exist_ok=True)
     (eml_dir / "pushed").mkdir(exist_ok=True)
 
@@ -285,13 +287,14 @@ def ls(
         echo(f"Total messages{tag_info}: {total:,}\n")
 
         # Build query
+        cols = 'm.date AS "date [EPOCH_UTC]", m.from_addr, m.subject'
         if tag:
-            sql = """SELECT m.* FROM messages m
+            sql = f"""SELECT {cols} FROM messages m
                      JOIN message_tags t ON m.message_id = t.message_id
                      WHERE t.tag = ?"""
             params: list = [tag]
         else:
-            sql = "SELECT * FROM messages WHERE 1=1"
+            sql = f"SELECT {cols} FROM messages m WHERE 1=1"
             params = []
 
         if from_filter:
@@ -306,7 +309,7 @@ def ls(
             sql += " AND (from_addr LIKE ? OR subject LIKE ?)"
             params.extend([f"%{query}%", f"%{query}%"])
 
-        sql += " ORDER BY date DESC LIMIT ?"
+        sql += " ORDER BY m.date DESC LIMIT ?"
         params.append(limit)
 
         cur = storage.conn.execute(sql, params)
@@ -317,7 +320,7 @@ def ls(
             return
 
         for row in rows:
-            date_str = row["date"][:10] if row["date"] else "?"
+            date_str = format_date(row["date"])
             from_short = (row["from_addr"] or "?")[:35]
             subj_short = (row["subject"] or "(no subject)")[:45]
             echo(f"{date_str} | {from_short:35} | {subj_short}")
@@ -121,6 +121,9 @@ def pull(
         echo(style("DRY RUN - no changes will be made", fg="yellow"))
     echo()
 
+    storage: MessageStorage | None = None
+    # Legacy storage: messages buffered for the next batched insert
+    pending_messages: list[tuple] = []
     try:
         client.connect(src_user, src_password)
         count, uidvalidity = client.select_folder(src_folder, readonly=True)
@@ -128,7 +131,6 @@ def pull(
 
         # Open storage (V1 vs V2)
         layout = None
-        storage = None
         file_index: FileIndex | None = None
         if has_cfg:
             layout = get_storage_layout(root) if not dry_run else None
@@ -146,7 +148,6 @@ def pull(
         # Open pulls.db for tracking (Git-tracked, per-UID records)
         # Also open in dry-run mode for UID caching (metadata only, safe)
         pulls_db: PullsDB | None = None
-        pulled_uids: set[int] = set()
         stored_uidvalidity: int | None = None
         sync_run_id: int | None = None
 
@@ -160,10 +161,11 @@ def pull(
                 echo("  Previous pull records are invalid (UIDs reassigned by server)")
                 # Note: We keep the old records for reference but they won't match
                 # Could optionally clear them: pulls_db.clear_folder(account, src_folder, stored_uidvalidity)
-            # Get UIDs we've already pulled for this UIDVALIDITY
-            pulled_uids = pulls_db.get_pulled_uids(account, src_folder, uidvalidity)
-            if pulled_uids:
-                echo(f"Already pulled: {len(pulled_uids):,} UIDs (from pulls.db)")
+            # Count UIDs we've already pulled for this UIDVALIDITY (the
+            # difference against the server's UIDs is taken in SQL below)
+            pulled_count = pulls_db.get_pulled_count(account, src_folder, uidvalidity)
+            if pulled_count:
+                echo(f"Already pulled: {pulled_count:,} UIDs (from pulls.db)")
 
         # Load previous failures for this account/folder
         failures = {}
@@ -179,8 +181,7 @@ def pull(
                 # Check if cache is fresh based on TTL
                 folder_info = pulls_db.get_server_folder_info(account, src_folder)
                 if folder_info:
-                    _, _, last_checked_str = folder_info
-                    last_checked = datetime.fromisoformat(last_checked_str)
+                    _, _, last_checked = folder_info
                     cache_age_mins = (datetime.now() - last_checked).total_seconds() / 60
                     cache_is_fresh = cache_age_mins < cache_ttl
                     if not cache_is_fresh:
@@ -199,8 +200,8 @@ def pull(
         elif cached_server_uids and cache_is_fresh and not full:
             # Use cached UIDs - much faster than IMAP SEARCH
             echo(f"Using cached server UIDs: {len(cached_server_uids):,}")
-            unpulled = cached_server_uids - pulled_uids
-            uids = [str(uid).encode() for uid in sorted(unpulled)]
+            unpulled = pulls_db.missing_uids(account, src_folder, uidvalidity, sorted(cached_server_uids))
+            uids = [str(uid).encode() for uid in unpulled]
             echo(f"Unpulled: {len(uids):,} UIDs")
         else:
             # No cache, stale cache, or --full: fetch from server
@@ -211,8 +212,9 @@ def pull(
             # Cache the UIDs for next time (always cache, even in dry-run)
             if pulls_db and uidvalidity:
                 uid_list = [(int(u), None) for u in all_server_uids]
-                pulls_db.record_server_uids(account, src_folder, uidvalidity, uid_list)
-                pulls_db.record_server_folder(account, src_folder, uidvalidity, len(all_server_uids))
+                with pulls_db.transaction():
+                    pulls_db.record_server_uids(account, src_folder, uidvalidity, uid_list)
+                    pulls_db.record_server_folder(account, src_folder, uidvalidity, len(all_server_uids))
                 echo(f"Cached {len(all_server_uids):,} UIDs (TTL: {cache_ttl}m)")
 
             if full:
@@ -220,7 +222,12 @@ def pull(
                 uids = all_server_uids
             else:
                 # Normal sync: fetch UIDs we haven't pulled yet
-                uids = [u for u in all_server_uids if int(u) not in pulled_uids]
+                uids = all_server_uids
+                if pulls_db:
+                    unpulled = pulls_db.missing_uids(
+                        account, src_folder, uidvalidity, [int(u) for u in all_server_uids],
+                    )
+                    uids = [str(uid).encode() for uid in unpulled]
                 if len(uids) < len(all_server_uids):
                     echo(f"Incremental sync: {len(uids):,} new UIDs to check")
                 else:
@@ -229,6 +236,15 @@ def pull(
         if limit:
             uids = uids[:limit]
 
+        # Legacy storage: skip messages already in msgs.db up front (one batched
+        # header fetch + lookup), instead of downloading each body first
+        if storage and not dry_run and uids:
+            uid_message_ids = client.fetch_message_ids_batch(uids)
+            known = storage.existing_message_ids(uid_message_ids.values())
+            if known:
+                uids = [u for u in uids if uid_message_ids.get(int(u)) not in known]
+                echo(f"Already in storage: {len(known):,} messages")
+
         total_candidates = len(uids)
         echo(f"Found {total_candidates} candidate messages")
         echo()
@@ -358,18 +374,14 @@ def pull(
                             if file_index and stored_path:
                                 file_index._index_file(stored_path)
                         else:
-                            storage.add_message(
-                                message_id=info.message_id,
-                                raw=raw,
-                                date=info.date,
-                                from_addr=info.from_addr,
-                                to_addr=info.to_addr,
-                                cc_addr=info.cc_addr,
-                                subject=info.subject,
-                                source_folder=src_folder,
-                                source_uid=str(uid_int),
-                                tags=[tag] if tag else None,
-                            )
+                            pending_messages.append((
+                                info.message_id, info.date, info.from_addr, info.to_addr,
+                                info.cc_addr, info.subject, raw, src_folder, str(uid_int),
+                                [tag] if tag else None,
+                            ))
+                            if len(pending_messages) >= checkpoint_interval:
+                                storage.add_messages(pending_messages)
+                                pending_messages.clear()
                         fetched += 1
                         if verbose:
                             print_result("ok", subj)
@@ -447,6 +459,8 @@ def pull(
                             skipped=skipped,
                             failed=failed,
                         )
+                        if (fetched + skipped + failed) % checkpoint_interval == 0:
+                            pulls_db.flush_sync_run()
 
                 # Check for rate limit (consecutive errors)
                 if consecutive_errors >= max_errors:
@@ -454,6 +468,14 @@ def pull(
                     aborted = True
                     break
 
+        if storage and pending_messages:
+            # Cleared first, so the cleanup below doesn't retry a failed write
+            rows = pending_messages[:]
+            pending_messages.clear()
+            storage.add_messages(rows)
+        if pulls_db:
+            pulls_db.flush_pulls()
+
         # Clear sync status file (we're done)
         if has_cfg and not dry_run:
             clear_sync_status(root)
@@ -558,4 +580,15 @@ def pull(
             err("  Check that the server supports encrypted connections")
         sys.exit(1)
     finally:
+        # Saves any messages fetched since the last checkpoint (e.g. when
+        # the pull failed partway)
+        if storage and storage.connected:
+            if pending_messages:
+                try:
+                    storage.add_messages(pending_messages)
+                except Exception as e:
+                    # Report it, without masking the error (or exit) in flight
+                    err(f"Error saving {len(pending_messages):,} fetched messages: {e}")
+                    storage.conn.rollback()  # Don't commit part of the batch on disconnect
+            storage.disconnect()
         client.disconnect()
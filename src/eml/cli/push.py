@@ -18,7 +18,7 @@ from rich.progress import (
     TimeRemainingColumn,
 )
 
-from ..config import AccountConfig, find_eml_root, load_config, load_pushed, mark_pushed
+from ..config import AccountConfig, find_eml_root, load_config, load_pushed, save_pushed
 from ..imap import IMAPClient
 from ..storage import MessageStorage, get_msgs_db_path
 
@@ -102,16 +102,17 @@ def push(
     client = None
     layout = None
     storage = None
+    pushed_set: set[str] | None = None
     try:
         if has_cfg:
             #  use layout and pushed/<account>.txt
             layout = get_storage_layout(root)
             pushed_set = load_pushed(account, root)
+            already_pushed_count = len(pushed_set)
 
             # Get all messages and filter out already pushed
             all_msgs = list(layout.iter_messages())
             total_count = len(all_msgs)
-            already_pushed_count = len(pushed_set)
             unpushed = [m for m in all_msgs if m.message_id not in pushed_set]
         else:
             # Legacy:  use SQL storage
@@ -204,7 +205,9 @@ def push(
 
             for msg in unpushed:
                 subj = (msg.subject or "(no subject)")[:60]
-                msg_size = len(msg.raw)
+                # msgs.db messages are listed without bodies; size them from the
+                # blob header and only load the ones actually appended
+                msg_size = len(msg.raw) if msg.raw is not None else storage.raw_size(msg.id)
 
                 # Skip oversized messages
                 if msg_size > max_size_bytes:
@@ -225,15 +228,19 @@ def push(
                             dst_folder,
                             None,
                             imaplib.Time2Internaldate(msg.date.timestamp()) if msg.date else None,
-                            msg.raw,
+                            msg.raw if msg.raw is not None else storage.get_raw(msg.id),
                         )
                         if success[0] == "OK":
                             if has_cfg:
-                                mark_pushed(account, msg.message_id, root)
+                                pushed_set.add(msg.message_id)
+                                if (pushed + 1) % checkpoint_interval == 0:
+                                    save_pushed(account, pushed_set, root)
                                 # Log for "Last 10 uploaded" feature
                                 log_pushed_message(account, msg.message_id, str(msg.path) if hasattr(msg, 'path') else None, msg.subject, root)
                             else:
-                                storage.mark_pushed(msg.message_id, dst_type, dst_user, dst_folder)
+                                storage.mark_pushed(msg.message_id, dst_type, dst_user, dst_folder, commit=False)
+                                if (pushed + 1) % checkpoint_interval == 0:
+                                    storage.commit()
                             pushed += 1
                             consecutive_errors = 0
                             if verbose:
@@ -306,5 +313,10 @@ def push(
         err(f"Error: {e}")
         sys.exit(1)
     finally:
+        # Save/commit any push marks recorded since the last checkpoint
+        if pushed_set is not None and len(pushed_set) > already_pushed_count:
+            save_pushed(account, pushed_set, root)
+        if storage:
+            storage.disconnect()
         if client and client._conn:
             client.disconnect()
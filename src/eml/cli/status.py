@@ -18,6 +18,7 @@ from ..storage import MessageStorage, get_msgs_db_path
 
 from .utils import (
     err,
+    format_date,
     get_recent_pushed,
     read_sync_status,
     require_init,
@@ -291,11 +292,12 @@ def stats():
         cursor = storage.conn.execute("""
             SELECT
                 COUNT(*) as count,
-                SUM(length(raw)) as total_bytes,
-                MIN(date) as oldest,
-                MAX(date) as newest,
-                AVG(length(raw)) as avg_size
+                SUM(COALESCE(b.size, length(b.raw))) as total_bytes,
+                MIN(date) AS "oldest [EPOCH_UTC]",
+                MAX(date) AS "newest [EPOCH_UTC]",
+                AVG(COALESCE(b.size, length(b.raw))) as avg_size
             FROM messages
+            JOIN message_bodies b USING (id)
         """)
         row = cursor.fetchone()
         total_bytes = row["total_bytes"] or 0
@@ -303,25 +305,25 @@ def stats():
         newest = row["newest"]
         avg_size = row["avg_size"] or 0
 
-        # Size distribution
+        # Size distribution (of uncompressed sizes; `raw` may be compressed)
         size_dist = storage.conn.execute("""
             SELECT
                 CASE
-                    WHEN length(raw) > 30*1024*1024 THEN '>30MB'
-                    WHEN length(raw) > 25*1024*1024 THEN '25-30MB'
-                    WHEN length(raw) > 20*1024*1024 THEN '20-25MB'
-                    WHEN length(raw) > 15*1024*1024 THEN '15-20MB'
-                    WHEN length(raw) > 10*1024*1024 THEN '10-15MB'
-                    WHEN length(raw) > 5*1024*1024 THEN '5-10MB'
-                    WHEN length(raw) > 1*1024*1024 THEN '1-5MB'
-                    WHEN length(raw) > 100*1024 THEN '100KB-1MB'
+                    WHEN size > 30*1024*1024 THEN '>30MB'
+                    WHEN size > 25*1024*1024 THEN '25-30MB'
+                    WHEN size > 20*1024*1024 THEN '20-25MB'
+                    WHEN size > 15*1024*1024 THEN '15-20MB'
+                    WHEN size > 10*1024*1024 THEN '10-15MB'
+                    WHEN size > 5*1024*1024 THEN '5-10MB'
+                    WHEN size > 1*1024*1024 THEN '1-5MB'
+                    WHEN size > 100*1024 THEN '100KB-1MB'
                     ELSE '<100KB'
                 END as size_range,
                 COUNT(*) as count,
-                SUM(length(raw)) as total_bytes
-            FROM messages
+                SUM(size) as total_bytes
+            FROM (SELECT COALESCE(b.size, length(b.raw)) AS size FROM message_bodies b)
             GROUP BY 1
-            ORDER BY MAX(length(raw)) DESC
+            ORDER BY MAX(size) DESC
         """).fetchall()
 
         # Tag counts
@@ -340,7 +342,7 @@ def stats():
         console.print(f"[bold]Total size:[/] {humanize.naturalsize(total_bytes)}")
         console.print(f"[bold]Avg size:[/] {humanize.naturalsize(avg_size)}")
         if oldest:
-            console.print(f"[bold]Date range:[/] {oldest[:10]} → {newest[:10]}")
+            console.print(f"[bold]Date range:[/] {format_date(oldest)} → {format_date(newest)}")
         console.print()
 
         # Size distribution table
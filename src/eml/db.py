@@ -0,0 +1,366 @@
+"""Shared SQLite connection helpers.
+
+Used by the database classes (PullsDB, UidsDB, MessageStorage, ...) for
+things that don't belong to any one schema: read-only connections,
+connection pooling, a dedicated writer thread, column converters,
+`IN (...)` parameter lists, and compaction.
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+# Column-name types for timestamp columns. Select a column as
+# `col AS "col [ISODATETIME]"` (or `[EPOCH]`/`[EPOCH_UTC]`) on a connection opened with
+# `detect_types=sqlite3.PARSE_COLNAMES` to get a datetime back.
+ISODATETIME = "ISODATETIME"
+
+
+def _convert_isodatetime(value: bytes) -> datetime | None:
+    try:
+        return datetime.fromisoformat(value.decode())
+    except ValueError:
+        return None
+
+
+# Column-name type for INTEGER Unix-epoch-seconds columns, converted to
+# naive local datetimes (ISO text left over from older schemas also parses)
+EPOCH = "EPOCH"
+
+
+def _convert_epoch(value: bytes) -> datetime | None:
+    try:
+        return datetime.fromtimestamp(int(value))
+    except ValueError:
+        return _convert_isodatetime(value)
+
+
+# As EPOCH, but converted to UTC-aware datetimes, so the result doesn't depend
+# on the reader's timezone (leftover naive ISO text is taken as local time)
+EPOCH_UTC = "EPOCH_UTC"
+
+
+def _convert_epoch_utc(value: bytes) -> datetime | None:
+    try:
+        return datetime.fromtimestamp(int(value), tz=timezone.utc)
+    except ValueError:
+        dt = _convert_isodatetime(value)
+        return dt.astimezone(timezone.utc) if dt else None
+
+
+sqlite3.register_converter(ISODATETIME, _convert_isodatetime)
+sqlite3.register_converter(EPOCH, _convert_epoch)
+sqlite3.register_converter(EPOCH_UTC, _convert_epoch_utc)
+
+
+@lru_cache(maxsize=64)
+def _row_class(fields: tuple[str, ...]) -> type:
+    return namedtuple("Row", fields)
+
+
+def namedtuple_row(cursor: sqlite3.Cursor, row: tuple) -> tuple:
+    """Row factory returning namedtuples (one class per column list).
+
+    Cheaper than sqlite3.Row for hot loops that unpack rows positionally,
+    while still allowing attribute access.
+    """
+    return _row_class(tuple(d[0] for d in cursor.description))(*row)
+
+
+# Membership test against a JSON array parameter (see `json_array`). Unlike
+# `IN (?, ...)`, the SQL text doesn't vary with the number of values, so one
+# prepared statement serves any list, with no limit on its length.
+IN_JSON_ARRAY = "IN (SELECT value FROM json_each(?))"
+
+
+def json_array(items: Iterable) -> str:
+    """Encode `items` as a JSON array, for an `IN_JSON_ARRAY` parameter."""
+    return json.dumps(list(items))
+
+
+# Connection settings for WAL-mode databases. NORMAL sync is durable against
+# application crashes; an OS crash can lose the last commits, but never
+# corrupts the database.
+WAL_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,  # KiB (64 MB)
+    "temp_store": "MEMORY",
+    "mmap_size": 256 * 1024 * 1024,
+}
+
+
+# The per-connection subset of `WAL_PRAGMAS`, for read-only connections
+# (journal mode and sync level are properties of writers)
+READER_PRAGMAS = {
+    name: value for name, value in WAL_PRAGMAS.items()
+    if name not in ("journal_mode", "synchronous")
+}
+
+
+def apply_pragmas(conn: sqlite3.Connection, pragmas: dict[str, str | int] = WAL_PRAGMAS) -> None:
+    """Set connection PRAGMAs (e.g. `WAL_PRAGMAS`)."""
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name}={value}")
+
+
+def vacuum_into(conn: sqlite3.Connection, path: Path) -> Path:
+    """Write a compacted copy of `conn`'s database next to `path`.
+
+    Unlike a plain VACUUM, ``VACUUM INTO`` only needs a read transaction, so
+    writers aren't locked out while the copy is built. Swap the copy in with
+    `replace_database` once the database's connections are closed.
+
+    Args:
+        conn: Connection to the database (no open transaction)
+        path: Database file path
+
+    Returns:
+        Path of the compacted copy
+
+    Raises:
+        RuntimeError: If the database was written to during the copy
+    """
+    if conn.in_transaction:
+        conn.commit()
+    tmp = Path(path).with_name(f"{Path(path).name}.compact")
+    tmp.unlink(missing_ok=True)
+    version = conn.execute("PRAGMA data_version").fetchone()[0]
+    changes = conn.total_changes
+    conn.execute("VACUUM INTO ?", (str(tmp),))
+    if (
+        conn.execute("PRAGMA data_version").fetchone()[0] != version
+        or conn.total_changes != changes
+    ):
+        tmp.unlink(missing_ok=True)
+        raise RuntimeError(f"{path} was modified during compaction; try again")
+    return tmp
+
+
+def replace_database(src: Path, dest: Path) -> None:
+    """Atomically move database file `src` over `dest` (dropping its WAL/SHM)."""
+    dest = Path(dest)
+    os.replace(src, dest)
+    for suffix in ("-wal", "-shm"):
+        dest.with_name(dest.name + suffix).unlink(missing_ok=True)
+
+
+def connect_readonly(path: Path, **kwargs) -> sqlite3.Connection:
+    """Open a read-only (``mode=ro``) connection to an existing database.
+
+    Args:
+        path: Database file path
+        **kwargs: Extra arguments for sqlite3.connect (e.g. detect_types)
+
+    Returns:
+        Connection usable from any thread (one thread at a time)
+    """
+    uri = f"{Path(path).resolve().as_uri()}?mode=ro"
+    kwargs.setdefault("timeout", 30.0)
+    return sqlite3.connect(uri, uri=True, check_same_thread=False, **kwargs)
+
+
+class ReaderPool:
+    """Bounded pool of read-only connections to one database.
+
+    In WAL mode readers don't block the writer (or each other), so giving
+    each concurrent reader its own connection keeps queries from queueing
+    up behind writes on the main connection. Connections are opened lazily,
+    up to `size`; `checkout()` blocks when all of them are in use.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        size: int | None = None,
+        row_factory=sqlite3.Row,
+        pragmas: dict[str, str | int] | None = None,
+        **connect_kwargs,
+    ):
+        """Initialize ReaderPool.
+
+        Args:
+            path: Database file path (must already exist)
+            size: Max open connections (defaults to CPU count)
+            row_factory: Row factory set on each connection
+            pragmas: PRAGMAs set on each connection (e.g. `READER_PRAGMAS`)
+            **connect_kwargs: Extra arguments for sqlite3.connect
+        """
+        self.path = Path(path)
+        self.size = size or os.cpu_count() or 4
+        self._row_factory = row_factory
+        self._pragmas = pragmas or {}
+        self._connect_kwargs = connect_kwargs
+        self._idle: queue.Queue[sqlite3.Connection] = queue.Queue()
+        self._opened: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = connect_readonly(self.path, **self._connect_kwargs)
+        conn.row_factory = self._row_factory
+        apply_pragmas(conn, self._pragmas)
+        return conn
+
+    @contextmanager
+    def checkout(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a reader connection for the duration of the block."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                if len(self._opened) < self.size:
+                    conn = self._open()
+                    self._opened.append(conn)
+            if conn is None:
+                conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        """Close all connections opened by the pool."""
+        with self._lock:
+            for conn in self._opened:
+                conn.close()
+            self._opened.clear()
+            self._idle = queue.Queue()
+
+
+class WriterThread(threading.Thread):
+    """Thread that runs all writes to one database on its own connection.
+
+    SQLite allows one writer at a time; funneling writes from several
+    threads (e.g. a sync worker and a web server) through one queue avoids
+    SQLITE_BUSY retries between them. Each submitted function runs in its
+    own savepoint (so a failure only rolls back that function), inside a
+    ``BEGIN IMMEDIATE`` transaction that is committed whenever the queue
+    drains, coalescing bursts of small writes into one commit. Under
+    sustained load a batch is also committed once it reaches `max_batch`
+    writes or has been open `max_delay` seconds, so waiting callers aren't
+    held behind an unbounded backlog. Futures are resolved after the
+    commit, so a result implies the write is visible to other connections.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], sqlite3.Connection],
+        maxsize: int = 1000,
+        max_batch: int = 500,
+        max_delay: float = 0.1,
+    ):
+        """Initialize WriterThread (call `start()` to run it).
+
+        Args:
+            connect: Opens the writer connection (called on the thread)
+            maxsize: Max queued writes before `submit` blocks
+            max_batch: Max writes per commit
+            max_delay: Max seconds between a batch's first write and its commit
+        """
+        super().__init__(name="sqlite-writer", daemon=True)
+        self._connect = connect
+        self._queue: queue.Queue[tuple[Callable, Future] | None] = queue.Queue(maxsize)
+        self._max_batch = max_batch
+        self._max_delay = max_delay
+
+    def submit(self, fn: Callable[[sqlite3.Connection], Any]) -> Future:
+        """Queue `fn(conn)` to run on the writer connection."""
+        future: Future = Future()
+        self._queue.put((fn, future))
+        return future
+
+    def flush(self) -> None:
+        """Block until all queued writes have been committed."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Commit outstanding writes and stop the thread."""
+        self._queue.put(None)
+        self.join()
+
+    def run(self) -> None:
+        conn = self._connect()
+        # (future, result, exception) for writes awaiting the next commit
+        pending: list[tuple[Future, Any, BaseException | None]] = []
+        deadline = 0.0  # When the open batch must be committed
+        try:
+            while True:
+                item = self._queue.get()
+                if item is not None:
+                    fn, future = item
+                    try:
+                        if not conn.in_transaction:
+                            conn.execute("BEGIN IMMEDIATE")
+                            deadline = time.monotonic() + self._max_delay
+                        conn.execute("SAVEPOINT writer_fn")
+                        try:
+                            result = fn(conn)
+                        except BaseException as e:
+                            conn.execute("ROLLBACK TO writer_fn")
+                            conn.execute("RELEASE writer_fn")
+                            pending.append((future, None, e))
+                        else:
+                            conn.execute("RELEASE writer_fn")
+                            pending.append((future, result, None))
+                    except Exception as e:
+                        # The transaction itself failed (e.g. BEGIN timed out on
+                        # "database is locked"): fail this write and the batch so
+                        # far, and carry on with the next one
+                        self._rollback(conn)
+                        pending.append((future, None, e))
+                        self._resolve(pending, e)
+                        pending = []
+                        continue
+                    if (
+                        not self._queue.empty()
+                        and len(pending) < self._max_batch
+                        and time.monotonic() < deadline
+                    ):
+                        continue
+                commit_error = None
+                if conn.in_transaction:
+                    try:
+                        conn.commit()
+                    except sqlite3.Error as e:
+                        self._rollback(conn)
+                        commit_error = e
+                self._resolve(pending, commit_error)
+                pending = []
+                if item is None:
+                    self._queue.task_done()
+                    return
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _rollback(conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+
+    def _resolve(
+        self,
+        pending: list[tuple[Future, Any, BaseException | None]],
+        error: BaseException | None,
+    ) -> None:
+        """Settle a batch's futures; `error` (if any) fails them all."""
+        for future, result, exc in pending:
+            exc = exc or error
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+            self._queue.task_done()
@@ -8,8 +8,9 @@ import subprocess
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Iterator
+from typing import Iterable, Iterator
 
+from .db import IN_JSON_ARRAY, apply_pragmas, json_array
 from .layouts.path_template import content_hash
 
 
@@ -36,6 +37,7 @@ class IndexedFile:
     size: int
     mtime: float
     indexed_at: datetime
+    attachment_count: int | None = None  # None: indexed before this was tracked
 
 
 class FileIndex:
@@ -69,7 +71,7 @@ class FileIndex:
         self._db_path.parent.mkdir(parents=True, exist_ok=True)
         self._conn = sqlite3.connect(self._db_path, timeout=30.0)
         self._conn.row_factory = sqlite3.Row
-        self._conn.execute("PRAGMA journal_mode=WAL")
+        apply_pragmas(self._conn)
         self._create_schema()
 
     def disconnect(self) -> None:
@@ -111,7 +113,8 @@ class FileIndex:
                 body_text TEXT,
                 size INTEGER,
                 mtime REAL,
-                indexed_at TEXT DEFAULT CURRENT_TIMESTAMP
+                indexed_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                attachment_count INTEGER
             );
 
             CREATE INDEX IF NOT EXISTS idx_files_message_id ON files(message_id);
@@ -126,10 +129,52 @@ class FileIndex:
                 key TEXT PRIMARY KEY,
                 value TEXT
             );
+
+            -- Headers of files listed straight from the filesystem (web UI),
+            -- valid while the file's mtime and size are unchanged
+            CREATE TABLE IF NOT EXISTS fs_header_cache (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                subject TEXT,
+                from_addr TEXT,
+                to_addr TEXT,
+                date TEXT
+            );
+
+            -- Bumped by every change to which files exist or how they're
+            -- threaded; readers cache aggregates keyed on it
+            CREATE TABLE IF NOT EXISTS files_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                n INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO files_version (id, n) VALUES (1, 0);
+
+            CREATE TRIGGER IF NOT EXISTS files_version_ai AFTER INSERT ON files BEGIN
+                UPDATE files_version SET n = n + 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS files_version_ad AFTER DELETE ON files BEGIN
+                UPDATE files_version SET n = n + 1;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS files_version_au
+            AFTER UPDATE OF path, thread_id ON files BEGIN
+                UPDATE files_version SET n = n + 1;
+            END;
         """)
         self.conn.commit()
+        self._migrate_attachment_count()
         self._create_fts()
 
+    def _migrate_attachment_count(self) -> None:
+        """Add the attachment_count column to indexes built without it."""
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(files)")}
+        if "attachment_count" not in columns:
+            # Existing rows stay NULL until re-indexed; readers count from the file
+            self.conn.execute("ALTER TABLE files ADD COLUMN attachment_count INTEGER")
+            self.conn.commit()
+
     def _create_fts(self) -> None:
         """Create FTS5 virtual table for full-text search."""
         # Check if FTS table exists
@@ -170,6 +215,10 @@ class FileIndex:
         """)
         self.conn.commit()
 
+    def files_version(self) -> int:
+        """Counter bumped whenever a file is added, removed, moved or re-threaded."""
+        return self.conn.execute("SELECT n FROM files_version").fetchone()[0]
+
     def get_meta(self, key: str) -> str | None:
         """Get metadata value."""
         cur = self.conn.execute(
@@ -312,13 +361,15 @@ class FileIndex:
         body_text: str | None,
         size: int,
         mtime: float,
+        attachment_count: int | None = None,
     ) -> int:
         """Add or update a file in the index. Returns row id."""
         date_str = date.isoformat() if date else None
         cur = self.conn.execute(
             """INSERT INTO files (path, content_hash, message_id, date, from_addr, to_addr, cc_addr,
-                                  subject, in_reply_to, references_, thread_id, thread_slug, body_text, size, mtime)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                  subject, in_reply_to, references_, thread_id, thread_slug, body_text, size, mtime,
+                                  attachment_count)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                ON CONFLICT(path) DO UPDATE SET
                    content_hash = excluded.content_hash,
                    message_id = excluded.message_id,
@@ -334,12 +385,35 @@ class FileIndex:
                    body_text = excluded.body_text,
                    size = excluded.size,
                    mtime = excluded.mtime,
+                   attachment_count = excluded.attachment_count,
                    indexed_at = CURRENT_TIMESTAMP""",
             (path, content_hash, message_id, date_str, from_addr, to_addr, cc_addr,
-             subject, in_reply_to, references, thread_id, thread_slug, body_text, size, mtime)
+             subject, in_reply_to, references, thread_id, thread_slug, body_text, size, mtime,
+             attachment_count)
         )
         return cur.lastrowid or 0
 
+    def get_cached_headers(self, paths: Iterable[str]) -> dict[str, sqlite3.Row]:
+        """Get `fs_header_cache` rows for `paths`, by path (check mtime_ns/size before use)."""
+        cur = self.conn.execute(
+            f"SELECT * FROM fs_header_cache WHERE path {IN_JSON_ARRAY}", (json_array(paths),)
+        )
+        return {row["path"]: row for row in cur}
+
+    def cache_headers(self, rows: Iterable[tuple]) -> None:
+        """Store (path, mtime_ns, size, subject, from_addr, to_addr, date) rows (uncommitted)."""
+        self.conn.executemany("""
+            INSERT INTO fs_header_cache (path, mtime_ns, size, subject, from_addr, to_addr, date)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(path) DO UPDATE SET
+                mtime_ns = excluded.mtime_ns,
+                size = excluded.size,
+                subject = excluded.subject,
+                from_addr = excluded.from_addr,
+                to_addr = excluded.to_addr,
+                date = excluded.date
+        """, rows)
+
     def remove_file(self, path: str) -> bool:
         """Remove a file from the index. Returns True if it existed."""
         cur = self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
@@ -556,6 +630,12 @@ class FileIndex:
         # Extract body text for FTS
         body_text = self._extract_body_text(msg)
 
+        # Same rule as the web UI's attachment list: named parts of multipart messages
+        attachment_count = (
+            sum(1 for part in msg.walk() if not part.is_multipart() and part.get_filename())
+            if msg.is_multipart() else 0
+        )
+
         self.add_file(
             path=rel_path,
             content_hash=sha,
@@ -572,6 +652,7 @@ class FileIndex:
             body_text=body_text,
             size=stat.st_size,
             mtime=stat.st_mtime,
+            attachment_count=attachment_count,
         )
         return True
 
@@ -689,6 +770,7 @@ class FileIndex:
             size=row["size"] or 0,
             mtime=row["mtime"] or 0.0,
             indexed_at=indexed_at,
+            attachment_count=row["attachment_count"],
         )
 
     def stats(self) -> dict:
@@ -814,11 +896,7 @@ class FileIndex:
 
     def rebuild_fts(self) -> int:
         """Rebuild FTS index from files table."""
-        # Delete and recreate FTS content
-        self.conn.execute("DELETE FROM files_fts")
-        cur = self.conn.execute("""
-            INSERT INTO files_fts(rowid, message_id, subject, body_text, from_addr, to_addr)
-            SELECT id, message_id, subject, body_text, from_addr, to_addr FROM files
-        """)
+        # files_fts is an external-content table: FTS5 can rebuild it from files in one pass
+        self.conn.execute("INSERT INTO files_fts(files_fts) VALUES ('rebuild')")
         self.conn.commit()
-        return cur.rowcount
+        return self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
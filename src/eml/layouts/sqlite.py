@@ -5,8 +5,15 @@ from datetime import datetime
 from pathlib import Path
 from typing import Iterator
 
+from ..db import ISODATETIME
 from .base import StorageLayout, StoredMessage
 
+# `messages` columns in StoredMessage field order (minus tags)
+MESSAGE_COLS = f"""message_id, raw, folder, date AS "date [{ISODATETIME}]",
+    COALESCE(from_addr, '') AS from_addr, COALESCE(to_addr, '') AS to_addr,
+    COALESCE(cc_addr, '') AS cc_addr, COALESCE(subject, '') AS subject,
+    source_uid"""
+
 
 class SqliteLayout:
     """Store emails as blobs in SQLite database.
@@ -27,7 +34,9 @@ class SqliteLayout:
     def connect(self) -> None:
         """Open database connection."""
         self._db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._conn = sqlite3.connect(self._db_path, timeout=30.0)
+        self._conn = sqlite3.connect(
+            self._db_path, timeout=30.0, detect_types=sqlite3.PARSE_COLNAMES,
+        )
         self._conn.row_factory = sqlite3.Row
         self._conn.execute("PRAGMA journal_mode=WAL")
         self._create_schema()
@@ -81,7 +90,7 @@ class SqliteLayout:
         end_date: datetime | None = None,
     ) -> Iterator[StoredMessage]:
         """Iterate over messages with optional filters."""
-        query = "SELECT * FROM messages WHERE 1=1"
+        query = f"SELECT {MESSAGE_COLS} FROM messages WHERE 1=1"
         params: list = []
 
         if folder:
@@ -103,7 +112,7 @@ class SqliteLayout:
     def get_message(self, message_id: str) -> StoredMessage | None:
         """Get a message by Message-ID."""
         cur = self.conn.execute(
-            "SELECT * FROM messages WHERE message_id = ?",
+            f"SELECT {MESSAGE_COLS} FROM messages WHERE message_id = ?",
             (message_id,)
         )
         row = cur.fetchone()
@@ -153,22 +162,6 @@ class SqliteLayout:
             cur = self.conn.execute("SELECT COUNT(*) FROM messages")
         return cur.fetchone()[0]
 
-    def _row_to_message(self, row: sqlite3.Row) -> StoredMessage:
-        """Convert database row to StoredMessage."""
-        date = None
-        if row["date"]:
-            try:
-                date = datetime.fromisoformat(row["date"])
-            except ValueError:
-                pass
-        return StoredMessage(
-            message_id=row["message_id"],
-            raw=row["raw"],
-            folder=row["folder"],
-            date=date,
-            from_addr=row["from_addr"] or "",
-            to_addr=row["to_addr"] or "",
-            cc_addr=row["cc_addr"] or "",
-            subject=row["subject"] or "",
-            source_uid=row["source_uid"],
-        )
+    def _row_to_message(self, row: tuple) -> StoredMessage:
+        """Convert a `MESSAGE_COLS` row to StoredMessage."""
+        return StoredMessage(*row)
@@ -12,11 +12,15 @@ File: .eml/uids.parquet (~2.5MB for 65k messages)
 from pathlib import Path
 
 import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.parquet as pq
 
 
 UIDS_PARQUET = "uids.parquet"
 
+# Rows per record batch when streaming between uids.db and parquet
+BATCH_SIZE = 65536
+
 # Minimal schema: just what's needed for incremental pulls
 SCHEMA = pa.schema([
     ("account", pa.string()),
@@ -39,56 +43,54 @@ def export_uids_to_parquet(eml_dir: Path, output_path: Path | None = None) -> Pa
     """
     import sqlite3
 
-    output_path = output_path or (eml_dir / UIDS_PARQUET)
+    from .uids import hash_str, mark_parquet_synced
+
+    default_path = eml_dir / UIDS_PARQUET
+    output_path = output_path or default_path
     db_path = eml_dir / "uids.db"
 
     if not db_path.exists():
         # Fall back to pulls.db for migration
         db_path = eml_dir / "pulls.db"
         table_name = "pulled_messages"
+        source = "pulled_messages"
     else:
         table_name = "pulled_uids"
+        source = """(
+            SELECT f.account, f.name AS folder, p.uidvalidity, p.uid, p.content_hash
+            FROM pulled_uids p JOIN folders f ON f.id = p.folder_id
+        )"""
 
     if not db_path.exists():
         raise FileNotFoundError(f"No UID database found at {db_path}")
 
-    conn = sqlite3.connect(db_path)
-    cur = conn.execute(f"""
-        SELECT account, folder, uidvalidity, uid, content_hash
-        FROM {table_name}
-        ORDER BY account, folder, uidvalidity, uid
-    """)
-    rows = cur.fetchall()
-    conn.close()
-
-    # Build arrays
-    accounts = []
-    folders = []
-    uidvalidities = []
-    uids = []
-    hashes = []
-
-    for row in rows:
-        accounts.append(row[0])
-        folders.append(row[1])
-        uidvalidities.append(row[2])
-        uids.append(row[3])
-        hashes.append(row[4])
-
-    table = pa.table({
-        "account": accounts,
-        "folder": folders,
-        "uidvalidity": uidvalidities,
-        "uid": uids,
-        "content_hash": hashes,
-    }, schema=SCHEMA)
-
-    pq.write_table(
-        table,
-        output_path,
-        compression="zstd",
-        compression_level=19,  # Max compression for Git
-    )
+    conn = sqlite3.connect(db_path, timeout=30.0)
+    # Hold the write lock until the export is recorded, so no pull can land
+    # between reading the rows and marking the parquet as in sync with them
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        cur = conn.execute(f"""
+            SELECT account, folder, uidvalidity, uid, content_hash
+            FROM {source}
+            ORDER BY account, folder, uidvalidity, uid
+        """)
+        # Stream row batches into the file, so memory is bounded by one batch
+        with pq.ParquetWriter(
+            output_path,
+            SCHEMA,
+            compression="zstd",
+            compression_level=19,  # Max compression for Git
+        ) as writer:
+            while rows := cur.fetchmany(BATCH_SIZE):
+                accounts, folders, uidvalidities, uids, hashes = zip(*rows)
+                writer.write_batch(pa.record_batch([
+                    accounts, folders, uidvalidities, uids, [hash_str(h) for h in hashes],
+                ], schema=SCHEMA))
+        if table_name == "pulled_uids" and Path(output_path) == default_path:
+            mark_parquet_synced(conn, output_path)
+        conn.commit()
+    finally:
+        conn.close()
 
     return output_path
 
@@ -104,64 +106,56 @@ def import_uids_from_parquet(eml_dir: Path, parquet_path: Path | None = None) ->
         Number of rows imported
     """
     import sqlite3
-    from datetime import datetime
+    import time
+    from itertools import repeat
+
+    from .uids import FOLDER_ID, PULLED_UIDS_SCHEMA, hash_key
 
     parquet_path = parquet_path or (eml_dir / UIDS_PARQUET)
 
     if not parquet_path.exists():
         raise FileNotFoundError(f"No parquet file at {parquet_path}")
 
-    # Read parquet
-    table = pq.read_table(parquet_path)
-
     # Create/connect to uids.db
     db_path = eml_dir / "uids.db"
     conn = sqlite3.connect(db_path)
     conn.execute("PRAGMA journal_mode=WAL")
 
-    # Create schema
-    conn.executescript("""
-        CREATE TABLE IF NOT EXISTS pulled_uids (
-            account TEXT NOT NULL,
-            folder TEXT NOT NULL,
-            uidvalidity INTEGER NOT NULL,
-            uid INTEGER NOT NULL,
-            content_hash TEXT NOT NULL,
-            message_id TEXT,
-            local_path TEXT,
-            pulled_at TEXT NOT NULL,
-            PRIMARY KEY (account, folder, uidvalidity, uid)
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_pulled_uids_hash
-            ON pulled_uids(content_hash);
-    """)
-
-    # Insert rows
-    now = datetime.now().isoformat()
-    rows = [
-        (
-            table["account"][i].as_py(),
-            table["folder"][i].as_py(),
-            table["uidvalidity"][i].as_py(),
-            table["uid"][i].as_py(),
-            table["content_hash"][i].as_py(),
-            None,  # message_id - will be populated from index
-            None,  # local_path - will be populated from index
-            now,   # pulled_at
-        )
-        for i in range(len(table))
-    ]
-
-    conn.executemany("""
-        INSERT OR REPLACE INTO pulled_uids
-            (account, folder, uidvalidity, uid, content_hash, message_id, local_path, pulled_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, rows)
-    conn.commit()
-
-    count = len(rows)
-    conn.close()
+    # Create schema (the rest is added by UidsDB on connect)
+    conn.executescript(PULLED_UIDS_SCHEMA)
+
+    # Insert rows one record batch at a time (memory is bounded by a batch,
+    # not the file), all in one transaction
+    now = int(time.time())
+    count = 0
+    columns = ["account", "folder", "uidvalidity", "uid", "content_hash"]
+    conn.execute("BEGIN")
+    try:
+        for batch in pq.ParquetFile(parquet_path).iter_batches(BATCH_SIZE, columns=columns):
+            accounts, folders, uidvalidities, uids, hashes = (
+                batch[col].to_pylist() for col in columns
+            )
+            # An upsert, not INSERT OR REPLACE: replaced rows would skip the
+            # delete triggers that keep uids.db's pull_counts in step
+            conn.executemany(
+                "INSERT OR IGNORE INTO folders (account, name) VALUES (?, ?)",
+                set(zip(accounts, folders)),
+            )
+            conn.executemany(f"""
+                INSERT INTO pulled_uids
+                    (folder_id, uidvalidity, uid, content_hash, message_id, local_path, pulled_at)
+                VALUES ({FOLDER_ID}, ?, ?, ?, NULL, NULL, ?)
+                ON CONFLICT (folder_id, uidvalidity, uid) DO UPDATE SET
+                    content_hash = excluded.content_hash,
+                    message_id = NULL,
+                    local_path = NULL,
+                    pulled_at = excluded.pulled_at
+            """, zip(accounts, folders, uidvalidities, uids, map(hash_key, hashes), repeat(now)))
+            count += batch.num_rows
+        conn.execute("PRAGMA user_version = 1")  # hashes already stored as digests
+        conn.commit()
+    finally:
+        conn.close()
 
     return count
 
@@ -181,6 +175,16 @@ def get_pulled_uids_from_parquet(
     if not parquet_path.exists():
         return set()
 
+    return set(read_pulled_uids_from_parquet(eml_dir, account, folder, uidvalidity).to_pylist())
+
+
+def read_pulled_uids_from_parquet(
+    eml_dir: Path,
+    account: str,
+    folder: str,
+    uidvalidity: int,
+) -> pa.Array:
+    """Pulled UIDs for one folder/UIDVALIDITY, as an int64 Arrow array."""
     # Use predicate pushdown for efficient filtering
     filters = [
         ("account", "=", account),
@@ -188,8 +192,14 @@ def get_pulled_uids_from_parquet(
         ("uidvalidity", "=", uidvalidity),
     ]
 
-    table = pq.read_table(parquet_path, filters=filters, columns=["uid"])
-    return {row.as_py() for row in table["uid"]}
+    table = pq.read_table(eml_dir / UIDS_PARQUET, filters=filters, columns=["uid"])
+    return table["uid"].combine_chunks()
+
+
+def read_content_hashes_from_parquet(eml_dir: Path) -> pa.Array:
+    """Distinct content hashes in parquet, as a string Arrow array."""
+    table = pq.read_table(eml_dir / UIDS_PARQUET, columns=["content_hash"])
+    return pc.unique(table["content_hash"].combine_chunks())
 
 
 def get_all_content_hashes_from_parquet(eml_dir: Path) -> set[str]:
@@ -199,8 +209,35 @@ def get_all_content_hashes_from_parquet(eml_dir: Path) -> set[str]:
     if not parquet_path.exists():
         return set()
 
-    table = pq.read_table(parquet_path, columns=["content_hash"])
-    return {row.as_py() for row in table["content_hash"]}
+    return set(read_content_hashes_from_parquet(eml_dir).to_pylist())
+
+
+def _count_uids_by(parquet_path: Path, keys: list[str], account: str | None = None) -> pa.Table:
+    """Count UIDs per `keys` group (columnar scan; `uid_count` column)."""
+    filters = [("account", "=", account)] if account else None
+    table = pq.read_table(parquet_path, columns=[*keys, "uid"], filters=filters)
+    return table.group_by(keys).aggregate([("uid", "count")])
+
+
+def get_stats_from_parquet(eml_dir: Path, account: str | None = None) -> dict:
+    """Pulled UID counts per folder, in `UidsDB.get_stats` form."""
+    counts = _count_uids_by(eml_dir / UIDS_PARQUET, ["folder"], account)
+    folders = dict(zip(counts["folder"].to_pylist(), counts["uid_count"].to_pylist()))
+    return {"total": sum(folders.values()), "folders": folders}
+
+
+def get_folders_with_activity_from_parquet(
+    eml_dir: Path,
+    account: str | None = None,
+) -> list[tuple[str, str, int]]:
+    """(account, folder, count) per folder, most active first (`UidsDB` form)."""
+    counts = _count_uids_by(eml_dir / UIDS_PARQUET, ["account", "folder"], account)
+    counts = counts.sort_by([("uid_count", "descending")])
+    return list(zip(
+        counts["account"].to_pylist(),
+        counts["folder"].to_pylist(),
+        counts["uid_count"].to_pylist(),
+    ))
 
 
 def parquet_stats(eml_dir: Path) -> dict | None:
@@ -210,17 +247,11 @@ def parquet_stats(eml_dir: Path) -> dict | None:
     if not parquet_path.exists():
         return None
 
-    table = pq.read_table(parquet_path)
     file_size = parquet_path.stat().st_size
-
-    # Count by folder
-    folders: dict[str, int] = {}
-    for i in range(len(table)):
-        folder = table["folder"][i].as_py()
-        folders[folder] = folders.get(folder, 0) + 1
+    folders = get_stats_from_parquet(eml_dir)["folders"]
 
     return {
-        "rows": len(table),
+        "rows": pq.ParquetFile(parquet_path).metadata.num_rows,
         "file_size": file_size,
         "file_size_mb": round(file_size / 1024 / 1024, 2),
         "folders": folders,
@@ -15,13 +15,46 @@ import base64
 import hashlib
 import re
 import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
-
-from .uids import UidsDB, UIDS_DB
+from typing import Any, Callable, Iterable, Iterator
+
+from .db import (
+    READER_PRAGMAS,
+    ReaderPool,
+    WriterThread,
+    apply_pragmas,
+    json_array,
+    replace_database,
+    vacuum_into,
+)
+from .uids import PULL_COMMIT_INTERVAL, UidsDB, UIDS_DB
 
 PULLS_DB = "pulls.db"
+SEARCH_COUNT_CACHE_SIZE = 128
+
+# Column lists in dataclass field order, so rows can be passed positionally
+# (`SyncRun(*row)`); timestamps are converted to datetime by the sqlite3
+# module via column-name types (see db.py): sync_runs' epoch-second columns
+# as [EPOCH], pulled_messages.pulled_at (ISO text) as [ISODATETIME].
+SYNC_RUN_COLS = """id, operation, account, folder,
+    started_at AS "started_at [EPOCH]", ended_at AS "ended_at [EPOCH]",
+    status, COALESCE(total, 0), COALESCE(fetched, 0), COALESCE(skipped, 0),
+    COALESCE(failed, 0), error_message"""
+PULL_COLS = """account, folder, uidvalidity, uid, content_hash, message_id,
+    local_path, pulled_at AS "pulled_at [ISODATETIME]", status, sync_run_id,
+    subject, msg_date, error_message, in_reply_to, references_,
+    thread_id, thread_slug, from_addr, to_addr"""
+PULL_SELECT = f"SELECT {PULL_COLS} FROM pulled_messages"
+FTS_INSERT = """INSERT INTO messages_fts(message_id, subject, body_text, from_addr, to_addr)
+    VALUES (?, ?, ?, ?, ?)"""
+# Prepared statements kept per connection (sqlite3's default is 128)
+CACHED_STATEMENTS = 256
 
 
 def compute_thread_slug(thread_id: str) -> str:
@@ -40,6 +73,20 @@ def compute_thread_slug(thread_id: str) -> str:
     return base64.urlsafe_b64encode(hash_bytes).decode().rstrip('=')
 
 
+def parse_references(references: str | None) -> list[str]:
+    """Extract the `<message-id>` tokens from a References header.
+
+    Args:
+        references: References header (space-separated message-ids)
+
+    Returns:
+        Message-IDs in header order (oldest ancestor first)
+    """
+    if not references:
+        return []
+    return re.findall(r'<[^>]+>', references)
+
+
 def compute_thread_id(
     message_id: str | None,
     references: str | None,
@@ -59,10 +106,9 @@ def compute_thread_id(
         The thread root message-id, or None if no message_id available
     """
     # Extract first message-id from references (the thread root)
-    if references:
-        matches = re.findall(r'<[^>]+>', references)
-        if matches:
-            return matches[0]
+    refs = parse_references(references)
+    if refs:
+        return refs[0]
 
     # Fall back to in_reply_to (makes this message part of parent's thread)
     if in_reply_to:
@@ -72,7 +118,7 @@ def compute_thread_id(
     return message_id
 
 
-@dataclass
+@dataclass(slots=True)
 class SyncRun:
     """Record of a sync operation (pull or push command)."""
     id: int
@@ -89,7 +135,7 @@ class SyncRun:
     error_message: str | None  # if aborted/failed, why
 
 
-@dataclass
+@dataclass(slots=True)
 class PulledMessage:
     """Record of a successfully pulled message."""
     account: str
@@ -115,7 +161,7 @@ class PulledMessage:
     to_addr: str | None = None  # To header
 
 
-@dataclass
+@dataclass(slots=True)
 class RecentPull:
     """A recently pulled message with display info."""
     uid: int
@@ -135,19 +181,42 @@ class PullsDB:
 
     When uids.db exists, UID operations are delegated to UidsDB.
     When only pulls.db exists, it operates in legacy mode.
+
+    pulls.db is accessed through one writer connection plus a pool of
+    read-only connections, so that (under WAL) web/TUI queries don't
+    serialize behind sync-run writes. With `writer_thread=True`, all
+    pulls.db writes are instead queued to a dedicated thread (on its own
+    connection), for processes that write from several threads.
     """
 
-    def __init__(self, eml_dir: Path):
+    def __init__(
+        self,
+        eml_dir: Path,
+        readers: int | None = None,
+        writer_thread: bool = False,
+    ):
         """Initialize PullsDB.
 
         Args:
             eml_dir: Path to .eml directory (e.g., /path/to/project/.eml)
+            readers: Max read-only connections (defaults to CPU count)
+            writer_thread: Run writes on a dedicated WriterThread
         """
         self._eml_dir = eml_dir
         self._db_path = eml_dir / PULLS_DB
         self._uids_db_path = eml_dir / UIDS_DB
-        self._conn: sqlite3.Connection | None = None
+        self._num_readers = readers
+        self._use_writer_thread = writer_thread
+        self._writer_thread: WriterThread | None = None
+        self._writer: sqlite3.Connection | None = None
+        self._readers: ReaderPool | None = None
         self._uids_db: UidsDB | None = None
+        self._uncommitted_pulls = 0
+        self._deferred_error: BaseException | None = None
+        # Server-state writes queued by `transaction()` (writer thread only)
+        self._tx_writes: list[Callable[[sqlite3.Connection], Any]] | None = None
+        self._search_counts: OrderedDict[tuple, int] = OrderedDict()
+        self._search_count_generation: tuple | None = None
 
     @property
     def db_path(self) -> Path:
@@ -169,25 +238,148 @@ class PullsDB:
 
         # Still connect to pulls.db for metadata/FTS (if it exists)
         if self._db_path.exists():
-            self._conn = sqlite3.connect(self._db_path, timeout=30.0)
-            self._conn.row_factory = sqlite3.Row
-            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._writer = sqlite3.connect(
+                self._db_path, timeout=30.0, detect_types=sqlite3.PARSE_COLNAMES,
+                cached_statements=CACHED_STATEMENTS,
+            )
+            self._writer.row_factory = sqlite3.Row
+            apply_pragmas(self._writer)
+            # Deferred commits lean on WAL checkpoints for durability
+            self._writer.execute("PRAGMA wal_autocheckpoint=1000")
             self._create_schema()
+            self._readers = ReaderPool(
+                self._db_path, size=self._num_readers, pragmas=READER_PRAGMAS,
+                detect_types=sqlite3.PARSE_COLNAMES, cached_statements=CACHED_STATEMENTS,
+            )
+            if self._use_writer_thread:
+                self._writer_thread = WriterThread(self._connect_writer_thread)
+                self._writer_thread.start()
+
+    def _connect_writer_thread(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._db_path, timeout=30.0, cached_statements=CACHED_STATEMENTS)
+        conn.row_factory = sqlite3.Row
+        return conn
 
     def disconnect(self) -> None:
-        """Close database connection."""
+        """Commit any deferred writes and close database connections."""
+        if self._writer_thread:
+            self._writer_thread.close()
+            self._writer_thread = None
         if self._uids_db:
             self._uids_db.disconnect()
             self._uids_db = None
-        if self._conn:
-            self._conn.close()
-            self._conn = None
+        if self._readers:
+            self._readers.close()
+            self._readers = None
+        if self._writer:
+            if self._writer.in_transaction:
+                self._writer.commit()
+            # Cheap when nothing changed; keeps planner statistics current
+            self._writer.execute("PRAGMA optimize")
+            self._writer.close()
+            self._writer = None
+
+    def compact(self) -> tuple[int, int]:
+        """Rewrite pulls.db without free pages (reconnects).
+
+        Returns:
+            (size before, size after) in bytes
+        """
+        if self._writer_thread:
+            self._writer_thread.flush()
+        if self.conn.in_transaction:
+            self.conn.commit()
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        before = self._db_path.stat().st_size
+        tmp = vacuum_into(self.conn, self._db_path)
+        self.disconnect()
+        replace_database(tmp, self._db_path)
+        self.connect()
+        return before, self._db_path.stat().st_size
 
     @property
     def conn(self) -> sqlite3.Connection:
-        if not self._conn:
+        """The writer connection to pulls.db."""
+        if not self._writer:
             raise RuntimeError("Not connected to pulls.db")
-        return self._conn
+        return self._writer
+
+    @contextmanager
+    def _checkout_reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection for read-only queries.
+
+        Uses a pooled read-only connection, except while the writer has
+        uncommitted changes (reads then go through the writer so callers
+        see their own writes). Queued writer-thread writes are flushed first.
+        """
+        if self._writer_thread:
+            self._writer_thread.flush()
+        conn = self.conn
+        if conn.in_transaction or not self._readers:
+            yield conn
+            return
+        with self._readers.checkout() as reader:
+            yield reader
+
+    @contextmanager
+    def _write(self, commit: bool = True) -> Iterator[sqlite3.Connection]:
+        """Run writes in a ``BEGIN IMMEDIATE`` transaction, committing on success.
+
+        Taking the write lock up front avoids SQLITE_BUSY from upgrading a
+        read transaction when another process is writing.
+
+        Args:
+            commit: Commit when the block exits; if False, the writes stay
+                pending until the next commit on the writer connection
+        """
+        conn = self.conn
+        began = not conn.in_transaction
+        if began:
+            conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            if began:
+                conn.rollback()
+            raise
+        if commit:
+            conn.commit()
+
+    def _run_write(
+        self,
+        fn: Callable[[sqlite3.Connection], Any],
+        commit: bool = True,
+        wait: bool = True,
+    ) -> Any:
+        """Run `fn(conn)` as a write, on the writer thread if there is one.
+
+        Args:
+            fn: Function performing the writes; its return value is returned
+            commit: Commit afterwards (the writer thread commits on its own
+                schedule, whenever its queue drains)
+            wait: Wait for the writer thread to run `fn` (if False, returns
+                None immediately; an error is raised by the next write or
+                flush instead)
+        """
+        if self._writer_thread:
+            self._raise_deferred_error()
+            future = self._writer_thread.submit(fn)
+            if wait:
+                return future.result()
+            future.add_done_callback(self._note_deferred_error)
+            return None
+        with self._write(commit=commit) as conn:
+            return fn(conn)
+
+    def _note_deferred_error(self, future: Future) -> None:
+        if future.exception() is not None and self._deferred_error is None:
+            self._deferred_error = future.exception()
+
+    def _raise_deferred_error(self) -> None:
+        """Raise (once) the error of an earlier write that wasn't waited for."""
+        error, self._deferred_error = self._deferred_error, None
+        if error is not None:
+            raise error
 
     @property
     def uids_db(self) -> UidsDB | None:
@@ -203,6 +395,12 @@ class PullsDB:
 
     def _create_schema(self) -> None:
         """Create database schema."""
+        had_refs = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='message_refs'"
+        ).fetchone()
+
+        self._migrate_sync_runs_epoch()
+
         # First create all tables (CREATE TABLE IF NOT EXISTS is idempotent)
         self.conn.executescript("""
             PRAGMA foreign_keys = OFF;
@@ -212,8 +410,8 @@ class PullsDB:
                 operation TEXT NOT NULL,  -- 'pull' or 'push'
                 account TEXT NOT NULL,
                 folder TEXT NOT NULL,
-                started_at TEXT NOT NULL,
-                ended_at TEXT,
+                started_at INTEGER NOT NULL,  -- Unix epoch seconds
+                ended_at INTEGER,
                 status TEXT NOT NULL DEFAULT 'running',  -- 'running', 'completed', 'aborted', 'failed'
                 total INTEGER DEFAULT 0,
                 fetched INTEGER DEFAULT 0,
@@ -228,6 +426,14 @@ class PullsDB:
             CREATE INDEX IF NOT EXISTS idx_sync_runs_account_folder
                 ON sync_runs(account, folder);
 
+            -- Filtered "recent runs" listings, newest first without a sort
+            CREATE INDEX IF NOT EXISTS idx_sync_runs_aof
+                ON sync_runs(account, operation, folder, started_at DESC);
+
+            -- Stale-run cleanup only looks at running rows
+            CREATE INDEX IF NOT EXISTS idx_sync_runs_running
+                ON sync_runs(started_at) WHERE status = 'running';
+
             CREATE TABLE IF NOT EXISTS pulled_messages (
                 account TEXT NOT NULL,
                 folder TEXT NOT NULL,
@@ -271,6 +477,16 @@ class PullsDB:
             CREATE INDEX IF NOT EXISTS idx_pulled_in_reply_to
                 ON pulled_messages(in_reply_to);
 
+            -- References header, normalized: one row per (message, referenced message-id)
+            CREATE TABLE IF NOT EXISTS message_refs (
+                message_id TEXT NOT NULL,
+                ref_id TEXT NOT NULL,
+                PRIMARY KEY (message_id, ref_id)
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_refs_ref
+                ON message_refs(ref_id);
+
             -- Server UIDs: snapshot of what the server reports
             -- Updated each time we query the server
             CREATE TABLE IF NOT EXISTS server_uids (
@@ -346,6 +562,71 @@ class PullsDB:
         except sqlite3.OperationalError:
             pass
 
+        # Sync run message listings (optionally by status), newest first
+        self.conn.executescript("""
+            CREATE INDEX IF NOT EXISTS idx_pm_run
+                ON pulled_messages(sync_run_id, pulled_at DESC);
+            CREATE INDEX IF NOT EXISTS idx_pm_run_status
+                ON pulled_messages(sync_run_id, status, pulled_at DESC);
+        """)
+
+        if not had_refs:
+            self._backfill_message_refs()
+
+        # Gather planner statistics once, so the indexes above get picked
+        if not self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        ).fetchone():
+            self.conn.executescript("PRAGMA analysis_limit = 400; ANALYZE;")
+
+    def _migrate_sync_runs_epoch(self) -> None:
+        """Convert sync_runs timestamps from local ISO text to INTEGER epoch seconds.
+
+        Rebuilds the table (a TEXT-affinity column would store integers as
+        text); its indexes are recreated by `_create_schema` afterwards.
+        """
+        cols = {r["name"]: r["type"] for r in self.conn.execute("PRAGMA table_info(sync_runs)")}
+        if cols.get("started_at", "INTEGER") == "INTEGER":
+            return
+        self.conn.executescript("""
+            BEGIN;
+            CREATE TABLE sync_runs_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                operation TEXT NOT NULL,
+                account TEXT NOT NULL,
+                folder TEXT NOT NULL,
+                started_at INTEGER NOT NULL,
+                ended_at INTEGER,
+                status TEXT NOT NULL DEFAULT 'running',
+                total INTEGER DEFAULT 0,
+                fetched INTEGER DEFAULT 0,
+                skipped INTEGER DEFAULT 0,
+                failed INTEGER DEFAULT 0,
+                error_message TEXT
+            );
+            INSERT INTO sync_runs_new
+            SELECT id, operation, account, folder,
+                   COALESCE(CAST(strftime('%s', started_at, 'utc') AS INTEGER), 0),
+                   CAST(strftime('%s', ended_at, 'utc') AS INTEGER),
+                   status, total, fetched, skipped, failed, error_message
+            FROM sync_runs;
+            DROP TABLE sync_runs;
+            ALTER TABLE sync_runs_new RENAME TO sync_runs;
+            COMMIT;
+        """)
+
+    def _backfill_message_refs(self) -> None:
+        """Populate message_refs from the references_ column of existing rows."""
+        cur = self.conn.execute("""
+            SELECT message_id, references_ FROM pulled_messages
+            WHERE message_id IS NOT NULL AND references_ IS NOT NULL
+        """)
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO message_refs (message_id, ref_id) VALUES (?, ?)",
+            [(mid, ref) for mid, refs in cur.fetchall() for ref in parse_references(refs)],
+        )
+        self.conn.commit()
+
     def _ensure_fts_table(self) -> None:
         """Ensure FTS5 table exists and is the correct type (regular, not external content).
 
@@ -402,10 +683,9 @@ class PullsDB:
         """
         if not message_id:
             return  # Can't index without message_id for join
-        self.conn.execute("""
-            INSERT INTO messages_fts(message_id, subject, body_text, from_addr, to_addr)
-            VALUES (?, ?, ?, ?, ?)
-        """, (message_id, subject, body_text, from_addr, to_addr))
+        self._run_write(lambda conn: conn.execute(
+            FTS_INSERT, (message_id, subject, body_text, from_addr, to_addr)
+        ), commit=False)
 
     def record_pull(
         self,
@@ -432,6 +712,8 @@ class PullsDB:
     ) -> None:
         """Record a pulled message (success or failure).
 
+        Commits every `PULL_COMMIT_INTERVAL` records (see `flush_pulls`).
+
         Args:
             account: Account name (e.g., 'y' for Yahoo)
             folder: Folder name (e.g., 'Inbox')
@@ -469,26 +751,77 @@ class PullsDB:
             )
 
         # Also record to pulls.db for metadata/FTS if it exists
-        if self._conn:
+        if self._writer:
             thread_id = compute_thread_id(message_id, references, in_reply_to)
-            thread_slug = self._get_or_create_thread_slug(thread_id) if thread_id else None
-            self.conn.execute("""
-                INSERT OR REPLACE INTO pulled_messages
-                    (account, folder, uidvalidity, uid, content_hash, message_id, local_path, pulled_at,
-                     subject, msg_date, status, sync_run_id, error_message,
-                     in_reply_to, references_, thread_id, thread_slug, from_addr, to_addr)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                account, folder, uidvalidity, uid, content_hash,
-                message_id, local_path, ts, subject, msg_date, status, sync_run_id, error_message,
-                in_reply_to, references, thread_id, thread_slug, from_addr, to_addr
-            ))
-
-            # Incremental FTS indexing - add to search index immediately
-            if status != "failed":
-                self.insert_fts(message_id, subject, body_text, from_addr, to_addr)
 
-            self.conn.commit()
+            def write(conn: sqlite3.Connection) -> None:
+                thread_slug = self._get_or_create_thread_slug(conn, thread_id) if thread_id else None
+                conn.execute("""
+                    INSERT OR REPLACE INTO pulled_messages
+                        (account, folder, uidvalidity, uid, content_hash, message_id, local_path, pulled_at,
+                         subject, msg_date, status, sync_run_id, error_message,
+                         in_reply_to, references_, thread_id, thread_slug, from_addr, to_addr)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    account, folder, uidvalidity, uid, content_hash,
+                    message_id, local_path, ts, subject, msg_date, status, sync_run_id, error_message,
+                    in_reply_to, references, thread_id, thread_slug, from_addr, to_addr
+                ))
+
+                if message_id and references:
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO message_refs (message_id, ref_id) VALUES (?, ?)",
+                        [(message_id, ref) for ref in parse_references(references)],
+                    )
+
+                # Incremental FTS indexing - add to search index immediately
+                if status != "failed" and message_id:
+                    conn.execute(FTS_INSERT, (message_id, subject, body_text, from_addr, to_addr))
+
+            self._run_write(write, commit=False)
+            self._uncommitted_pulls += 1
+            if self._uncommitted_pulls >= PULL_COMMIT_INTERVAL:
+                self.flush_pulls()
+
+    def flush_pulls(self) -> None:
+        """Commit pull records deferred by `record_pull` (in both databases)."""
+        if self._uids_db:
+            self._uids_db.flush()
+        if self._writer_thread:
+            self._writer_thread.flush()
+            self._raise_deferred_error()
+        elif self._writer and self._writer.in_transaction:
+            self._writer.commit()
+        self._uncommitted_pulls = 0
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Commit the server-state writes made in the block together.
+
+        Uses uids.db's transaction when split, otherwise pulls.db's.
+        """
+        if self._uids_db:
+            with self._uids_db.transaction():
+                yield
+        elif self._writer_thread:
+            # Queue the block's writes as one function, so they commit together
+            self._tx_writes = []
+            try:
+                yield
+                writes = self._tx_writes
+            finally:
+                self._tx_writes = None
+            self._run_write(lambda conn: [write(conn) for write in writes])
+        else:
+            with self._write():
+                yield
+
+    def _server_state_write(self, fn: Callable[[sqlite3.Connection], Any]) -> None:
+        """Run an uncommitted server-state write, joining `transaction()` if open."""
+        if self._tx_writes is not None:
+            self._tx_writes.append(fn)
+        else:
+            self._run_write(fn, commit=False)
 
     def record_pulls_batch(
         self,
@@ -500,12 +833,13 @@ class PullsDB:
             records: List of (account, folder, uidvalidity, uid, content_hash, message_id, local_path)
         """
         now = datetime.now().isoformat()
-        self.conn.executemany("""
+        self._run_write(lambda conn: conn.executemany("""
             INSERT OR REPLACE INTO pulled_messages
                 (account, folder, uidvalidity, uid, content_hash, message_id, local_path, pulled_at)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, [(r[0], r[1], r[2], r[3], r[4], r[5], r[6], now) for r in records])
-        self.conn.commit()
+        """, [(r[0], r[1], r[2], r[3], r[4], r[5], r[6], now) for r in records]))
+        # Refresh planner statistics if the batch changed them substantially
+        self._run_write(lambda conn: conn.execute("PRAGMA optimize"))
 
     def get_pulled_uids(
         self,
@@ -532,6 +866,35 @@ class PullsDB:
         """, (account, folder, uidvalidity))
         return {row["uid"] for row in cur}
 
+    def missing_uids(
+        self,
+        account: str,
+        folder: str,
+        uidvalidity: int,
+        uids: Iterable[int],
+    ) -> list[int]:
+        """Filter `uids` down to those not yet pulled (keeping their order).
+
+        Args:
+            account: Account name
+            folder: Folder name
+            uidvalidity: IMAP UIDVALIDITY value
+            uids: Candidate UIDs (e.g. from a server SEARCH)
+
+        Returns:
+            The candidates with no pull record
+        """
+        if self._uids_db:
+            return self._uids_db.missing_uids(account, folder, uidvalidity, uids)
+        cur = self.conn.execute("""
+            SELECT c.value FROM json_each(?) c
+            LEFT JOIN pulled_messages p
+                ON p.account = ? AND p.folder = ? AND p.uidvalidity = ? AND p.uid = c.value
+            WHERE p.uid IS NULL
+            ORDER BY c.key
+        """, (json_array(uids), account, folder, uidvalidity))
+        return [row[0] for row in cur]
+
     def get_pulled_count(
         self,
         account: str,
@@ -561,6 +924,7 @@ class PullsDB:
                 SELECT COUNT(*) FROM pulled_messages
                 WHERE account = ? AND folder = ?
             """, (account, folder))
+        cur.row_factory = None
         return cur.fetchone()[0]
 
     def has_content_hash(self, content_hash: str) -> bool:
@@ -572,6 +936,7 @@ class PullsDB:
             "SELECT 1 FROM pulled_messages WHERE content_hash = ? LIMIT 1",
             (content_hash,)
         )
+        cur.row_factory = None
         return cur.fetchone() is not None
 
     def get_all_content_hashes(self) -> set[str]:
@@ -628,25 +993,19 @@ class PullsDB:
         # Delegate to UidsDB if available
         if self._uids_db:
             return self._uids_db.get_uidvalidity(account, folder)
+        # Multiple UIDVALIDITYs mean the folder was reset at some point;
+        # return the most recent one (highest count)
         cur = self.conn.execute("""
-            SELECT DISTINCT uidvalidity FROM pulled_messages
+            SELECT uidvalidity FROM pulled_messages
             WHERE account = ? AND folder = ?
+            GROUP BY uidvalidity
+            ORDER BY COUNT(*) DESC
+            LIMIT 1
         """, (account, folder))
-        rows = cur.fetchall()
-        if not rows:
-            return None
-        if len(rows) > 1:
-            # Multiple UIDVALIDITYs - folder was reset at some point
-            # Return the most recent one (highest count)
-            cur = self.conn.execute("""
-                SELECT uidvalidity, COUNT(*) as cnt FROM pulled_messages
-                WHERE account = ? AND folder = ?
-                GROUP BY uidvalidity
-                ORDER BY cnt DESC
-                LIMIT 1
-            """, (account, folder))
-            return cur.fetchone()["uidvalidity"]
-        return rows[0]["uidvalidity"]
+        # Single-value lookups skip the connection's sqlite3.Row factory
+        cur.row_factory = None
+        row = cur.fetchone()
+        return row[0] if row else None
 
     # -------------------------------------------------------------------------
     # Server UIDs tracking
@@ -666,18 +1025,19 @@ class PullsDB:
             folder: Folder name
             uidvalidity: IMAP UIDVALIDITY value
             uid_message_ids: List of (uid, message_id) tuples
+
+        Not committed here; see `transaction()`.
         """
         # Delegate to UidsDB if available
         if self._uids_db:
             self._uids_db.record_server_uids(account, folder, uidvalidity, uid_message_ids)
             return
         now = datetime.now().isoformat()
-        self.conn.executemany("""
+        self._server_state_write(lambda conn: conn.executemany("""
             INSERT OR REPLACE INTO server_uids
                 (account, folder, uidvalidity, uid, message_id, last_seen)
             VALUES (?, ?, ?, ?, ?, ?)
-        """, [(account, folder, uidvalidity, uid, mid, now) for uid, mid in uid_message_ids])
-        self.conn.commit()
+        """, [(account, folder, uidvalidity, uid, mid, now) for uid, mid in uid_message_ids]))
 
     def record_server_folder(
         self,
@@ -686,17 +1046,17 @@ class PullsDB:
         uidvalidity: int,
         message_count: int,
     ) -> None:
-        """Record server folder metadata."""
+        """Record server folder metadata (uncommitted, see `transaction()`)."""
         # Delegate to UidsDB if available
         if self._uids_db:
             self._uids_db.record_server_folder(account, folder, uidvalidity, message_count)
             return
-        self.conn.execute("""
+        now = datetime.now().isoformat()
+        self._server_state_write(lambda conn: conn.execute("""
             INSERT OR REPLACE INTO server_folders
                 (account, folder, uidvalidity, message_count, last_checked)
             VALUES (?, ?, ?, ?, ?)
-        """, (account, folder, uidvalidity, message_count, datetime.now().isoformat()))
-        self.conn.commit()
+        """, (account, folder, uidvalidity, message_count, now)))
 
     def get_folders_with_activity(self, account: str | None = None) -> list[tuple[str, str, int]]:
         """Get list of folders that have pull activity.
@@ -755,7 +1115,7 @@ class PullsDB:
         self,
         account: str,
         folder: str,
-    ) -> tuple[int, int, str] | None:
+    ) -> tuple[int, int, datetime] | None:
         """Get server folder metadata (uidvalidity, message_count, last_checked).
 
         Returns:
@@ -765,13 +1125,25 @@ class PullsDB:
         if self._uids_db:
             return self._uids_db.get_server_folder_info(account, folder)
         cur = self.conn.execute("""
-            SELECT uidvalidity, message_count, last_checked FROM server_folders
+            SELECT uidvalidity, message_count, last_checked AS "last_checked [ISODATETIME]"
+            FROM server_folders
             WHERE account = ? AND folder = ?
         """, (account, folder))
+        cur.row_factory = None
+        return cur.fetchone()
+
+    def get_server_folder_uidvalidity(self, account: str, folder: str) -> int | None:
+        """Get the UIDVALIDITY last reported by the server for this folder."""
+        # Delegate to UidsDB if available
+        if self._uids_db:
+            return self._uids_db.get_server_folder_uidvalidity(account, folder)
+        cur = self.conn.execute(
+            "SELECT uidvalidity FROM server_folders WHERE account = ? AND folder = ?",
+            (account, folder),
+        )
+        cur.row_factory = None
         row = cur.fetchone()
-        if row:
-            return (row["uidvalidity"], row["message_count"], row["last_checked"])
-        return None
+        return row[0] if row else None
 
     def get_unpulled_uids(
         self,
@@ -793,7 +1165,8 @@ class PullsDB:
             WHERE s.account = ? AND s.folder = ? AND s.uidvalidity = ?
                 AND p.uid IS NULL
         """, (account, folder, uidvalidity))
-        return {row["uid"] for row in cur}
+        cur.row_factory = None
+        return {uid for uid, in cur}
 
     def get_uids_without_message_id(
         self,
@@ -810,7 +1183,8 @@ class PullsDB:
             WHERE account = ? AND folder = ? AND uidvalidity = ?
                 AND (message_id IS NULL OR message_id = '')
         """, (account, folder, uidvalidity))
-        return {row["uid"] for row in cur}
+        cur.row_factory = None
+        return {uid for uid, in cur}
 
     # -------------------------------------------------------------------------
     # Recent pulls and analytics
@@ -849,25 +1223,15 @@ class PullsDB:
         params.append(limit)
 
         cur = self.conn.execute(f"""
-            SELECT uid, folder, local_path, pulled_at, subject, msg_date, status
+            SELECT uid, folder, local_path, pulled_at AS "pulled_at [ISODATETIME]",
+                   subject, msg_date, status
             FROM pulled_messages
             {where}
             ORDER BY pulled_at DESC
             LIMIT ?
         """, params)
 
-        return [
-            RecentPull(
-                uid=row["uid"],
-                folder=row["folder"],
-                local_path=row["local_path"],
-                pulled_at=datetime.fromisoformat(row["pulled_at"]),
-                subject=row["subject"],
-                msg_date=row["msg_date"],
-                status=row["status"],
-            )
-            for row in cur
-        ]
+        return [RecentPull(*row) for row in cur]
 
     def get_pulls_by_hour(
         self,
@@ -1008,18 +1372,21 @@ class PullsDB:
         # Delegate to UidsDB if available
         if self._uids_db:
             return self._uids_db.clear_folder(account, folder, uidvalidity)
-        if uidvalidity is not None:
-            cur = self.conn.execute("""
-                DELETE FROM pulled_messages
-                WHERE account = ? AND folder = ? AND uidvalidity = ?
-            """, (account, folder, uidvalidity))
-        else:
-            cur = self.conn.execute("""
-                DELETE FROM pulled_messages
-                WHERE account = ? AND folder = ?
-            """, (account, folder))
-        self.conn.commit()
-        return cur.rowcount
+
+        def delete(conn: sqlite3.Connection) -> int:
+            if uidvalidity is not None:
+                cur = conn.execute("""
+                    DELETE FROM pulled_messages
+                    WHERE account = ? AND folder = ? AND uidvalidity = ?
+                """, (account, folder, uidvalidity))
+            else:
+                cur = conn.execute("""
+                    DELETE FROM pulled_messages
+                    WHERE account = ? AND folder = ?
+                """, (account, folder))
+            return cur.rowcount
+
+        return self._run_write(delete)
 
     # -------------------------------------------------------------------------
     # Sync runs - first-class tracking of pull/push operations
@@ -1034,6 +1401,9 @@ class PullsDB:
     ) -> int:
         """Start a new sync run and return its ID.
 
+        The insert is not committed here; it is committed along with the
+        first pulled message (or by `flush_sync_run`/`end_sync_run`).
+
         Args:
             operation: 'pull' or 'push'
             account: Account name
@@ -1043,13 +1413,17 @@ class PullsDB:
         Returns:
             Sync run ID
         """
-        now = datetime.now().isoformat()
-        cur = self.conn.execute("""
-            INSERT INTO sync_runs (operation, account, folder, started_at, status, total)
-            VALUES (?, ?, ?, ?, 'running', ?)
-        """, (operation, account, folder, now, total))
-        self.conn.commit()
-        return cur.lastrowid
+        now = int(time.time())
+
+        def insert(conn: sqlite3.Connection) -> int:
+            cur = conn.execute("""
+                INSERT INTO sync_runs (operation, account, folder, started_at, status, total)
+                VALUES (?, ?, ?, ?, 'running', ?)
+                RETURNING id
+            """, (operation, account, folder, now, total))
+            return cur.fetchone()[0]
+
+        return self._run_write(insert, commit=False)
 
     def update_sync_run(
         self,
@@ -1061,6 +1435,10 @@ class PullsDB:
     ) -> None:
         """Update sync run progress.
 
+        Not committed here: counters are ephemeral progress, committed with
+        the next write, `flush_sync_run`, or `end_sync_run` (a crashed run is
+        marked aborted by `cleanup_stale_runs` regardless).
+
         Args:
             sync_run_id: Sync run ID
             total: Total messages (if updated)
@@ -1085,9 +1463,15 @@ class PullsDB:
 
         if updates:
             params.append(sync_run_id)
-            self.conn.execute(f"""
-                UPDATE sync_runs SET {', '.join(updates)} WHERE id = ?
-            """, params)
+            sql = f"UPDATE sync_runs SET {', '.join(updates)} WHERE id = ?"
+            self._run_write(lambda conn: conn.execute(sql, params), commit=False, wait=False)
+
+    def flush_sync_run(self) -> None:
+        """Commit pending sync run progress (so other readers see it)."""
+        if self._writer_thread:
+            self._writer_thread.flush()
+            self._raise_deferred_error()
+        elif self.conn.in_transaction:
             self.conn.commit()
 
     def end_sync_run(
@@ -1103,38 +1487,21 @@ class PullsDB:
             status: Final status ('completed', 'aborted', 'failed')
             error_message: Error message if aborted/failed
         """
-        now = datetime.now().isoformat()
-        self.conn.execute("""
+        now = int(time.time())
+        self._run_write(lambda conn: conn.execute("""
             UPDATE sync_runs
             SET ended_at = ?, status = ?, error_message = ?
             WHERE id = ?
-        """, (now, status, error_message, sync_run_id))
-        self.conn.commit()
+        """, (now, status, error_message, sync_run_id)))
 
     def get_sync_run(self, sync_run_id: int) -> SyncRun | None:
         """Get a sync run by ID."""
-        cur = self.conn.execute("""
-            SELECT id, operation, account, folder, started_at, ended_at,
-                   status, total, fetched, skipped, failed, error_message
-            FROM sync_runs WHERE id = ?
-        """, (sync_run_id,))
-        row = cur.fetchone()
-        if not row:
-            return None
-        return SyncRun(
-            id=row["id"],
-            operation=row["operation"],
-            account=row["account"],
-            folder=row["folder"],
-            started_at=datetime.fromisoformat(row["started_at"]),
-            ended_at=datetime.fromisoformat(row["ended_at"]) if row["ended_at"] else None,
-            status=row["status"],
-            total=row["total"] or 0,
-            fetched=row["fetched"] or 0,
-            skipped=row["skipped"] or 0,
-            failed=row["failed"] or 0,
-            error_message=row["error_message"],
-        )
+        with self._checkout_reader() as conn:
+            cur = conn.execute(
+                f"SELECT {SYNC_RUN_COLS} FROM sync_runs WHERE id = ?", (sync_run_id,)
+            )
+            row = cur.fetchone()
+            return SyncRun(*row) if row else None
 
     def get_recent_sync_runs(
         self,
@@ -1171,32 +1538,16 @@ class PullsDB:
         where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
         params.extend([limit, offset])
 
-        cur = self.conn.execute(f"""
-            SELECT id, operation, account, folder, started_at, ended_at,
-                   status, total, fetched, skipped, failed, error_message
-            FROM sync_runs
-            {where}
-            ORDER BY started_at DESC
-            LIMIT ? OFFSET ?
-        """, params)
+        with self._checkout_reader() as conn:
+            cur = conn.execute(f"""
+                SELECT {SYNC_RUN_COLS}
+                FROM sync_runs
+                {where}
+                ORDER BY started_at DESC
+                LIMIT ? OFFSET ?
+            """, params)
 
-        return [
-            SyncRun(
-                id=row["id"],
-                operation=row["operation"],
-                account=row["account"],
-                folder=row["folder"],
-                started_at=datetime.fromisoformat(row["started_at"]),
-                ended_at=datetime.fromisoformat(row["ended_at"]) if row["ended_at"] else None,
-                status=row["status"],
-                total=row["total"] or 0,
-                fetched=row["fetched"] or 0,
-                skipped=row["skipped"] or 0,
-                failed=row["failed"] or 0,
-                error_message=row["error_message"],
-            )
-            for row in cur
-        ]
+            return [SyncRun(*row) for row in cur]
 
     def count_sync_runs(
         self,
@@ -1228,8 +1579,9 @@ class PullsDB:
 
         where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
 
-        cur = self.conn.execute(f"SELECT COUNT(*) FROM sync_runs {where}", params)
-        return cur.fetchone()[0]
+        with self._checkout_reader() as conn:
+            cur = conn.execute(f"SELECT COUNT(*) FROM sync_runs {where}", params)
+            return cur.fetchone()[0]
 
     def cleanup_stale_runs(self, max_age_minutes: int = 60) -> int:
         """Mark stale running sync runs as aborted.
@@ -1240,15 +1592,13 @@ class PullsDB:
         Returns:
             Number of runs marked as aborted
         """
-        from datetime import timedelta
-        cutoff = (datetime.now() - timedelta(minutes=max_age_minutes)).isoformat()
-        cur = self.conn.execute("""
+        cutoff = int(time.time()) - max_age_minutes * 60
+        return self._run_write(lambda conn: conn.execute("""
             UPDATE sync_runs
-            SET status = 'aborted', ended_at = datetime('now'), error_message = 'Marked as stale (no completion)'
+            SET status = 'aborted', ended_at = CAST(strftime('%s', 'now') AS INTEGER),
+                error_message = 'Marked as stale (no completion)'
             WHERE status = 'running' AND started_at < ?
-        """, (cutoff,))
-        self.conn.commit()
-        return cur.rowcount
+        """, (cutoff,)).rowcount)
 
     def get_sync_run_messages(
         self,
@@ -1275,50 +1625,35 @@ class PullsDB:
         where = f"WHERE {' AND '.join(conditions)}"
         params.append(limit)
 
-        cur = self.conn.execute(f"""
-            SELECT account, folder, uidvalidity, uid, content_hash, message_id,
-                   local_path, pulled_at, status, sync_run_id, subject, msg_date, error_message
-            FROM pulled_messages
-            {where}
-            ORDER BY pulled_at DESC
-            LIMIT ?
-        """, params)
+        with self._checkout_reader() as conn:
+            cur = conn.execute(f"""
+                {PULL_SELECT}
+                {where}
+                ORDER BY pulled_at DESC
+                LIMIT ?
+            """, params)
 
-        return [
-            PulledMessage(
-                account=row["account"],
-                folder=row["folder"],
-                uidvalidity=row["uidvalidity"],
-                uid=row["uid"],
-                content_hash=row["content_hash"],
-                message_id=row["message_id"],
-                local_path=row["local_path"],
-                pulled_at=datetime.fromisoformat(row["pulled_at"]),
-                status=row["status"],
-                sync_run_id=row["sync_run_id"],
-                error_message=row["error_message"],
-            )
-            for row in cur
-        ]
+            return [PulledMessage(*row) for row in cur]
 
     # -------------------------------------------------------------------------
     # Threading methods
     # -------------------------------------------------------------------------
 
-    def _get_or_create_thread_slug(self, thread_id: str) -> str:
+    def _get_or_create_thread_slug(self, conn: sqlite3.Connection, thread_id: str) -> str:
         """Get existing thread_slug for a thread_id, or create a new one.
 
         If another message with the same thread_id already has a slug, return that.
         Otherwise, compute a new slug with collision handling.
 
         Args:
+            conn: Writer connection (the slug must see its own uncommitted pulls)
             thread_id: The canonical thread_id (Message-ID of thread root)
 
         Returns:
             8-character base64url slug
         """
         # Check if any message with this thread_id already has a slug
-        cur = self.conn.execute("""
+        cur = conn.execute("""
             SELECT thread_slug FROM pulled_messages
             WHERE thread_id = ? AND thread_slug IS NOT NULL
             LIMIT 1
@@ -1331,7 +1666,7 @@ class PullsDB:
         base_slug = compute_thread_slug(thread_id)
 
         # Check for collision with different thread_id
-        cur = self.conn.execute("""
+        cur = conn.execute("""
             SELECT thread_id FROM pulled_messages
             WHERE thread_slug = ? AND thread_id != ?
             LIMIT 1
@@ -1351,7 +1686,7 @@ class PullsDB:
             new_bytes = slug_int.to_bytes(6, 'big')
             new_slug = base64.urlsafe_b64encode(new_bytes).decode().rstrip('=')
 
-            cur = self.conn.execute("""
+            cur = conn.execute("""
                 SELECT 1 FROM pulled_messages
                 WHERE thread_slug = ? AND thread_id != ?
                 LIMIT 1
@@ -1364,10 +1699,12 @@ class PullsDB:
         return hashlib.sha256(thread_id.encode()).hexdigest()[:16]
 
     def get_thread(self, message_id: str, limit: int = 100) -> list[PulledMessage]:
-        """Get all messages in a thread using thread_id index.
+        """Get all messages in a thread.
 
-        First computes the thread_id for the given message, then fetches all
-        messages with the same thread_id.
+        Expands the message's thread_id group transitively over In-Reply-To
+        and the message_refs table (in both directions) with a recursive CTE,
+        so messages whose thread_id was computed from a different root are
+        still found. Every step of the expansion is an index probe.
 
         Args:
             message_id: The Message-ID to find thread for
@@ -1376,36 +1713,44 @@ class PullsDB:
         Returns:
             List of PulledMessage objects in the thread, ordered by msg_date
         """
-        # First, get the thread_id for this message
-        cur = self.conn.execute("""
-            SELECT thread_id, in_reply_to, references_
-            FROM pulled_messages
-            WHERE message_id = ?
-        """, (message_id,))
-        row = cur.fetchone()
-
-        if not row:
-            return []
-
-        thread_id = row[0]
-
-        # If thread_id is not populated, compute it (for backwards compat with unbackfilled data)
-        if not thread_id:
-            thread_id = compute_thread_id(message_id, row[2], row[1])
-
-        if not thread_id:
-            # No thread info, return just this message
-            cur = self.conn.execute("""
-                SELECT account, folder, uidvalidity, uid, content_hash, message_id,
-                       local_path, pulled_at, status, sync_run_id, subject, msg_date,
-                       error_message, in_reply_to, references_, thread_id, thread_slug, from_addr, to_addr
+        with self._checkout_reader() as conn:
+            # First, get the thread_id for this message
+            cur = conn.execute("""
+                SELECT thread_id, in_reply_to, references_
                 FROM pulled_messages
                 WHERE message_id = ?
             """, (message_id,))
             row = cur.fetchone()
-            return [self._row_to_pulled_message(row)] if row else []
 
-        return self.get_thread_by_id(thread_id, limit)
+            if not row:
+                return []
+
+            # If thread_id is not populated, compute it (for backwards compat with unbackfilled data)
+            thread_id = row[0] or compute_thread_id(message_id, row[2], row[1])
+
+            cur = conn.execute(f"""
+                WITH RECURSIVE thread(mid) AS (
+                    SELECT ?
+                    UNION
+                    SELECT message_id FROM pulled_messages
+                    WHERE thread_id = ? AND message_id IS NOT NULL
+                    UNION
+                    SELECT r.message_id FROM message_refs r JOIN thread ON r.ref_id = thread.mid
+                    UNION
+                    SELECT r.ref_id FROM message_refs r JOIN thread ON r.message_id = thread.mid
+                    UNION
+                    SELECT p.message_id FROM pulled_messages p JOIN thread ON p.in_reply_to = thread.mid
+                    UNION
+                    SELECT p.in_reply_to FROM pulled_messages p JOIN thread ON p.message_id = thread.mid
+                    WHERE p.in_reply_to IS NOT NULL
+                )
+                {PULL_SELECT}
+                WHERE message_id IN thread
+                ORDER BY msg_date
+                LIMIT ?
+            """, (message_id, thread_id, limit))
+
+            return [PulledMessage(*row) for row in cur]
 
     def get_thread_by_id(self, thread_id: str, limit: int = 100) -> list[PulledMessage]:
         """Get all messages in a thread by thread_id directly.
@@ -1417,17 +1762,15 @@ class PullsDB:
         Returns:
             List of PulledMessage objects in the thread, ordered by msg_date
         """
-        cur = self.conn.execute("""
-            SELECT account, folder, uidvalidity, uid, content_hash, message_id,
-                   local_path, pulled_at, status, sync_run_id, subject, msg_date,
-                   error_message, in_reply_to, references_, thread_id, thread_slug, from_addr, to_addr
-            FROM pulled_messages
-            WHERE thread_id = ?
-            ORDER BY msg_date
-            LIMIT ?
-        """, (thread_id, limit))
+        with self._checkout_reader() as conn:
+            cur = conn.execute(f"""
+                {PULL_SELECT}
+                WHERE thread_id = ?
+                ORDER BY msg_date
+                LIMIT ?
+            """, (thread_id, limit))
 
-        return [self._row_to_pulled_message(row) for row in cur]
+            return [PulledMessage(*row) for row in cur]
 
     def get_thread_by_slug(self, slug: str, limit: int = 100) -> list[PulledMessage]:
         """Get all messages in a thread by thread_slug.
@@ -1439,17 +1782,15 @@ class PullsDB:
         Returns:
             List of PulledMessage objects in the thread, ordered by msg_date
         """
-        cur = self.conn.execute("""
-            SELECT account, folder, uidvalidity, uid, content_hash, message_id,
-                   local_path, pulled_at, status, sync_run_id, subject, msg_date,
-                   error_message, in_reply_to, references_, thread_id, thread_slug, from_addr, to_addr
-            FROM pulled_messages
-            WHERE thread_slug = ?
-            ORDER BY msg_date
-            LIMIT ?
-        """, (slug, limit))
+        with self._checkout_reader() as conn:
+            cur = conn.execute(f"""
+                {PULL_SELECT}
+                WHERE thread_slug = ?
+                ORDER BY msg_date
+                LIMIT ?
+            """, (slug, limit))
 
-        return [self._row_to_pulled_message(row) for row in cur]
+            return [PulledMessage(*row) for row in cur]
 
     def get_replies(self, message_id: str, limit: int = 100) -> list[PulledMessage]:
         """Get direct replies to a message.
@@ -1461,42 +1802,15 @@ class PullsDB:
         Returns:
             List of PulledMessage objects that reply to this message
         """
-        cur = self.conn.execute("""
-            SELECT account, folder, uidvalidity, uid, content_hash, message_id,
-                   local_path, pulled_at, status, sync_run_id, subject, msg_date,
-                   error_message, in_reply_to, references_, thread_id, thread_slug, from_addr, to_addr
-            FROM pulled_messages
-            WHERE in_reply_to = ?
-            ORDER BY msg_date
-            LIMIT ?
-        """, (message_id, limit))
-
-        return [self._row_to_pulled_message(row) for row in cur]
-
-    def _row_to_pulled_message(self, row: sqlite3.Row) -> PulledMessage:
-        """Convert a database row to a PulledMessage object."""
-        keys = row.keys()
-        return PulledMessage(
-            account=row["account"],
-            folder=row["folder"],
-            uidvalidity=row["uidvalidity"],
-            uid=row["uid"],
-            content_hash=row["content_hash"],
-            message_id=row["message_id"],
-            local_path=row["local_path"],
-            pulled_at=datetime.fromisoformat(row["pulled_at"]),
-            status=row["status"],
-            sync_run_id=row["sync_run_id"],
-            subject=row["subject"] if "subject" in keys else None,
-            msg_date=row["msg_date"] if "msg_date" in keys else None,
-            error_message=row["error_message"] if "error_message" in keys else None,
-            in_reply_to=row["in_reply_to"] if "in_reply_to" in keys else None,
-            references=row["references_"] if "references_" in keys else None,
-            thread_id=row["thread_id"] if "thread_id" in keys else None,
-            thread_slug=row["thread_slug"] if "thread_slug" in keys else None,
-            from_addr=row["from_addr"] if "from_addr" in keys else None,
-            to_addr=row["to_addr"] if "to_addr" in keys else None,
-        )
+        with self._checkout_reader() as conn:
+            cur = conn.execute(f"""
+                {PULL_SELECT}
+                WHERE in_reply_to = ?
+                ORDER BY msg_date
+                LIMIT ?
+            """, (message_id, limit))
+
+            return [PulledMessage(*row) for row in cur]
 
     # -------------------------------------------------------------------------
     # Full-text search methods
@@ -1535,51 +1849,89 @@ class PullsDB:
         where = " AND ".join(conditions)
         params.extend([limit, offset])
 
-        cur = self.conn.execute(f"""
-            SELECT p.account, p.folder, p.uidvalidity, p.uid, p.content_hash, p.message_id,
-                   p.local_path, p.pulled_at, p.status, p.sync_run_id,
-                   COALESCE(messages_fts.subject, p.subject) as subject,
-                   p.msg_date,
-                   p.error_message, p.in_reply_to, p.references_,
-                   COALESCE(messages_fts.from_addr, p.from_addr) as from_addr,
-                   COALESCE(messages_fts.to_addr, p.to_addr) as to_addr,
-                   bm25(messages_fts) as rank
-            FROM messages_fts
-            JOIN pulled_messages p ON messages_fts.message_id = p.message_id
-            WHERE {where}
-            ORDER BY p.msg_date DESC NULLS LAST
-            LIMIT ? OFFSET ?
-        """, params)
+        with self._checkout_reader() as conn:
+            cur = conn.execute(f"""
+                SELECT p.account, p.folder, p.uidvalidity, p.uid, p.content_hash, p.message_id,
+                       p.local_path, p.pulled_at AS "pulled_at [ISODATETIME]", p.status, p.sync_run_id,
+                       COALESCE(messages_fts.subject, p.subject) as subject,
+                       p.msg_date,
+                       p.error_message, p.in_reply_to, p.references_,
+                       p.thread_id, p.thread_slug,
+                       COALESCE(messages_fts.from_addr, p.from_addr) as from_addr,
+                       COALESCE(messages_fts.to_addr, p.to_addr) as to_addr
+                FROM messages_fts
+                JOIN pulled_messages p ON messages_fts.message_id = p.message_id
+                WHERE {where}
+                ORDER BY p.msg_date DESC NULLS LAST
+                LIMIT ? OFFSET ?
+            """, params)
 
-        return [self._row_to_pulled_message(row) for row in cur]
+            return [PulledMessage(*row) for row in cur]
 
     def search_count(
         self,
         query: str,
         account: str | None = None,
         folder: str | None = None,
+        max_count: int | None = None,
     ) -> int:
-        """Get total count of search results (for pagination)."""
-        conditions = ["messages_fts MATCH ?"]
-        params: list = [query]
+        """Get total count of search results (for pagination).
 
-        if account:
-            conditions.append("p.account = ?")
-            params.append(account)
-        if folder:
-            conditions.append("p.folder = ?")
-            params.append(folder)
+        Counts are cached per (query, filters) until new rows land in
+        pulled_messages or messages_fts, so paging through results doesn't
+        re-run the MATCH each time.
 
-        where = " AND ".join(conditions)
+        Args:
+            query: FTS5 search query
+            account: Optional account filter
+            folder: Optional folder filter
+            max_count: Stop counting past this many matches
 
-        cur = self.conn.execute(f"""
-            SELECT COUNT(*) as cnt
-            FROM messages_fts
-            JOIN pulled_messages p ON messages_fts.message_id = p.message_id
-            WHERE {where}
-        """, params)
-        row = cur.fetchone()
-        return row["cnt"] if row else 0
+        Returns:
+            Number of matches, or -1 if there are more than max_count
+        """
+        with self._checkout_reader() as conn:
+            generation = tuple(conn.execute("""
+                SELECT (SELECT MAX(rowid) FROM pulled_messages),
+                       (SELECT rowid FROM messages_fts ORDER BY rowid DESC LIMIT 1)
+            """).fetchone())
+            key = (query, account, folder, max_count)
+            if generation != self._search_count_generation:
+                self._search_counts.clear()
+                self._search_count_generation = generation
+            elif key in self._search_counts:
+                self._search_counts.move_to_end(key)
+                return self._search_counts[key]
+
+            params: list = [query]
+            if account is None and folder is None:
+                # No filters: count FTS matches directly, without the join
+                sql = "SELECT 1 FROM messages_fts WHERE messages_fts MATCH ?"
+            else:
+                conditions = ["messages_fts MATCH ?"]
+                if account:
+                    conditions.append("p.account = ?")
+                    params.append(account)
+                if folder:
+                    conditions.append("p.folder = ?")
+                    params.append(folder)
+                sql = f"""
+                    SELECT 1 FROM messages_fts
+                    JOIN pulled_messages p ON messages_fts.message_id = p.message_id
+                    WHERE {' AND '.join(conditions)}
+                """
+            if max_count is not None:
+                sql += " LIMIT ?"
+                params.append(max_count + 1)
+
+            count = conn.execute(f"SELECT COUNT(*) FROM ({sql})", params).fetchone()[0]
+
+        if max_count is not None and count > max_count:
+            count = -1
+        self._search_counts[key] = count
+        if len(self._search_counts) > SEARCH_COUNT_CACHE_SIZE:
+            self._search_counts.popitem(last=False)
+        return count
 
     def rebuild_fts_index(self) -> int:
         """Rebuild the FTS5 index from pulled_messages (subject/from/to only).
@@ -1591,22 +1943,64 @@ class PullsDB:
         Returns:
             Number of messages indexed
         """
-        # Clear existing FTS data
-        self.conn.execute("DELETE FROM messages_fts")
 
-        # Re-insert all messages that have a message_id (required for join)
-        # body_text will be NULL since we don't store it in pulled_messages
-        cur = self.conn.execute("""
+        def rebuild(conn: sqlite3.Connection) -> int:
+            # Clear existing FTS data
+            conn.execute("DELETE FROM messages_fts")
+
+            # Re-insert all messages that have a message_id (required for join)
+            # body_text will be NULL since we don't store it in pulled_messages
+            cur = conn.execute("""
+                INSERT INTO messages_fts(message_id, subject, body_text, from_addr, to_addr)
+                SELECT message_id, subject, NULL, from_addr, to_addr
+                FROM pulled_messages
+                WHERE message_id IS NOT NULL
+                  AND subject IS NOT NULL
+            """)
+            return cur.rowcount
+
+        return self._run_write(rebuild)
+
+    def rebuild_fts_since(self, pulled_at: datetime) -> int:
+        """Index messages pulled after `pulled_at` that are missing from FTS.
+
+        Unlike `rebuild_fts_index`, this leaves existing FTS rows (and their
+        body_text) alone and only touches recent pulls, so it's cheap enough
+        to run after every sync.
+
+        Args:
+            pulled_at: Only consider messages pulled after this time
+
+        Returns:
+            Number of messages indexed
+        """
+        # MATCH narrows candidates via the FTS index; the equality check is exact
+        return self._run_write(lambda conn: conn.execute("""
             INSERT INTO messages_fts(message_id, subject, body_text, from_addr, to_addr)
-            SELECT message_id, subject, NULL, from_addr, to_addr
-            FROM pulled_messages
-            WHERE message_id IS NOT NULL
-              AND subject IS NOT NULL
-        """)
-        count = cur.rowcount
-        self.conn.commit()
+            SELECT p.message_id, p.subject, NULL, p.from_addr, p.to_addr
+            FROM pulled_messages p
+            WHERE p.pulled_at > ?
+              AND p.message_id IS NOT NULL
+              AND p.subject IS NOT NULL
+              AND NOT EXISTS (
+                  SELECT 1 FROM messages_fts
+                  WHERE messages_fts MATCH 'message_id : "' || replace(p.message_id, '"', '""') || '"'
+                    AND messages_fts.message_id = p.message_id
+              )
+            GROUP BY p.message_id
+        """, (pulled_at.isoformat(),)).rowcount)
+
+    def optimize_fts(self, pages: int = 500) -> None:
+        """Incrementally merge FTS index segments.
+
+        Does a bounded amount of work (`pages` leaf pages) per call, rather
+        than FTS5's all-at-once 'optimize'.
+        """
+        self._run_write(lambda conn: conn.execute(
+            "INSERT INTO messages_fts(messages_fts, rank) VALUES ('merge', ?)",
+            (-pages,)
+        ))
 
-        return count
 
 def get_pulls_db(root: Path | None = None) -> PullsDB:
     """Get PullsDB instance for the current project.
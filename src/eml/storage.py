@@ -1,10 +1,27 @@
 """Local email storage using SQLite."""
 
+import io
+import re
 import sqlite3
+from collections import OrderedDict
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterator
+from typing import Iterable, Iterator
+
+from .db import (
+    IN_JSON_ARRAY,
+    READER_PRAGMAS,
+    ReaderPool,
+    apply_pragmas,
+    connect_readonly,
+    json_array,
+    namedtuple_row,
+    replace_database,
+    vacuum_into,
+)
 
 # Default paths
 EML_DIR = ".eml"
@@ -13,17 +30,33 @@ ACCTS_DB = "accts.db"
 GLOBAL_CONFIG_DIR = Path.home() / ".config" / "eml"
 
 
+# Start directory -> .eml directory found above it. Only hits are cached
+# (and re-checked with one stat); a miss is re-walked, since `eml init` may
+# create the directory later in the same process.
+_eml_dirs: dict[Path, Path] = {}
+
+
 def find_eml_dir(start: Path | None = None) -> Path | None:
     """Find .eml directory, searching upward from start (or cwd)."""
-    path = (start or Path.cwd()).resolve()
+    start = (start or Path.cwd()).resolve()
+    eml_dir = _eml_dirs.get(start)
+    if eml_dir is not None and eml_dir.is_dir():
+        return eml_dir
+    path = start
     while path != path.parent:
         eml_dir = path / EML_DIR
         if eml_dir.is_dir():
+            _eml_dirs[start] = eml_dir
             return eml_dir
         path = path.parent
     return None
 
 
+def clear_eml_dir_cache() -> None:
+    """Forget cached `find_eml_dir` results (e.g. after creating a nested .eml)."""
+    _eml_dirs.clear()
+
+
 def get_eml_dir(require: bool = True) -> Path:
     """Get .eml directory, raising if not found and require=True."""
     eml_dir = find_eml_dir()
@@ -56,9 +89,14 @@ def get_accts_db_path(local_only: bool = False) -> Path | None:
     return eml_dir / ACCTS_DB if eml_dir else None
 
 
-@dataclass
+@dataclass(slots=True)
 class StoredMessage:
-    """A message stored in local storage."""
+    """A message stored in local storage.
+
+    `raw` is None when the message was loaded without its body (e.g. by
+    `MessageStorage.iter_messages`); `load_raw()` reads it on demand, or use
+    `MessageStorage.open_raw` with `id` to stream it.
+    """
     id: int
     message_id: str
     date: datetime | None
@@ -66,13 +104,22 @@ class StoredMessage:
     to_addr: str
     cc_addr: str
     subject: str
-    raw: bytes
+    raw: bytes | None
     source_folder: str | None = None
     source_uid: str | None = None
-    tags: list[str] = field(default_factory=list)
+    tags: tuple[str, ...] = ()
+    _storage: "MessageStorage | None" = field(default=None, repr=False, compare=False)
+
+    def load_raw(self) -> bytes:
+        """Return `raw`, reading it from the originating storage if not yet loaded."""
+        if self.raw is None:
+            if self._storage is None:
+                raise ValueError(f"No body loaded for {self.message_id}")
+            self.raw = self._storage.get_raw(self.id)
+        return self.raw
 
 
-@dataclass
+@dataclass(slots=True)
 class Account:
     """An IMAP account configuration."""
     name: str
@@ -82,33 +129,163 @@ class Account:
     created_at: datetime | None = None
 
 
+# Prepared statements kept per connection (sqlite3's default is 128)
+CACHED_STATEMENTS = 512
+
+
 class BaseStorage:
-    """Base class for SQLite storage."""
+    """Base class for SQLite storage.
+
+    Writes (and reads that must see uncommitted writes) use the main
+    connection; other reads can borrow pooled read-only connections via
+    `_checkout_reader`, so they don't queue behind it.
+    """
 
-    def __init__(self, path: str | Path):
+    def __init__(self, path: str | Path, readers: int | None = None):
+        """Initialize storage.
+
+        Args:
+            path: Database file path
+            readers: Max pooled read-only connections (defaults to CPU count)
+        """
         self.path = Path(path)
         self._conn: sqlite3.Connection | None = None
+        self._num_readers = readers
+        self._readers: ReaderPool | None = None
+        self._in_batch = False
 
     def connect(self) -> None:
         """Open database connection and create schema if needed."""
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        self._conn = sqlite3.connect(self.path, timeout=30.0)
+        self._conn = sqlite3.connect(
+            self.path, timeout=30.0, detect_types=sqlite3.PARSE_COLNAMES,
+            cached_statements=CACHED_STATEMENTS,
+        )
         self._conn.row_factory = sqlite3.Row
-        self._conn.execute("PRAGMA journal_mode=WAL")  # better concurrency
+        apply_pragmas(self._conn)  # WAL for concurrency, plus cache/mmap/sync tuning
         self._create_schema()
+        self._readers = ReaderPool(
+            self.path, size=self._num_readers, pragmas=READER_PRAGMAS,
+            detect_types=sqlite3.PARSE_COLNAMES, cached_statements=CACHED_STATEMENTS,
+        )
+
+    def open_readonly(self) -> sqlite3.Connection:
+        """Open a new read-only connection, e.g. to hand to a reader thread.
+
+        The caller owns the connection (and closes it).
+        """
+        conn = connect_readonly(
+            self.path, detect_types=sqlite3.PARSE_COLNAMES, cached_statements=CACHED_STATEMENTS,
+        )
+        conn.row_factory = sqlite3.Row
+        apply_pragmas(conn, READER_PRAGMAS)
+        return conn
+
+    @contextmanager
+    def _checkout_reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection for read-only queries.
+
+        Uses a pooled read-only connection, except while the main connection
+        has uncommitted changes (reads then go through it, so callers see
+        their own writes).
+        """
+        conn = self.conn
+        if conn.in_transaction or not self._readers:
+            yield conn
+            return
+        with self._readers.checkout() as reader:
+            yield reader
 
     def disconnect(self) -> None:
-        """Close database connection."""
+        """Commit any deferred writes and close database connection."""
+        if self._readers:
+            self._readers.close()
+            self._readers = None
         if self._conn:
+            if self._conn.in_transaction:
+                self._conn.commit()
+            # Cheap when nothing changed; keeps planner statistics current
+            self._conn.execute("PRAGMA optimize")
             self._conn.close()
             self._conn = None
 
+    def commit(self) -> None:
+        """Commit writes deferred with ``commit=False``."""
+        self.conn.commit()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Run the block's writes as one transaction.
+
+        Mutators skip their own commits inside the block; it is committed
+        (followed by a passive WAL checkpoint) on exit, or rolled back if
+        the block raises. Nested blocks join the outer one.
+        """
+        if self._in_batch:
+            yield
+            return
+        self._begin()
+        self._in_batch = True
+        try:
+            yield
+        except BaseException:
+            self.conn.rollback()
+            self._rolled_back()
+            raise
+        else:
+            self.conn.commit()
+            self.conn.execute("PRAGMA optimize")
+            self.conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        finally:
+            self._in_batch = False
+
+    def _commit(self, optimize: bool = False) -> None:
+        """Commit a mutator's writes, unless inside `batch()`.
+
+        Args:
+            optimize: Also refresh planner statistics (after bulk writes)
+        """
+        if self._in_batch:
+            return
+        self.conn.commit()
+        if optimize:
+            self.conn.execute("PRAGMA optimize")
+
+    def _rolled_back(self) -> None:
+        """Called after `batch()` rolls back; drop state derived from its writes."""
+
+    def compact(self) -> tuple[int, int]:
+        """Rewrite the database file without free pages (reconnects).
+
+        Returns:
+            (size before, size after) in bytes
+        """
+        if self.conn.in_transaction:
+            self.conn.commit()
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        before = self.path.stat().st_size
+        tmp = vacuum_into(self.conn, self.path)
+        self.disconnect()
+        replace_database(tmp, self.path)
+        self.connect()
+        return before, self.path.stat().st_size
+
+    def _begin(self) -> None:
+        """Open a write transaction, unless one is already in progress."""
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN IMMEDIATE")
+
     @property
     def conn(self) -> sqlite3.Connection:
         if not self._conn:
             raise RuntimeError("Not connected")
         return self._conn
 
+    @property
+    def connected(self) -> bool:
+        """Whether `connect()` has been called (and not yet `disconnect()`)."""
+        return self._conn is not None
+
     def _create_schema(self) -> None:
         """Create database schema. Override in subclasses."""
         raise NotImplementedError
@@ -121,6 +298,10 @@ class BaseStorage:
         self.disconnect()
 
 
+# `accounts` columns in Account field order
+ACCOUNT_COLS = 'name, type, user, password, created_at AS "created_at [ISODATETIME]"'
+
+
 class AccountStorage(BaseStorage):
     """SQLite storage for IMAP accounts."""
 
@@ -144,54 +325,25 @@ class AccountStorage(BaseStorage):
                ON CONFLICT(name) DO UPDATE SET type = ?, user = ?, password = ?""",
             (name, type, user, password, type, user, password)
         )
-        self.conn.commit()
+        self._commit()
 
     def get(self, name: str) -> Account | None:
         """Get an account by name."""
         cur = self.conn.execute(
-            "SELECT * FROM accounts WHERE name = ?", (name,)
+            f"SELECT {ACCOUNT_COLS} FROM accounts WHERE name = ?", (name,)
         )
         row = cur.fetchone()
-        if not row:
-            return None
-        created_at = None
-        if row["created_at"]:
-            try:
-                created_at = datetime.fromisoformat(row["created_at"])
-            except ValueError:
-                pass
-        return Account(
-            name=row["name"],
-            type=row["type"],
-            user=row["user"],
-            password=row["password"],
-            created_at=created_at,
-        )
+        return Account(*row) if row else None
 
     def list(self) -> list[Account]:
         """List all accounts."""
-        cur = self.conn.execute("SELECT * FROM accounts ORDER BY name")
-        accounts = []
-        for row in cur:
-            created_at = None
-            if row["created_at"]:
-                try:
-                    created_at = datetime.fromisoformat(row["created_at"])
-                except ValueError:
-                    pass
-            accounts.append(Account(
-                name=row["name"],
-                type=row["type"],
-                user=row["user"],
-                password=row["password"],
-                created_at=created_at,
-            ))
-        return accounts
+        cur = self.conn.execute(f"SELECT {ACCOUNT_COLS} FROM accounts ORDER BY name")
+        return [Account(*row) for row in cur]
 
     def remove(self, name: str) -> bool:
         """Remove an account. Returns True if it existed."""
         cur = self.conn.execute("DELETE FROM accounts WHERE name = ?", (name,))
-        self.conn.commit()
+        self._commit()
         return cur.rowcount > 0
 
 
@@ -214,29 +366,235 @@ def get_account(name: str) -> Account | None:
     return None
 
 
+def _epoch(dt: datetime | None) -> int | None:
+    """Epoch seconds for a datetime (naive = local time), as stored in `messages.date`.
+
+    Read back (through `[EPOCH_UTC]`) as UTC-aware datetimes.
+    """
+    return int(dt.timestamp()) if dt else None
+
+
+def _fts_phrase(column: str, text: str) -> str:
+    """Build an FTS5 query matching `text` as a phrase prefix within `column`."""
+    escaped = text.replace('"', '""')
+    return f'{column} : "{escaped}" *'
+
+
+# Rows fetched per round trip when streaming query results
+FETCH_SIZE = 256
+
+# Max remembered has_message / is_pushed hits per MessageStorage
+KNOWN_CACHE_SIZE = 100_000
+
+
+def _remember(cache: OrderedDict, key) -> None:
+    """Record `key` as most recently used in an LRU `cache`."""
+    cache[key] = None
+    cache.move_to_end(key)
+    if len(cache) > KNOWN_CACHE_SIZE:
+        cache.popitem(last=False)
+
+# Header columns of `messages`, in StoredMessage field order (minus raw),
+# with the denormalized `tags` last
+MESSAGE_COLS = """m.id, m.message_id, m.date AS "date [EPOCH_UTC]",
+    COALESCE(m.from_addr, '') AS from_addr, COALESCE(m.to_addr, '') AS to_addr,
+    COALESCE(m.cc_addr, '') AS cc_addr, COALESCE(m.subject, '') AS subject,
+    m.source_folder, m.source_uid, m.tags"""
+
+# Separator of the sorted tags in `messages.tags` (ASCII unit separator)
+TAG_SEP = "\x1f"
+
+# `messages.tags` for one message, rebuilt from `message_tags`. (Rows of an
+# ordered subquery reach group_concat in order.)
+_TAGS_CONCAT = """COALESCE((SELECT group_concat(tag, char(31)) FROM (
+        SELECT tag FROM message_tags WHERE message_id = {mid} ORDER BY tag
+    )), '')"""
+
+
+def _split_tags(tags: str) -> tuple[str, ...]:
+    """Parse a `messages.tags` value."""
+    return tuple(tags.split(TAG_SEP)) if tags else ()
+
+
+@lru_cache(maxsize=None)
+def _iter_messages_sql(
+    tag: bool,
+    start_date: bool,
+    end_date: bool,
+    fts: bool,
+    from_like: bool,
+    subject_like: bool,
+    limit: bool,
+) -> str:
+    """Build the `iter_messages` query for one combination of filters.
+
+    Cached, so each combination is built once and always yields the same
+    SQL text (and so the same prepared statement).
+    """
+    if tag:
+        query = f"""SELECT {MESSAGE_COLS} FROM messages m
+                    JOIN message_tags t ON m.message_id = t.message_id
+                    WHERE t.tag = ?"""
+    else:
+        query = f"SELECT {MESSAGE_COLS} FROM messages m WHERE 1=1"
+    if start_date:
+        query += " AND m.date >= ?"
+    if end_date:
+        query += " AND m.date <= ?"
+    if fts:
+        query += """ AND m.id IN (
+            SELECT rowid FROM messages_fts WHERE messages_fts MATCH ?
+        )"""
+    if from_like:
+        query += " AND m.from_addr LIKE ?"
+    if subject_like:
+        query += " AND m.subject LIKE ?"
+    query += " ORDER BY m.date DESC"
+    if limit:
+        query += " LIMIT ?"
+    return query
+
+
+# Codec for newly stored message bodies (a pyarrow codec name; None stores
+# them uncompressed). The codec is recorded per row, so changing this only
+# affects new messages.
+RAW_CODEC: str | None = "zstd"
+RAW_COMPRESSION_LEVEL = 3
+
+
+@lru_cache(maxsize=None)
+def _codec(name: str):
+    import pyarrow as pa
+    return pa.Codec(name, compression_level=RAW_COMPRESSION_LEVEL)
+
+
+def _encode_raw(raw: bytes) -> tuple[bytes, str | None, int]:
+    """Compress a message body with `RAW_CODEC`: ``(data, codec, size)``.
+
+    Bodies that don't shrink are stored as-is (codec None).
+    """
+    if RAW_CODEC:
+        data = _codec(RAW_CODEC).compress(raw, asbytes=True)
+        if len(data) < len(raw):
+            return data, RAW_CODEC, len(raw)
+    return raw, None, len(raw)
+
+
+def _decode_raw(data: bytes, codec: str | None, size: int | None) -> bytes:
+    """Inverse of `_encode_raw`."""
+    if codec is None:
+        return data
+    return _codec(codec).decompress(data, decompressed_size=size, asbytes=True)
+
+
 class MessageStorage(BaseStorage):
-    """SQLite storage for email messages."""
+    """SQLite storage for email messages.
+
+    Headers live in `messages`; raw RFC822 bytes live in `message_bodies`
+    (same row ID), so iterating messages doesn't drag every body through
+    Python. Bodies are compressed with `RAW_CODEC`.
+    """
+
+    # Hot statements, kept as constants so every call hits the connection's
+    # statement cache (which is keyed on the SQL text)
+    _HAS_MESSAGE = "SELECT 1 FROM messages WHERE message_id = ?"
+    _IS_PUSHED = """SELECT 1 FROM push_state
+                    WHERE message_id = ? AND dest_type = ? AND dest_user = ? AND dest_folder = ?"""
+    _TAGS_SELECT = "SELECT tag FROM message_tags WHERE message_id = ? ORDER BY tag"
+    # Statements shared by the single-row and batched variants
+    _MESSAGE_INSERT = """INSERT INTO messages
+                         (message_id, date, from_addr, to_addr, cc_addr, subject, source_folder, source_uid)
+                         VALUES (?, ?, ?, ?, ?, ?, ?, ?)"""
+    _MESSAGE_INSERT_OR_IGNORE = _MESSAGE_INSERT.replace("INSERT", "INSERT OR IGNORE", 1)
+    _MESSAGE_INSERT_RETURNING = f"{_MESSAGE_INSERT} RETURNING id"
+    _TAG_INSERT = "INSERT OR IGNORE INTO message_tags (message_id, tag) VALUES (?, ?)"
+    _PUSH_INSERT = """INSERT INTO push_state (message_id, dest_type, dest_user, dest_folder)
+                      VALUES (?, ?, ?, ?)
+                      ON CONFLICT DO NOTHING"""
+    _SYNC_STATE_UPSERT = """INSERT INTO sync_state (source_type, source_user, folder, uidvalidity, last_uid, last_sync)
+                            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                            ON CONFLICT(source_type, source_user, folder) DO UPDATE SET
+                                uidvalidity = excluded.uidvalidity,
+                                last_uid = excluded.last_uid,
+                                last_sync = excluded.last_sync"""
+
+    def __init__(self, path: str | Path, readers: int | None = None):
+        super().__init__(path, readers)
+        # Message-IDs (and push destinations) known to be stored. Only hits
+        # are remembered: rows are never deleted, so they can't go stale,
+        # while a miss may be filled in by another process.
+        self._known_mids: OrderedDict[str, None] = OrderedDict()
+        self._known_pushes: OrderedDict[tuple[str, str, str, str], None] = OrderedDict()
+
+    def _rolled_back(self) -> None:
+        # Hits recorded for writes that were just undone
+        self._known_mids.clear()
+        self._known_pushes.clear()
 
     def _create_schema(self) -> None:
+        had_fts = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'messages_fts'"
+        ).fetchone()
         self.conn.executescript("""
+            -- Replaced by messages_fts (which also indexes subject)
+            DROP TRIGGER IF EXISTS messages_addr_ai;
+            DROP TRIGGER IF EXISTS messages_addr_ad;
+            DROP TRIGGER IF EXISTS messages_addr_au;
+            DROP TABLE IF EXISTS messages_addr_fts;
+
             CREATE TABLE IF NOT EXISTS messages (
                 id INTEGER PRIMARY KEY,
                 message_id TEXT UNIQUE NOT NULL,
-                date TEXT,
+                date INTEGER,  -- Unix epoch seconds
                 from_addr TEXT,
                 to_addr TEXT,
                 cc_addr TEXT,
                 subject TEXT,
-                raw BLOB NOT NULL,
                 source_folder TEXT,
                 source_uid TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                tags TEXT NOT NULL DEFAULT ''  -- copy of message_tags (sorted, TAG_SEP-joined)
+            );
+
+            CREATE TABLE IF NOT EXISTS message_bodies (
+                id INTEGER PRIMARY KEY,  -- messages.id
+                raw BLOB NOT NULL,
+                codec TEXT,  -- compression codec of `raw` (NULL: uncompressed)
+                size INTEGER  -- uncompressed size
             );
 
             CREATE INDEX IF NOT EXISTS idx_messages_date ON messages(date);
             CREATE INDEX IF NOT EXISTS idx_messages_from ON messages(from_addr);
             CREATE INDEX IF NOT EXISTS idx_messages_source ON messages(source_folder, source_uid);
 
+            -- Address/subject search (external content: indexes messages, stores nothing itself)
+            CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+                from_addr,
+                to_addr,
+                cc_addr,
+                subject,
+                content='messages',
+                content_rowid='id'
+            );
+
+            CREATE TRIGGER IF NOT EXISTS messages_fts_ai AFTER INSERT ON messages BEGIN
+                INSERT INTO messages_fts(rowid, from_addr, to_addr, cc_addr, subject)
+                VALUES (new.id, new.from_addr, new.to_addr, new.cc_addr, new.subject);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS messages_fts_ad AFTER DELETE ON messages BEGIN
+                INSERT INTO messages_fts(messages_fts, rowid, from_addr, to_addr, cc_addr, subject)
+                VALUES ('delete', old.id, old.from_addr, old.to_addr, old.cc_addr, old.subject);
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS messages_fts_au
+            AFTER UPDATE OF from_addr, to_addr, cc_addr, subject ON messages BEGIN
+                INSERT INTO messages_fts(messages_fts, rowid, from_addr, to_addr, cc_addr, subject)
+                VALUES ('delete', old.id, old.from_addr, old.to_addr, old.cc_addr, old.subject);
+                INSERT INTO messages_fts(rowid, from_addr, to_addr, cc_addr, subject)
+                VALUES (new.id, new.from_addr, new.to_addr, new.cc_addr, new.subject);
+            END;
+
             CREATE TABLE IF NOT EXISTS message_tags (
                 message_id TEXT NOT NULL,
                 tag TEXT NOT NULL,
@@ -245,6 +603,21 @@ class MessageStorage(BaseStorage):
 
             CREATE INDEX IF NOT EXISTS idx_tags_tag ON message_tags(tag);
 
+            -- Keep messages.tags in sync with message_tags
+            CREATE TRIGGER IF NOT EXISTS message_tags_ai AFTER INSERT ON message_tags BEGIN
+                UPDATE messages SET tags = %(new)s WHERE message_id = new.message_id;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS message_tags_ad AFTER DELETE ON message_tags BEGIN
+                UPDATE messages SET tags = %(old)s WHERE message_id = old.message_id;
+            END;
+
+            -- Tags added before their message was stored
+            CREATE TRIGGER IF NOT EXISTS messages_tags_ai AFTER INSERT ON messages
+            WHEN EXISTS (SELECT 1 FROM message_tags WHERE message_id = new.message_id) BEGIN
+                UPDATE messages SET tags = %(new)s WHERE id = new.id;
+            END;
+
             CREATE TABLE IF NOT EXISTS sync_state (
                 id INTEGER PRIMARY KEY,
                 source_type TEXT NOT NULL,
@@ -263,20 +636,94 @@ class MessageStorage(BaseStorage):
                 dest_user TEXT NOT NULL,
                 dest_folder TEXT NOT NULL,
                 pushed_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                -- Also serves as the covering index for iter_unpushed's per-message probe
                 UNIQUE(message_id, dest_type, dest_user, dest_folder)
             );
 
             CREATE INDEX IF NOT EXISTS idx_push_state_dest ON push_state(dest_type, dest_user, dest_folder);
-        """)
+        """ % {
+            "new": _TAGS_CONCAT.format(mid="new.message_id"),
+            "old": _TAGS_CONCAT.format(mid="old.message_id"),
+        })
+        self._add_body_codec()
+        self._split_bodies()
+        self._migrate_date_epoch()
+        self._denormalize_tags()
+        if not had_fts:
+            # Index messages stored before the FTS table existed
+            self.conn.execute("INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')")
         self.conn.commit()
 
+    def _add_body_codec(self) -> None:
+        """Add `message_bodies.codec`/`size` (existing rows stay uncompressed)."""
+        cols = [row["name"] for row in self.conn.execute("PRAGMA table_info(message_bodies)")]
+        if "codec" in cols:
+            return
+        self._begin()
+        self.conn.execute("ALTER TABLE message_bodies ADD COLUMN codec TEXT")
+        self.conn.execute("ALTER TABLE message_bodies ADD COLUMN size INTEGER")
+
+    def _split_bodies(self) -> None:
+        """Migrate databases that still store `raw` inline in `messages`."""
+        cols = [row["name"] for row in self.conn.execute("PRAGMA table_info(messages)")]
+        if "raw" not in cols:
+            return
+        self._begin()
+        self.conn.execute(
+            "INSERT OR IGNORE INTO message_bodies (id, raw) SELECT id, raw FROM messages"
+        )
+        self.conn.execute("ALTER TABLE messages DROP COLUMN raw")
+
+    def _denormalize_tags(self) -> None:
+        """Add `messages.tags`, filled in from `message_tags`."""
+        cols = [row["name"] for row in self.conn.execute("PRAGMA table_info(messages)")]
+        if "tags" in cols:
+            return
+        self._begin()
+        self.conn.execute("ALTER TABLE messages ADD COLUMN tags TEXT NOT NULL DEFAULT ''")
+        self.conn.execute(
+            f"UPDATE messages SET tags = {_TAGS_CONCAT.format(mid='messages.message_id')}"
+            " WHERE message_id IN (SELECT message_id FROM message_tags)"
+        )
+
+    def _migrate_date_epoch(self) -> None:
+        """Convert `messages.date` from ISO text to INTEGER epoch seconds.
+
+        Swaps in a new column rather than updating in place (TEXT affinity
+        would store the integers as text). Naive ISO values are local time,
+        as with `datetime.timestamp()`.
+        """
+        cols = {row["name"]: row["type"] for row in self.conn.execute("PRAGMA table_info(messages)")}
+        if cols.get("date") != "TEXT":
+            return
+        self._begin()
+        for sql in (
+            "ALTER TABLE messages ADD COLUMN date_epoch INTEGER",
+            "UPDATE messages SET date_epoch = CAST(strftime('%s', date, 'utc') AS INTEGER)",
+            "DROP INDEX IF EXISTS idx_messages_date",
+            "ALTER TABLE messages DROP COLUMN date",
+            "ALTER TABLE messages RENAME COLUMN date_epoch TO date",
+            "CREATE INDEX idx_messages_date ON messages(date)",
+        ):
+            self.conn.execute(sql)
+
     def has_message(self, message_id: str) -> bool:
         """Check if a message exists by Message-ID."""
+        if message_id in self._known_mids:
+            self._known_mids.move_to_end(message_id)
+            return True
+        if self.conn.execute(self._HAS_MESSAGE, (message_id,)).fetchone() is None:
+            return False
+        _remember(self._known_mids, message_id)
+        return True
+
+    def existing_message_ids(self, message_ids: Iterable[str]) -> set[str]:
+        """Return the subset of `message_ids` already in storage."""
         cur = self.conn.execute(
-            "SELECT 1 FROM messages WHERE message_id = ?",
-            (message_id,)
+            f"SELECT message_id FROM messages WHERE message_id {IN_JSON_ARRAY}",
+            (json_array(set(message_ids)),)
         )
-        return cur.fetchone() is not None
+        return {row[0] for row in cur}
 
     def add_message(
         self,
@@ -290,32 +737,68 @@ class MessageStorage(BaseStorage):
         source_folder: str | None = None,
         source_uid: str | None = None,
         tags: list[str] | None = None,
+        commit: bool = True,
     ) -> int:
-        """Add a message to storage. Returns row ID."""
-        date_str = date.isoformat() if date else None
-        cur = self.conn.execute(
-            """INSERT INTO messages
-               (message_id, date, from_addr, to_addr, cc_addr, subject, raw, source_folder, source_uid)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (message_id, date_str, from_addr, to_addr, cc_addr, subject, raw, source_folder, source_uid)
+        """Add a message to storage. Returns row ID.
+
+        Pass ``commit=False`` to defer the commit (e.g. when adding many
+        messages in a loop), then call ``commit()`` once per batch.
+        """
+        [row_id] = self.conn.execute(
+            self._MESSAGE_INSERT_RETURNING,
+            (message_id, _epoch(date), from_addr, to_addr, cc_addr, subject, source_folder, source_uid)
+        ).fetchone()
+        self.conn.execute(
+            "INSERT INTO message_bodies (id, raw, codec, size) VALUES (?, ?, ?, ?)",
+            (row_id, *_encode_raw(raw))
         )
-        row_id = cur.lastrowid
         if tags:
-            for tag in tags:
-                self.conn.execute(
-                    "INSERT OR IGNORE INTO message_tags (message_id, tag) VALUES (?, ?)",
-                    (message_id, tag)
-                )
-        self.conn.commit()
+            self.conn.executemany(self._TAG_INSERT, [(message_id, tag) for tag in tags])
+        if commit:
+            self._commit()
+        _remember(self._known_mids, message_id)
         return row_id
 
+    def add_messages(self, rows: Iterable[tuple]) -> None:
+        """Add many messages in a single transaction.
+
+        Each row is ``(message_id, date, from_addr, to_addr, cc_addr, subject,
+        raw, source_folder, source_uid, tags)``, with ``date`` a datetime or
+        None and ``tags`` a list of tags (or None). Messages whose Message-ID
+        is already stored are skipped.
+        """
+        rows = list(rows)
+        self._begin()
+        self.conn.executemany(
+            self._MESSAGE_INSERT_OR_IGNORE,
+            [
+                (mid, _epoch(date), frm, to, cc, subj, folder, uid)
+                for mid, date, frm, to, cc, subj, _, folder, uid, _ in rows
+            ]
+        )
+        self.conn.executemany(
+            """INSERT OR IGNORE INTO message_bodies (id, raw, codec, size)
+               VALUES ((SELECT id FROM messages WHERE message_id = ?), ?, ?, ?)""",
+            [(row[0], *_encode_raw(row[6])) for row in rows]
+        )
+        self.conn.executemany(
+            self._TAG_INSERT,
+            [(row[0], tag) for row in rows for tag in row[9] or ()]
+        )
+        # Refresh planner statistics if the batch changed them substantially
+        self._commit(optimize=True)
+        for row in rows:
+            _remember(self._known_mids, row[0])
+
     def add_tag(self, message_id: str, tag: str) -> None:
         """Add a tag to a message."""
-        self.conn.execute(
-            "INSERT OR IGNORE INTO message_tags (message_id, tag) VALUES (?, ?)",
-            (message_id, tag)
-        )
-        self.conn.commit()
+        self.conn.execute(self._TAG_INSERT, (message_id, tag))
+        self._commit()
+
+    def add_tags(self, message_id: str, tags: Iterable[str]) -> None:
+        """Add several tags to a message (already-present tags are ignored)."""
+        self.conn.executemany(self._TAG_INSERT, [(message_id, tag) for tag in tags])
+        self._commit()
 
     def remove_tag(self, message_id: str, tag: str) -> None:
         """Remove a tag from a message."""
@@ -323,33 +806,68 @@ class MessageStorage(BaseStorage):
             "DELETE FROM message_tags WHERE message_id = ? AND tag = ?",
             (message_id, tag)
         )
-        self.conn.commit()
+        self._commit()
 
-    def get_tags(self, message_id: str) -> list[str]:
+    def get_tags(self, message_id: str) -> tuple[str, ...]:
         """Get tags for a message."""
-        cur = self.conn.execute(
-            "SELECT tag FROM message_tags WHERE message_id = ? ORDER BY tag",
-            (message_id,)
-        )
-        return [row["tag"] for row in cur]
+        with self._checkout_reader() as conn:
+            cur = conn.execute(self._TAGS_SELECT, (message_id,))
+            return tuple(row["tag"] for row in cur)
 
     def list_tags(self) -> list[tuple[str, int]]:
         """List all tags with counts."""
-        cur = self.conn.execute(
-            "SELECT tag, COUNT(*) as count FROM message_tags GROUP BY tag ORDER BY tag"
-        )
-        return [(row["tag"], row["count"]) for row in cur]
+        with self._checkout_reader() as conn:
+            cur = conn.execute(
+                "SELECT tag, COUNT(*) as count FROM message_tags GROUP BY tag ORDER BY tag"
+            )
+            return [(row["tag"], row["count"]) for row in cur]
 
     def get_message(self, message_id: str) -> StoredMessage | None:
-        """Get a message by Message-ID."""
+        """Get a message (including its raw bytes) by Message-ID."""
+        with self._checkout_reader() as conn:
+            row = conn.execute(
+                f"""SELECT {MESSAGE_COLS}, b.raw, b.codec, b.size FROM messages m
+                    JOIN message_bodies b ON b.id = m.id
+                    WHERE m.message_id = ?""",
+                (message_id,)
+            ).fetchone()
+        if not row:
+            return None
+        return self._row_to_message(row, raw=_decode_raw(row["raw"], row["codec"], row["size"]))
+
+    def get_raw(self, row_id: int) -> bytes:
+        """Get a message's raw RFC822 bytes by row ID."""
         cur = self.conn.execute(
-            "SELECT * FROM messages WHERE message_id = ?",
-            (message_id,)
+            "SELECT raw, codec, size FROM message_bodies WHERE id = ?", (row_id,)
         )
         row = cur.fetchone()
         if not row:
-            return None
-        return self._row_to_message(row)
+            raise KeyError(f"No message body with id {row_id}")
+        return _decode_raw(*row)
+
+    def open_raw(self, row_id: int) -> sqlite3.Blob | io.BytesIO:
+        """Open a message's raw bytes for reading.
+
+        Uncompressed bodies are streamed incrementally from a Blob;
+        compressed ones are decompressed into memory. Either way the result
+        supports `read()` and `seek()`, and should be closed (or used as a
+        context manager) when done.
+        """
+        codec = self.conn.execute(
+            "SELECT codec FROM message_bodies WHERE id = ?", (row_id,)
+        ).fetchone()
+        if codec is not None and codec[0] is not None:
+            return io.BytesIO(self.get_raw(row_id))
+        return self.conn.blobopen("message_bodies", "raw", row_id, readonly=True)
+
+    def raw_size(self, row_id: int) -> int:
+        """Size of a message's raw bytes, without reading them."""
+        row = self.conn.execute(
+            "SELECT COALESCE(size, length(raw)) FROM message_bodies WHERE id = ?", (row_id,)
+        ).fetchone()
+        if not row:
+            raise KeyError(f"No message body with id {row_id}")
+        return row[0]
 
     def iter_messages(
         self,
@@ -357,50 +875,56 @@ class MessageStorage(BaseStorage):
         start_date: datetime | None = None,
         end_date: datetime | None = None,
         from_addr: str | None = None,
+        subject: str | None = None,
         limit: int | None = None,
     ) -> Iterator[StoredMessage]:
-        """Iterate over messages with optional filters."""
-        if tag:
-            query = """SELECT m.* FROM messages m
-                       JOIN message_tags t ON m.message_id = t.message_id
-                       WHERE t.tag = ?"""
-            params: list = [tag]
-        else:
-            query = "SELECT * FROM messages WHERE 1=1"
-            params = []
+        """Iterate over messages with optional filters (without raw bytes).
 
+        `from_addr` and `subject` match as phrase prefixes via the FTS index
+        ("example.com" finds tokens example, com*), falling back to a
+        substring scan for text without word characters (e.g. "@").
+        """
+        params: list = [tag] if tag else []
         if start_date:
-            query += " AND date >= ?"
-            params.append(start_date.isoformat())
+            params.append(_epoch(start_date))
         if end_date:
-            query += " AND date <= ?"
-            params.append(end_date.isoformat())
-        if from_addr:
-            query += " AND from_addr LIKE ?"
-            params.append(f"%{from_addr}%")
-
-        query += " ORDER BY date DESC"
-
+            params.append(_epoch(end_date))
+        matches = []
+        likes = {}
+        for column, text in (("from_addr", from_addr), ("subject", subject)):
+            if not text:
+                continue
+            if re.search(r"\w", text):
+                matches.append(_fts_phrase(column, text))
+            else:
+                likes[column] = f"%{text}%"
+        if matches:
+            params.append(" AND ".join(matches))
+        params.extend(likes.values())
         if limit:
-            query += " LIMIT ?"
             params.append(limit)
-
-        cur = self.conn.execute(query, params)
-        for row in cur:
-            yield self._row_to_message(row)
+        query = _iter_messages_sql(
+            bool(tag), bool(start_date), bool(end_date),
+            bool(matches), "from_addr" in likes, "subject" in likes, bool(limit),
+        )
+        yield from self._iter_query(query, params)
 
     def count(self, tag: str | None = None) -> int:
         """Count total messages, optionally filtered by tag."""
-        if tag:
-            cur = self.conn.execute(
-                """SELECT COUNT(*) FROM messages m
-                   JOIN message_tags t ON m.message_id = t.message_id
-                   WHERE t.tag = ?""",
-                (tag,)
-            )
-        else:
-            cur = self.conn.execute("SELECT COUNT(*) FROM messages")
-        return cur.fetchone()[0]
+        with self._checkout_reader() as conn:
+            if tag:
+                # Tags may precede their message (see messages_tags_ai), so
+                # join to count stored messages only (an index-only probe of
+                # messages' message_id unique index per tag row)
+                cur = conn.execute(
+                    """SELECT COUNT(*) FROM message_tags t
+                       JOIN messages m ON m.message_id = t.message_id
+                       WHERE t.tag = ?""",
+                    (tag,)
+                )
+            else:
+                cur = conn.execute("SELECT COUNT(*) FROM messages")
+            return cur.fetchone()[0]
 
     def get_sync_state(
         self,
@@ -429,13 +953,19 @@ class MessageStorage(BaseStorage):
     ) -> None:
         """Update sync state for a source folder."""
         self.conn.execute(
-            """INSERT INTO sync_state (source_type, source_user, folder, uidvalidity, last_uid, last_sync)
-               VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-               ON CONFLICT(source_type, source_user, folder)
-               DO UPDATE SET uidvalidity = ?, last_uid = ?, last_sync = CURRENT_TIMESTAMP""",
-            (source_type, source_user, folder, uidvalidity, last_uid, uidvalidity, last_uid)
+            self._SYNC_STATE_UPSERT,
+            (source_type, source_user, folder, uidvalidity, last_uid)
         )
-        self.conn.commit()
+        self._commit()
+
+    def set_sync_states(self, states: Iterable[tuple[str, str, str, int, int]]) -> None:
+        """Update sync state for many folders in a single transaction.
+
+        Each state is ``(source_type, source_user, folder, uidvalidity, last_uid)``.
+        """
+        self._begin()
+        self.conn.executemany(self._SYNC_STATE_UPSERT, states)
+        self._commit()
 
     def clear_sync_state(
         self,
@@ -449,7 +979,7 @@ class MessageStorage(BaseStorage):
                WHERE source_type = ? AND source_user = ? AND folder = ?""",
             (source_type, source_user, folder)
         )
-        self.conn.commit()
+        self._commit()
 
     def is_pushed(
         self,
@@ -459,12 +989,14 @@ class MessageStorage(BaseStorage):
         dest_folder: str,
     ) -> bool:
         """Check if a message has been pushed to a destination."""
-        cur = self.conn.execute(
-            """SELECT 1 FROM push_state
-               WHERE message_id = ? AND dest_type = ? AND dest_user = ? AND dest_folder = ?""",
-            (message_id, dest_type, dest_user, dest_folder)
-        )
-        return cur.fetchone() is not None
+        key = (message_id, dest_type, dest_user, dest_folder)
+        if key in self._known_pushes:
+            self._known_pushes.move_to_end(key)
+            return True
+        if self.conn.execute(self._IS_PUSHED, key).fetchone() is None:
+            return False
+        _remember(self._known_pushes, key)
+        return True
 
     def mark_pushed(
         self,
@@ -472,14 +1004,26 @@ class MessageStorage(BaseStorage):
         dest_type: str,
         dest_user: str,
         dest_folder: str,
+        commit: bool = True,
     ) -> None:
         """Mark a message as pushed to a destination."""
-        self.conn.execute(
-            """INSERT OR IGNORE INTO push_state (message_id, dest_type, dest_user, dest_folder)
-               VALUES (?, ?, ?, ?)""",
-            (message_id, dest_type, dest_user, dest_folder)
-        )
-        self.conn.commit()
+        key = (message_id, dest_type, dest_user, dest_folder)
+        self.conn.execute(self._PUSH_INSERT, key)
+        if commit:
+            self._commit()
+        _remember(self._known_pushes, key)
+
+    def mark_pushed_bulk(self, entries: Iterable[tuple[str, str, str, str]]) -> None:
+        """Mark many messages as pushed in a single transaction.
+
+        Each entry is ``(message_id, dest_type, dest_user, dest_folder)``.
+        """
+        entries = [tuple(entry) for entry in entries]
+        self._begin()
+        self.conn.executemany(self._PUSH_INSERT, entries)
+        self._commit(optimize=True)
+        for entry in entries:
+            _remember(self._known_pushes, entry)
 
     def count_pushed(
         self,
@@ -495,6 +1039,22 @@ class MessageStorage(BaseStorage):
         )
         return cur.fetchone()[0]
 
+    def pushed_message_ids(
+        self,
+        message_ids: Iterable[str],
+        dest_type: str,
+        dest_user: str,
+        dest_folder: str,
+    ) -> set[str]:
+        """Return the subset of `message_ids` already pushed to a destination."""
+        cur = self.conn.execute(
+            f"""SELECT message_id FROM push_state
+                WHERE dest_type = ? AND dest_user = ? AND dest_folder = ?
+                AND message_id {IN_JSON_ARRAY}""",
+            (dest_type, dest_user, dest_folder, json_array(set(message_ids)))
+        )
+        return {row[0] for row in cur}
+
     def iter_unpushed(
         self,
         dest_type: str,
@@ -502,50 +1062,31 @@ class MessageStorage(BaseStorage):
         dest_folder: str,
         tag: str | None = None,
     ) -> Iterator[StoredMessage]:
-        """Iterate over messages not yet pushed to a destination."""
-        if tag:
-            query = """SELECT m.* FROM messages m
-                       JOIN message_tags t ON m.message_id = t.message_id
-                       WHERE t.tag = ?
-                       AND NOT EXISTS (
-                           SELECT 1 FROM push_state p
-                           WHERE p.message_id = m.message_id
-                           AND p.dest_type = ? AND p.dest_user = ? AND p.dest_folder = ?
-                       )
-                       ORDER BY m.date"""
-            params = (tag, dest_type, dest_user, dest_folder)
-        else:
-            query = """SELECT m.* FROM messages m
-                       WHERE NOT EXISTS (
-                           SELECT 1 FROM push_state p
-                           WHERE p.message_id = m.message_id
-                           AND p.dest_type = ? AND p.dest_user = ? AND p.dest_folder = ?
-                       )
-                       ORDER BY m.date"""
-            params = (dest_type, dest_user, dest_folder)
-        cur = self.conn.execute(query, params)
-        for row in cur:
-            yield self._row_to_message(row)
-
-    def _row_to_message(self, row: sqlite3.Row) -> StoredMessage:
-        """Convert a database row to StoredMessage."""
-        date = None
-        if row["date"]:
-            try:
-                date = datetime.fromisoformat(row["date"])
-            except ValueError:
-                pass
-        tags = self.get_tags(row["message_id"])
+        """Iterate over messages not yet pushed to a destination (without raw bytes)."""
+        # Anti-join as LEFT JOIN ... IS NULL: one covering-index probe per
+        # message, with no correlated subquery to re-enter
+        tag_join = "JOIN message_tags t ON m.message_id = t.message_id AND t.tag = ?" if tag else ""
+        query = f"""SELECT {MESSAGE_COLS} FROM messages m
+                   {tag_join}
+                   LEFT JOIN push_state p ON p.message_id = m.message_id
+                       AND p.dest_type = ? AND p.dest_user = ? AND p.dest_folder = ?
+                   WHERE p.message_id IS NULL
+                   ORDER BY m.date"""
+        params = ((tag,) if tag else ()) + (dest_type, dest_user, dest_folder)
+        yield from self._iter_query(query, params)
+
+    def _iter_query(self, query: str, params: Iterable) -> Iterator[StoredMessage]:
+        """Stream `MESSAGE_COLS` rows as StoredMessages."""
+        with self._checkout_reader() as conn:
+            cur = conn.cursor()
+            cur.row_factory = namedtuple_row
+            cur.execute(query, params)
+            while rows := cur.fetchmany(FETCH_SIZE):
+                for row in rows:
+                    yield self._row_to_message(row)
+
+    def _row_to_message(self, row: tuple, raw: bytes | None = None) -> StoredMessage:
+        """Convert a `MESSAGE_COLS` row (Row or namedtuple) to StoredMessage."""
         return StoredMessage(
-            id=row["id"],
-            message_id=row["message_id"],
-            date=date,
-            from_addr=row["from_addr"] or "",
-            to_addr=row["to_addr"] or "",
-            cc_addr=row["cc_addr"] or "",
-            subject=row["subject"] or "",
-            raw=row["raw"],
-            source_folder=row["source_folder"],
-            source_uid=row["source_uid"],
-            tags=tags,
+            *row[:7], raw, *row[7:9], tags=_split_tags(row[9]), _storage=self,
         )
@@ -12,15 +12,158 @@ The actual email metadata (subject, from, to, threading, FTS) is stored
 separately in index.db (regenerable from .eml files).
 """
 
+import hashlib
+import math
+import re
 import sqlite3
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator
 
+from .db import EPOCH, READER_PRAGMAS, ReaderPool, apply_pragmas, json_array
+
+if TYPE_CHECKING:
+    import pyarrow as pa
 
 UIDS_DB = "uids.db"
 
+# `record_pull` commits once per this many rows (a crash loses at most this
+# many records, whose messages are then re-pulled and deduped by content hash)
+PULL_COMMIT_INTERVAL = 100
+
+# Tables holding the pulled UIDs (shared with `import_uids_from_parquet`).
+# Rows are keyed by a small integer folder ID, not repeated account/folder
+# names, which keeps pulled_uids' primary-key index compact.
+PULLED_UIDS_SCHEMA = """
+    -- (account, folder) names, referenced by ID from pulled_uids
+    CREATE TABLE IF NOT EXISTS folders (
+        id INTEGER PRIMARY KEY,
+        account TEXT NOT NULL,
+        name TEXT NOT NULL,
+        UNIQUE (account, name)
+    );
+
+    -- Core UID tracking: which messages we've pulled
+    CREATE TABLE IF NOT EXISTS pulled_uids (
+        folder_id INTEGER NOT NULL REFERENCES folders (id),
+        uidvalidity INTEGER NOT NULL,
+        uid INTEGER NOT NULL,
+        content_hash BLOB NOT NULL,  -- see hash_key
+        message_id TEXT,
+        local_path TEXT,
+        pulled_at INTEGER NOT NULL,  -- Unix epoch seconds
+        PRIMARY KEY (folder_id, uidvalidity, uid)
+    );
+
+    -- Index by content_hash for dedup queries
+    CREATE INDEX IF NOT EXISTS idx_pulled_uids_hash
+        ON pulled_uids(content_hash);
+"""
+
+# ID of the folder named by two (account, folder) parameters, for queries
+# on pulled_uids (NULL, so matching nothing, for unknown folders)
+FOLDER_ID = "(SELECT id FROM folders WHERE account = ? AND name = ?)"
+
+
+def hash_key(content_hash: str) -> bytes | str:
+    """Stored form of a content hash: the raw digest of a hex SHA-256.
+
+    Halves the size of `pulled_uids.content_hash` and its index. Anything
+    else (e.g. a hash from some other tool) is stored as-is.
+    """
+    if len(content_hash) == 64:
+        try:
+            return bytes.fromhex(content_hash)
+        except ValueError:
+            pass
+    return content_hash
+
+
+def hash_str(value: bytes | str) -> str:
+    """Inverse of `hash_key`."""
+    return value.hex() if isinstance(value, bytes) else value
+
+
+# Resolved uids.db path -> identity (see `_sync_identity`) of the database
+# and uids.parquet last found in sync, so reconnecting in the same process
+# skips `_parquet_changed` until either file is replaced or rewritten
+_parquet_checked: dict[Path, tuple[int, int, int, int]] = {}
+
+
+def _file_sha256(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def mark_parquet_synced(conn: sqlite3.Connection, parquet_path: Path) -> None:
+    """Record that `parquet_path` holds exactly the rows of `pulled_uids`.
+
+    Stores the file's identity in `meta` (so `connect` can tell whether a
+    later uids.parquet is different), and its mtime in `parquet_sync` (which
+    any later change to `pulled_uids` clears, see its triggers). Not
+    committed here.
+    """
+    has_meta = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'meta'"
+    ).fetchone()
+    if not has_meta:
+        return
+    stat = Path(parquet_path).stat()
+    conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+        ("parquet_sha256", _file_sha256(parquet_path)),
+        ("parquet_size", str(stat.st_size)),
+        ("parquet_mtime_ns", str(stat.st_mtime_ns)),
+    ])
+    conn.execute("DELETE FROM parquet_sync")
+    conn.execute("INSERT INTO parquet_sync (mtime_ns) VALUES (?)", (stat.st_mtime_ns,))
+
+
+class ContentHashFilter:
+    """Bloom filter over content hashes, for cheap "definitely new" checks.
+
+    A few bits per hash instead of a set of 64-char strings. Membership is
+    probabilistic: `in` is never wrong for absent hashes, but may report
+    absent ones as present at about `fp_rate`, so confirm hits with
+    `UidsDB.has_content_hash`. SHA-256 hex digests are already uniformly
+    distributed, so bit positions are sliced from the digest itself rather
+    than rehashed.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float = 0.001):
+        """Initialize ContentHashFilter.
+
+        Args:
+            capacity: Expected number of hashes
+            fp_rate: Target false-positive rate at `capacity`
+        """
+        n = max(capacity, 1)
+        self.num_bits = max(64, math.ceil(-n * math.log(fp_rate) / math.log(2) ** 2))
+        # One 32-bit slice of the digest per probe (8 in a SHA-256)
+        self.num_probes = min(8, max(1, round(self.num_bits / n * math.log(2))))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, content_hash: str) -> list[int]:
+        digest = hash_key(content_hash)
+        if not isinstance(digest, bytes):
+            digest = hashlib.sha256(content_hash.encode()).digest()
+        return [
+            int.from_bytes(digest[i:i + 4], "little") % self.num_bits
+            for i in range(0, 4 * self.num_probes, 4)
+        ]
+
+    def add(self, content_hash: str) -> None:
+        """Add a content hash to the filter."""
+        for pos in self._positions(content_hash):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, content_hash: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(content_hash))
+
 
 @dataclass
 class PulledUID:
@@ -42,20 +185,58 @@ class UidsDB:
     fetched from each server. Git-tracked for durability.
 
     Tables:
-    - pulled_uids: (account, folder, uidvalidity, uid) -> content_hash, message_id, local_path
+    - folders: (account, folder) names -> folder_id
+    - pulled_uids: (folder_id, uidvalidity, uid) -> content_hash, message_id, local_path
     - server_uids: Snapshot of UIDs seen on server
     - server_folders: Folder metadata (uidvalidity, message_count)
     """
 
-    def __init__(self, eml_dir: Path):
+    # SQL for the per-message calls made during a pull. Kept as constants so
+    # each call hits the connection's statement cache (keyed on the SQL
+    # text; its default 128 entries hold every statement this class runs)
+    # instead of re-preparing.
+    _HAS_HASH = "SELECT 1 FROM pulled_uids WHERE content_hash = ? LIMIT 1"
+    _PATH_BY_HASH = """
+        SELECT local_path FROM pulled_uids
+        WHERE content_hash = ? AND local_path IS NOT NULL LIMIT 1
+    """
+    _PULLED_UIDS_SELECT = f"""
+        SELECT uid FROM pulled_uids
+        WHERE folder_id = {FOLDER_ID} AND uidvalidity = ?
+    """
+    _SERVER_UIDVALIDITY = "SELECT uidvalidity FROM server_folders WHERE account = ? AND folder = ?"
+    # Upserts update conflicting rows in place (INSERT OR REPLACE would
+    # delete and re-insert them, rewriting every index entry)
+    _PULL_INSERT = """
+        INSERT INTO pulled_uids
+            (folder_id, uidvalidity, uid, content_hash, message_id, local_path, pulled_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (folder_id, uidvalidity, uid) DO UPDATE SET
+            content_hash = excluded.content_hash,
+            message_id = excluded.message_id,
+            local_path = excluded.local_path,
+            pulled_at = excluded.pulled_at
+    """
+
+    def __init__(self, eml_dir: Path, readers: int | None = None):
         """Initialize UidsDB.
 
         Args:
             eml_dir: Path to .eml directory (e.g., /path/to/project/.eml)
+            readers: Max read-only connections (defaults to CPU count)
         """
         self._eml_dir = eml_dir
         self._db_path = eml_dir / UIDS_DB
         self._conn: sqlite3.Connection | None = None
+        self._num_readers = readers
+        self._readers: ReaderPool | None = None
+        self._uncommitted_pulls = 0
+        # (account, folder, uidvalidity) -> pulled UIDs, loaded on first use
+        # and kept up to date by this instance's writes (pulls recorded by
+        # other processes meanwhile aren't seen until reconnecting)
+        self._pulled_cache: dict[tuple[str, str, int], set[int]] = {}
+        # (account, folder) -> folders.id (IDs never change once assigned)
+        self._folder_ids: dict[tuple[str, str], int] = {}
 
     @property
     def db_path(self) -> Path:
@@ -65,34 +246,98 @@ class UidsDB:
         """Open database connection, rebuilding from parquet if needed."""
         self._db_path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Check if we need to rebuild from parquet
-        if self._needs_rebuild_from_parquet():
+        self._pulled_cache.clear()
+        self._folder_ids.clear()
+
+        rebuild = self._parquet_path.exists() and not self._db_path.exists()
+        if rebuild:
+            self._rebuild_from_parquet()
+        self._open()
+        if not rebuild and self._parquet_changed():
+            self._conn.close()
             self._rebuild_from_parquet()
+            self._open()
+            rebuild = True
+        if rebuild:
+            mark_parquet_synced(self._conn, self._parquet_path)
+            self._conn.commit()
+        if self._parquet_path.exists():
+            _parquet_checked[self._db_path.resolve()] = self._sync_identity()
+        self._readers = ReaderPool(
+            self._db_path, size=self._num_readers, row_factory=None,
+            pragmas=READER_PRAGMAS, detect_types=sqlite3.PARSE_COLNAMES,
+        )
 
-        self._conn = sqlite3.connect(self._db_path, timeout=30.0)
-        self._conn.row_factory = sqlite3.Row
-        self._conn.execute("PRAGMA journal_mode=WAL")
+    def _open(self) -> None:
+        # Rows are plain tuples: every query here selects a few columns,
+        # read positionally (cheaper than sqlite3.Row's by-name lookups).
+        # Timestamps are epoch seconds, selected as `[EPOCH]` for datetimes.
+        self._conn = sqlite3.connect(
+            self._db_path, timeout=30.0, detect_types=sqlite3.PARSE_COLNAMES,
+        )
+        # WAL with NORMAL sync, plus cache/mmap tuning (uids.parquet is the
+        # durable copy of this data)
+        apply_pragmas(self._conn)
         self._create_schema()
 
-    def _needs_rebuild_from_parquet(self) -> bool:
-        """Check if uids.db needs to be rebuilt from parquet.
+    @property
+    def _parquet_path(self) -> Path:
+        from .parquet import UIDS_PARQUET
+        return self._eml_dir / UIDS_PARQUET
+
+    def _parquet_is_current(self) -> bool:
+        """Whether uids.parquet holds exactly the rows of `pulled_uids`.
 
-        Rebuild is needed if:
-        1. parquet exists AND
-        2. (db doesn't exist OR parquet is newer than db)
+        If so, whole-table aggregates are read from the parquet file
+        (columnar, with the account filter pushed down) instead of scanning
+        the SQLite table.
         """
-        from .parquet import UIDS_PARQUET
+        row = self.conn.execute("SELECT mtime_ns FROM parquet_sync").fetchone()
+        if not row:
+            return False
+        try:
+            return self._parquet_path.stat().st_mtime_ns == row[0]
+        except FileNotFoundError:
+            return False
 
-        parquet_path = self._eml_dir / UIDS_PARQUET
+    def _parquet_changed(self) -> bool:
+        """Check if uids.parquet differs from the one uids.db last synced with.
 
+        uids.parquet is exported from this database after pulls, so its
+        mtime alone says nothing; instead its SHA-256 is compared to the one
+        recorded at the last import/export (`mark_parquet_synced`). The hash
+        is skipped while the file's size and mtime are unchanged. Databases
+        that predate the record fall back to "parquet is newer than db".
+        """
+        parquet_path = self._parquet_path
         if not parquet_path.exists():
             return False
-
-        if not self._db_path.exists():
+        if _parquet_checked.get(self._db_path.resolve()) == self._sync_identity():
+            return False
+        stat = parquet_path.stat()
+        meta = dict(self.conn.execute("SELECT key, value FROM meta WHERE key LIKE 'parquet_%'"))
+        if "parquet_sha256" not in meta:
+            return stat.st_mtime > self._db_path.stat().st_mtime
+        if (meta["parquet_size"], meta["parquet_mtime_ns"]) == (str(stat.st_size), str(stat.st_mtime_ns)):
+            return False
+        if _file_sha256(parquet_path) != meta["parquet_sha256"]:
             return True
+        # Same content, new mtime (e.g. rewritten by a git checkout)
+        self.conn.executemany("UPDATE meta SET value = ? WHERE key = ?", [
+            (str(stat.st_size), "parquet_size"),
+            (str(stat.st_mtime_ns), "parquet_mtime_ns"),
+        ])
+        self.conn.execute(
+            "UPDATE parquet_sync SET mtime_ns = ? WHERE mtime_ns = ?",
+            (stat.st_mtime_ns, int(meta["parquet_mtime_ns"])),
+        )
+        self.conn.commit()
+        return False
 
-        # Compare mtimes - rebuild if parquet is newer
-        return parquet_path.stat().st_mtime > self._db_path.stat().st_mtime
+    def _sync_identity(self) -> tuple[int, int, int, int]:
+        """(db inode, parquet inode, size, mtime_ns), memoized in `_parquet_checked`."""
+        stat = self._parquet_path.stat()
+        return self._db_path.stat().st_ino, stat.st_ino, stat.st_size, stat.st_mtime_ns
 
     def _rebuild_from_parquet(self) -> None:
         """Rebuild uids.db from parquet file."""
@@ -109,8 +354,14 @@ class UidsDB:
         print(f"Imported {count:,} UIDs from parquet", file=sys.stderr)
 
     def disconnect(self) -> None:
-        """Close database connection."""
+        """Commit pending pull records and close database connection."""
+        if self._readers:
+            self._readers.close()
+            self._readers = None
         if self._conn:
+            self.flush()
+            # Cheap when nothing changed; keeps planner statistics current
+            self._conn.execute("PRAGMA optimize")
             self._conn.close()
             self._conn = None
 
@@ -120,6 +371,21 @@ class UidsDB:
             raise RuntimeError("Not connected")
         return self._conn
 
+    @contextmanager
+    def _checkout_reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection for read-only queries.
+
+        Uses a pooled read-only connection, except while the main connection
+        has uncommitted changes (reads then go through it, so callers see
+        their own writes).
+        """
+        conn = self.conn
+        if conn.in_transaction or not self._readers:
+            yield conn
+            return
+        with self._readers.checkout() as reader:
+            yield reader
+
     def __enter__(self):
         self.connect()
         return self
@@ -129,24 +395,13 @@ class UidsDB:
 
     def _create_schema(self) -> None:
         """Create database schema."""
+        self._migrate_epoch_timestamps()
+        self._migrate_folder_ids()
+        count_tables = {r[0] for r in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('pull_counts', 'server_uid_counts')"
+        )}
+        self.conn.executescript(PULLED_UIDS_SCHEMA)
         self.conn.executescript("""
-            -- Core UID tracking: which messages we've pulled
-            CREATE TABLE IF NOT EXISTS pulled_uids (
-                account TEXT NOT NULL,
-                folder TEXT NOT NULL,
-                uidvalidity INTEGER NOT NULL,
-                uid INTEGER NOT NULL,
-                content_hash TEXT NOT NULL,
-                message_id TEXT,
-                local_path TEXT,
-                pulled_at TEXT NOT NULL,
-                PRIMARY KEY (account, folder, uidvalidity, uid)
-            );
-
-            -- Index by content_hash for dedup queries
-            CREATE INDEX IF NOT EXISTS idx_pulled_uids_hash
-                ON pulled_uids(content_hash);
-
             -- Index by message_id for cross-reference
             CREATE INDEX IF NOT EXISTS idx_pulled_uids_message_id
                 ON pulled_uids(message_id);
@@ -158,12 +413,13 @@ class UidsDB:
                 uidvalidity INTEGER NOT NULL,
                 uid INTEGER NOT NULL,
                 message_id TEXT,
-                last_seen TEXT NOT NULL,
+                last_seen INTEGER NOT NULL,  -- Unix epoch seconds
                 PRIMARY KEY (account, folder, uidvalidity, uid)
             );
 
-            CREATE INDEX IF NOT EXISTS idx_server_uids_folder
-                ON server_uids(account, folder, uidvalidity);
+            -- The primary key's index already serves (account, folder[,
+            -- uidvalidity]) lookups, and covers get_unpulled_uids' join
+            DROP INDEX IF EXISTS idx_server_uids_folder;
 
             CREATE INDEX IF NOT EXISTS idx_server_uids_message_id
                 ON server_uids(message_id);
@@ -174,12 +430,183 @@ class UidsDB:
                 folder TEXT NOT NULL,
                 uidvalidity INTEGER NOT NULL,
                 message_count INTEGER,
-                last_checked TEXT NOT NULL,
+                last_checked INTEGER NOT NULL,  -- Unix epoch seconds
                 PRIMARY KEY (account, folder)
             );
+
+            -- Row counts of pulled_uids per folder/UIDVALIDITY, kept by
+            -- triggers, so stats don't scan pulled_uids
+            CREATE TABLE IF NOT EXISTS pull_counts (
+                folder_id INTEGER NOT NULL,
+                uidvalidity INTEGER NOT NULL,
+                cnt INTEGER NOT NULL,
+                PRIMARY KEY (folder_id, uidvalidity)
+            );
+
+            CREATE TRIGGER IF NOT EXISTS pulled_uids_counts_ai AFTER INSERT ON pulled_uids BEGIN
+                INSERT INTO pull_counts (folder_id, uidvalidity, cnt)
+                VALUES (NEW.folder_id, NEW.uidvalidity, 1)
+                ON CONFLICT (folder_id, uidvalidity) DO UPDATE SET cnt = cnt + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS pulled_uids_counts_ad AFTER DELETE ON pulled_uids BEGIN
+                UPDATE pull_counts SET cnt = cnt - 1
+                WHERE folder_id = OLD.folder_id AND uidvalidity = OLD.uidvalidity;
+                DELETE FROM pull_counts
+                WHERE folder_id = OLD.folder_id AND uidvalidity = OLD.uidvalidity AND cnt <= 0;
+            END;
+            CREATE TRIGGER IF NOT EXISTS pulled_uids_counts_au
+            AFTER UPDATE OF folder_id, uidvalidity ON pulled_uids BEGIN
+                UPDATE pull_counts SET cnt = cnt - 1
+                WHERE folder_id = OLD.folder_id AND uidvalidity = OLD.uidvalidity;
+                DELETE FROM pull_counts
+                WHERE folder_id = OLD.folder_id AND uidvalidity = OLD.uidvalidity AND cnt <= 0;
+                INSERT INTO pull_counts (folder_id, uidvalidity, cnt)
+                VALUES (NEW.folder_id, NEW.uidvalidity, 1)
+                ON CONFLICT (folder_id, uidvalidity) DO UPDATE SET cnt = cnt + 1;
+            END;
+
+            -- Row counts of server_uids per folder, kept by triggers (rows
+            -- are upserted, never re-keyed)
+            CREATE TABLE IF NOT EXISTS server_uid_counts (
+                account TEXT NOT NULL,
+                folder TEXT NOT NULL,
+                cnt INTEGER NOT NULL,
+                PRIMARY KEY (account, folder)
+            );
+
+            CREATE TRIGGER IF NOT EXISTS server_uids_counts_ai AFTER INSERT ON server_uids BEGIN
+                INSERT INTO server_uid_counts (account, folder, cnt)
+                VALUES (NEW.account, NEW.folder, 1)
+                ON CONFLICT (account, folder) DO UPDATE SET cnt = cnt + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS server_uids_counts_ad AFTER DELETE ON server_uids BEGIN
+                UPDATE server_uid_counts SET cnt = cnt - 1
+                WHERE account = OLD.account AND folder = OLD.folder;
+                DELETE FROM server_uid_counts
+                WHERE account = OLD.account AND folder = OLD.folder AND cnt <= 0;
+            END;
+
+            -- Identity (sha256/size/mtime) of the uids.parquet last imported
+            -- or exported (see mark_parquet_synced)
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+
+            -- mtime of the uids.parquet whose rows match pulled_uids exactly
+            -- (see mark_parquet_synced); cleared by any change to pulled_uids
+            CREATE TABLE IF NOT EXISTS parquet_sync (mtime_ns INTEGER NOT NULL);
+
+            CREATE TRIGGER IF NOT EXISTS pulled_uids_parquet_ai AFTER INSERT ON pulled_uids BEGIN
+                DELETE FROM parquet_sync;
+            END;
+            CREATE TRIGGER IF NOT EXISTS pulled_uids_parquet_au AFTER UPDATE ON pulled_uids BEGIN
+                DELETE FROM parquet_sync;
+            END;
+            CREATE TRIGGER IF NOT EXISTS pulled_uids_parquet_ad AFTER DELETE ON pulled_uids BEGIN
+                DELETE FROM parquet_sync;
+            END;
         """)
+        if "pull_counts" not in count_tables:
+            self._backfill_pull_counts()
+        if "server_uid_counts" not in count_tables:
+            self._backfill_server_uid_counts()
+        self._migrate_hash_to_blob()
         self.conn.commit()
 
+    def _backfill_pull_counts(self) -> None:
+        """Populate `pull_counts` from the rows already in `pulled_uids`."""
+        self.conn.execute("""
+            INSERT INTO pull_counts (folder_id, uidvalidity, cnt)
+            SELECT folder_id, uidvalidity, COUNT(*) FROM pulled_uids
+            GROUP BY folder_id, uidvalidity
+        """)
+
+    def _backfill_server_uid_counts(self) -> None:
+        """Populate `server_uid_counts` from the rows already in `server_uids`."""
+        self.conn.execute("""
+            INSERT INTO server_uid_counts (account, folder, cnt)
+            SELECT account, folder, COUNT(*) FROM server_uids
+            GROUP BY account, folder
+        """)
+
+    def _migrate_folder_ids(self) -> None:
+        """Move pulled_uids from account/folder name columns to `folder_id`.
+
+        Rebuilds the table (and drops `pull_counts`, keyed by the old
+        columns); indexes, triggers and counts are recreated by
+        `_create_schema`.
+        """
+        cols = {r[1] for r in self.conn.execute("PRAGMA table_info(pulled_uids)")}
+        if "account" not in cols:
+            return
+        self.conn.executescript(f"""
+            BEGIN;
+            {PULLED_UIDS_SCHEMA.replace("pulled_uids", "pulled_uids_new")}
+            INSERT OR IGNORE INTO folders (account, name)
+            SELECT DISTINCT account, folder FROM pulled_uids;
+            INSERT INTO pulled_uids_new
+            SELECT f.id, p.uidvalidity, p.uid, p.content_hash, p.message_id, p.local_path, p.pulled_at
+            FROM pulled_uids p JOIN folders f ON f.account = p.account AND f.name = p.folder;
+            DROP TABLE pulled_uids;
+            DROP TABLE IF EXISTS pull_counts;
+            ALTER TABLE pulled_uids_new RENAME TO pulled_uids;
+            DROP INDEX idx_pulled_uids_new_hash;
+            COMMIT;
+        """)
+
+    # Timestamp column of each table converted by `_migrate_epoch_timestamps`
+    _EPOCH_COLUMNS = {
+        "pulled_uids": "pulled_at",
+        "server_uids": "last_seen",
+        "server_folders": "last_checked",
+    }
+
+    def _migrate_epoch_timestamps(self) -> None:
+        """Convert local ISO text timestamps to INTEGER epoch seconds.
+
+        Rebuilds each table (a TEXT-affinity column would store integers as
+        text); indexes and triggers are recreated by `_create_schema`.
+        """
+        for table, col in self._EPOCH_COLUMNS.items():
+            info = self.conn.execute(f"PRAGMA table_info({table})").fetchall()
+            if not info or any(r[1] == col and r[2] == "INTEGER" for r in info):
+                continue
+            sql = self.conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            ).fetchone()[0]
+            new_sql = re.sub(
+                rf"\b{col}\s+TEXT\b", f"{col} INTEGER", sql, count=1,
+            ).replace(table, f"{table}_new", 1)
+            cols = ", ".join(
+                f"COALESCE(CAST(strftime('%s', {r[1]}, 'utc') AS INTEGER), 0)"
+                if r[1] == col else r[1]
+                for r in info
+            )
+            self.conn.executescript(f"""
+                BEGIN;
+                {new_sql};
+                INSERT INTO {table}_new SELECT {cols} FROM {table};
+                DROP TABLE {table};
+                ALTER TABLE {table}_new RENAME TO {table};
+                COMMIT;
+            """)
+
+    def _migrate_hash_to_blob(self) -> None:
+        """Convert hex `content_hash` text to digests (see `hash_key`).
+
+        BLOBs bypass the column's affinity, so older tables (declared TEXT)
+        are converted in place. Tracked with `user_version` to run once.
+        """
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] >= 1:
+            return
+        self.conn.create_function("hash_key", 1, hash_key, deterministic=True)
+        self.conn.execute(
+            "UPDATE pulled_uids SET content_hash = hash_key(content_hash)"
+            " WHERE typeof(content_hash) = 'text'"
+        )
+        self.conn.execute("PRAGMA user_version = 1")
+
     # -------------------------------------------------------------------------
     # Pulled UIDs tracking
     # -------------------------------------------------------------------------
@@ -197,6 +624,9 @@ class UidsDB:
     ) -> None:
         """Record a successfully pulled message.
 
+        Commits every `PULL_COMMIT_INTERVAL` rows, or on `flush()` /
+        `disconnect()`; queries on this connection see uncommitted rows.
+
         Args:
             account: Account name (e.g., 'y' for Yahoo)
             folder: Folder name (e.g., 'Inbox')
@@ -207,13 +637,72 @@ class UidsDB:
             local_path: Path where message was stored (optional)
             pulled_at: When the message was pulled (defaults to now)
         """
-        ts = (pulled_at or datetime.now()).isoformat()
-        self.conn.execute("""
-            INSERT OR REPLACE INTO pulled_uids
-                (account, folder, uidvalidity, uid, content_hash, message_id, local_path, pulled_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (account, folder, uidvalidity, uid, content_hash, message_id, local_path, ts))
-        self.conn.commit()
+        ts = int(pulled_at.timestamp()) if pulled_at else int(time.time())
+        self.conn.execute(self._PULL_INSERT, (
+            self._folder_id(account, folder), uidvalidity, uid, hash_key(content_hash),
+            message_id, local_path, ts,
+        ))
+        cached = self._pulled_cache.get((account, folder, uidvalidity))
+        if cached is not None:
+            cached.add(uid)
+        self._uncommitted_pulls += 1
+        if self._uncommitted_pulls >= PULL_COMMIT_INTERVAL:
+            self.flush()
+
+    def record_pulls(self, rows: Iterable[PulledUID]) -> None:
+        """Record many successfully pulled messages in one transaction."""
+        rows = list(rows)
+        self.conn.executemany(self._PULL_INSERT, [
+            (self._folder_id(r.account, r.folder), r.uidvalidity, r.uid, hash_key(r.content_hash),
+             r.message_id, r.local_path, int(r.pulled_at.timestamp()))
+            for r in rows
+        ])
+        for r in rows:
+            cached = self._pulled_cache.get((r.account, r.folder, r.uidvalidity))
+            if cached is not None:
+                cached.add(r.uid)
+        self.flush()
+
+    def _folder_id(self, account: str, folder: str) -> int:
+        """ID of the (account, folder) row in `folders`, creating it if needed."""
+        key = (account, folder)
+        folder_id = self._folder_ids.get(key)
+        if folder_id is None:
+            # The no-op update makes RETURNING yield the existing row's ID
+            [folder_id] = self.conn.execute("""
+                INSERT INTO folders (account, name) VALUES (?, ?)
+                ON CONFLICT (account, name) DO UPDATE SET name = excluded.name
+                RETURNING id
+            """, key).fetchone()
+            self._folder_ids[key] = folder_id
+        return folder_id
+
+    def flush(self) -> None:
+        """Commit writes deferred by `record_pull` / `record_server_uids`."""
+        if self.conn.in_transaction:
+            self.conn.commit()
+        self._uncommitted_pulls = 0
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run writes in a ``BEGIN IMMEDIATE`` transaction, committing on success.
+
+        Groups deferred writes (e.g. server UIDs and folder metadata for
+        every synced folder) into one commit. On error, rolls back only if
+        the block began the transaction.
+        """
+        conn = self.conn
+        began = not conn.in_transaction
+        if began:
+            conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            if began:
+                conn.rollback()
+                self._pulled_cache.clear()
+            raise
+        self.flush()
 
     def get_pulled_uids(
         self,
@@ -224,13 +713,62 @@ class UidsDB:
         """Get all UIDs we've pulled for this account/folder/uidvalidity.
 
         Returns:
-            Set of UIDs that have been successfully pulled
+            Set of UIDs that have been successfully pulled (a copy of the
+            cached set)
         """
-        cur = self.conn.execute("""
-            SELECT uid FROM pulled_uids
-            WHERE account = ? AND folder = ? AND uidvalidity = ?
-        """, (account, folder, uidvalidity))
-        return {row["uid"] for row in cur}
+        return set(self._pulled_set(account, folder, uidvalidity))
+
+    def is_pulled(self, account: str, folder: str, uidvalidity: int, uid: int) -> bool:
+        """Check whether a UID has been pulled (a lookup in the cached set)."""
+        return uid in self._pulled_set(account, folder, uidvalidity)
+
+    def _pulled_set(self, account: str, folder: str, uidvalidity: int) -> set[int]:
+        key = (account, folder, uidvalidity)
+        cached = self._pulled_cache.get(key)
+        if cached is None:
+            cur = self.conn.execute(self._PULLED_UIDS_SELECT, key)
+            cached = self._pulled_cache[key] = {uid for (uid,) in cur}
+        return cached
+
+    def get_pulled_uids_arrow(
+        self,
+        account: str,
+        folder: str,
+        uidvalidity: int,
+    ) -> "pa.Array":
+        """`get_pulled_uids` as an int64 Arrow array (unordered).
+
+        Read straight from uids.parquet when it is current, for consumers
+        (pyarrow/pandas/polars) that don't need a Python set.
+        """
+        import pyarrow as pa
+
+        if self._parquet_is_current():
+            from .parquet import read_pulled_uids_from_parquet
+            return read_pulled_uids_from_parquet(self._eml_dir, account, folder, uidvalidity)
+        cur = self.conn.execute(self._PULLED_UIDS_SELECT, (account, folder, uidvalidity))
+        return pa.array([uid for (uid,) in cur], type=pa.int64())
+
+    def missing_uids(
+        self,
+        account: str,
+        folder: str,
+        uidvalidity: int,
+        uids: Iterable[int],
+    ) -> list[int]:
+        """Filter `uids` down to those not yet pulled (keeping their order).
+
+        The difference is taken in SQL, so callers don't need the set of
+        every UID pulled from the folder.
+        """
+        cur = self.conn.execute(f"""
+            SELECT c.value FROM json_each(?) c
+            LEFT JOIN pulled_uids p
+                ON p.folder_id = {FOLDER_ID} AND p.uidvalidity = ? AND p.uid = c.value
+            WHERE p.uid IS NULL
+            ORDER BY c.key
+        """, (json_array(uids), account, folder, uidvalidity))
+        return [row[0] for row in cur]
 
     def get_pulled_count(
         self,
@@ -240,63 +778,67 @@ class UidsDB:
     ) -> int:
         """Get count of pulled messages for account/folder."""
         if uidvalidity is not None:
-            cur = self.conn.execute("""
-                SELECT COUNT(*) FROM pulled_uids
-                WHERE account = ? AND folder = ? AND uidvalidity = ?
+            cur = self.conn.execute(f"""
+                SELECT COALESCE(SUM(cnt), 0) FROM pull_counts
+                WHERE folder_id = {FOLDER_ID} AND uidvalidity = ?
             """, (account, folder, uidvalidity))
         else:
-            cur = self.conn.execute("""
-                SELECT COUNT(*) FROM pulled_uids
-                WHERE account = ? AND folder = ?
+            cur = self.conn.execute(f"""
+                SELECT COALESCE(SUM(cnt), 0) FROM pull_counts
+                WHERE folder_id = {FOLDER_ID}
             """, (account, folder))
         return cur.fetchone()[0]
 
     def has_content_hash(self, content_hash: str) -> bool:
         """Check if we've pulled a message with this content hash (any account/folder)."""
-        cur = self.conn.execute(
-            "SELECT 1 FROM pulled_uids WHERE content_hash = ? LIMIT 1",
-            (content_hash,)
-        )
+        cur = self.conn.execute(self._HAS_HASH, (hash_key(content_hash),))
         return cur.fetchone() is not None
 
     def get_all_content_hashes(self) -> set[str]:
         """Get all content hashes we've ever pulled."""
-        cur = self.conn.execute("SELECT DISTINCT content_hash FROM pulled_uids")
-        return {row["content_hash"] for row in cur}
+        if self._parquet_is_current():
+            from .parquet import get_all_content_hashes_from_parquet
+            return get_all_content_hashes_from_parquet(self._eml_dir)
+        with self._checkout_reader() as conn:
+            cur = conn.execute("SELECT DISTINCT content_hash FROM pulled_uids")
+            return {hash_str(h) for (h,) in cur}
+
+    def build_dedup_filter(self, fp_rate: float = 0.001) -> ContentHashFilter:
+        """Bloom filter of all content hashes we've ever pulled.
+
+        Smaller than `get_all_content_hashes`' set; confirm its hits with
+        `has_content_hash`. Read from uids.parquet when it's current.
+        """
+        if self._parquet_is_current():
+            from .parquet import read_content_hashes_from_parquet
+            hashes = read_content_hashes_from_parquet(self._eml_dir).to_pylist()
+        else:
+            cur = self.conn.execute("SELECT DISTINCT content_hash FROM pulled_uids")
+            hashes = [hash_str(h) for (h,) in cur]
+        dedup = ContentHashFilter(len(hashes), fp_rate)
+        for h in hashes:
+            dedup.add(h)
+        return dedup
 
     def get_uidvalidity(self, account: str, folder: str) -> int | None:
         """Get the UIDVALIDITY we have on record for this folder.
 
         Returns None if no records exist for this account/folder.
         """
-        cur = self.conn.execute("""
-            SELECT DISTINCT uidvalidity FROM pulled_uids
-            WHERE account = ? AND folder = ?
-        """, (account, folder))
-        rows = cur.fetchall()
-        if not rows:
-            return None
-        if len(rows) > 1:
-            # Multiple UIDVALIDITYs - folder was reset at some point
-            # Return the most recent one (highest count)
-            cur = self.conn.execute("""
-                SELECT uidvalidity, COUNT(*) as cnt FROM pulled_uids
-                WHERE account = ? AND folder = ?
-                GROUP BY uidvalidity
-                ORDER BY cnt DESC
-                LIMIT 1
-            """, (account, folder))
-            return cur.fetchone()["uidvalidity"]
-        return rows[0]["uidvalidity"]
+        # Multiple UIDVALIDITYs mean the folder was reset at some point;
+        # return the most recent one (highest count)
+        row = self.conn.execute(f"""
+            SELECT uidvalidity FROM pull_counts
+            WHERE folder_id = {FOLDER_ID}
+            ORDER BY cnt DESC
+            LIMIT 1
+        """, (account, folder)).fetchone()
+        return row[0] if row else None
 
     def get_path_by_content_hash(self, content_hash: str) -> str | None:
         """Get local_path for a content hash (for dedup display)."""
-        cur = self.conn.execute(
-            "SELECT local_path FROM pulled_uids WHERE content_hash = ? AND local_path IS NOT NULL LIMIT 1",
-            (content_hash,)
-        )
-        row = cur.fetchone()
-        return row["local_path"] if row else None
+        row = self.conn.execute(self._PATH_BY_HASH, (hash_key(content_hash),)).fetchone()
+        return row[0] if row else None
 
     def get_folders_with_activity(self, account: str | None = None) -> list[tuple[str, str, int]]:
         """Get list of folders that have pull activity.
@@ -304,22 +846,25 @@ class UidsDB:
         Returns:
             List of (account, folder, pull_count) tuples
         """
+        if self._parquet_is_current():
+            from .parquet import get_folders_with_activity_from_parquet
+            return get_folders_with_activity_from_parquet(self._eml_dir, account)
         if account:
             cur = self.conn.execute("""
-                SELECT account, folder, COUNT(*) as cnt
-                FROM pulled_uids
-                WHERE account = ?
-                GROUP BY account, folder
-                ORDER BY cnt DESC
+                SELECT f.account, f.name, SUM(c.cnt) as total
+                FROM pull_counts c JOIN folders f ON f.id = c.folder_id
+                WHERE f.account = ?
+                GROUP BY f.id
+                ORDER BY total DESC
             """, (account,))
         else:
             cur = self.conn.execute("""
-                SELECT account, folder, COUNT(*) as cnt
-                FROM pulled_uids
-                GROUP BY account, folder
-                ORDER BY cnt DESC
+                SELECT f.account, f.name, SUM(c.cnt) as total
+                FROM pull_counts c JOIN folders f ON f.id = c.folder_id
+                GROUP BY f.id
+                ORDER BY total DESC
             """)
-        return [(row["account"], row["folder"], row["cnt"]) for row in cur]
+        return cur.fetchall()
 
     # -------------------------------------------------------------------------
     # Server UIDs tracking
@@ -332,14 +877,20 @@ class UidsDB:
         uidvalidity: int,
         uid_message_ids: list[tuple[int, str | None]],
     ) -> None:
-        """Record UIDs seen on server (with optional Message-IDs)."""
-        now = datetime.now().isoformat()
+        """Record UIDs seen on server (with optional Message-IDs).
+
+        Not committed here; wrap server-state updates in `transaction()`,
+        or they're committed by the next `flush()` / `disconnect()`.
+        """
+        now = int(time.time())
         self.conn.executemany("""
-            INSERT OR REPLACE INTO server_uids
+            INSERT INTO server_uids
                 (account, folder, uidvalidity, uid, message_id, last_seen)
             VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (account, folder, uidvalidity, uid) DO UPDATE SET
+                message_id = excluded.message_id,
+                last_seen = excluded.last_seen
         """, [(account, folder, uidvalidity, uid, mid, now) for uid, mid in uid_message_ids])
-        self.conn.commit()
 
     def record_server_folder(
         self,
@@ -348,13 +899,16 @@ class UidsDB:
         uidvalidity: int,
         message_count: int,
     ) -> None:
-        """Record server folder metadata."""
+        """Record server folder metadata (uncommitted, like `record_server_uids`)."""
         self.conn.execute("""
-            INSERT OR REPLACE INTO server_folders
+            INSERT INTO server_folders
                 (account, folder, uidvalidity, message_count, last_checked)
             VALUES (?, ?, ?, ?, ?)
-        """, (account, folder, uidvalidity, message_count, datetime.now().isoformat()))
-        self.conn.commit()
+            ON CONFLICT (account, folder) DO UPDATE SET
+                uidvalidity = excluded.uidvalidity,
+                message_count = excluded.message_count,
+                last_checked = excluded.last_checked
+        """, (account, folder, uidvalidity, message_count, int(time.time())))
 
     def get_server_uids(
         self,
@@ -367,34 +921,38 @@ class UidsDB:
             SELECT uid FROM server_uids
             WHERE account = ? AND folder = ? AND uidvalidity = ?
         """, (account, folder, uidvalidity))
-        return {row["uid"] for row in cur}
+        return {uid for (uid,) in cur}
 
     def get_server_uid_count(self, account: str, folder: str) -> int:
         """Get count of UIDs tracked for server folder."""
-        cur = self.conn.execute("""
-            SELECT COUNT(*) FROM server_uids
-            WHERE account = ? AND folder = ?
-        """, (account, folder))
-        return cur.fetchone()[0]
+        cur = self.conn.execute(
+            "SELECT cnt FROM server_uid_counts WHERE account = ? AND folder = ?",
+            (account, folder),
+        )
+        row = cur.fetchone()
+        return row[0] if row else 0
 
     def get_server_folder_info(
         self,
         account: str,
         folder: str,
-    ) -> tuple[int, int, str] | None:
+    ) -> tuple[int, int, datetime] | None:
         """Get server folder metadata (uidvalidity, message_count, last_checked).
 
         Returns:
             Tuple of (uidvalidity, message_count, last_checked) or None if not found.
         """
-        cur = self.conn.execute("""
-            SELECT uidvalidity, message_count, last_checked FROM server_folders
+        cur = self.conn.execute(f"""
+            SELECT uidvalidity, message_count, last_checked AS "last_checked [{EPOCH}]"
+            FROM server_folders
             WHERE account = ? AND folder = ?
         """, (account, folder))
-        row = cur.fetchone()
-        if row:
-            return (row["uidvalidity"], row["message_count"], row["last_checked"])
-        return None
+        return cur.fetchone()
+
+    def get_server_folder_uidvalidity(self, account: str, folder: str) -> int | None:
+        """Get the UIDVALIDITY last reported by the server for this folder."""
+        row = self.conn.execute(self._SERVER_UIDVALIDITY, (account, folder)).fetchone()
+        return row[0] if row else None
 
     def get_unpulled_uids(
         self,
@@ -403,17 +961,16 @@ class UidsDB:
         uidvalidity: int,
     ) -> set[int]:
         """Get UIDs that are on server but not pulled."""
-        cur = self.conn.execute("""
+        cur = self.conn.execute(f"""
             SELECT s.uid FROM server_uids s
             LEFT JOIN pulled_uids p
-                ON s.account = p.account
-                AND s.folder = p.folder
+                ON p.folder_id = {FOLDER_ID}
                 AND s.uidvalidity = p.uidvalidity
                 AND s.uid = p.uid
             WHERE s.account = ? AND s.folder = ? AND s.uidvalidity = ?
                 AND p.uid IS NULL
-        """, (account, folder, uidvalidity))
-        return {row["uid"] for row in cur}
+        """, (account, folder, account, folder, uidvalidity))
+        return {uid for (uid,) in cur}
 
     def get_uids_without_message_id(
         self,
@@ -427,7 +984,7 @@ class UidsDB:
             WHERE account = ? AND folder = ? AND uidvalidity = ?
                 AND (message_id IS NULL OR message_id = '')
         """, (account, folder, uidvalidity))
-        return {row["uid"] for row in cur}
+        return {uid for (uid,) in cur}
 
     def clear_folder(
         self,
@@ -440,15 +997,18 @@ class UidsDB:
         Returns:
             Number of records deleted
         """
+        for key in list(self._pulled_cache):
+            if key[:2] == (account, folder) and uidvalidity in (None, key[2]):
+                del self._pulled_cache[key]
         if uidvalidity is not None:
-            cur = self.conn.execute("""
+            cur = self.conn.execute(f"""
                 DELETE FROM pulled_uids
-                WHERE account = ? AND folder = ? AND uidvalidity = ?
+                WHERE folder_id = {FOLDER_ID} AND uidvalidity = ?
             """, (account, folder, uidvalidity))
         else:
-            cur = self.conn.execute("""
+            cur = self.conn.execute(f"""
                 DELETE FROM pulled_uids
-                WHERE account = ? AND folder = ?
+                WHERE folder_id = {FOLDER_ID}
             """, (account, folder))
         self.conn.commit()
         return cur.rowcount
@@ -459,31 +1019,58 @@ class UidsDB:
         Returns:
             Dict with counts per folder, total, etc.
         """
-        stats: dict = {"total": 0, "folders": {}}
+        if self._parquet_is_current():
+            from .parquet import get_stats_from_parquet
+            return get_stats_from_parquet(self._eml_dir, account)
+
+        with self._checkout_reader() as conn:
+            return self._folder_stats(conn, account)
+
+    def get_stats_parallel(self, accounts: Iterable[str] | None = None) -> dict[str, dict]:
+        """`get_stats` for each account, queried concurrently.
 
+        Each account is counted on its own pooled read-only connection (in
+        WAL mode readers don't block each other, and sqlite3 releases the
+        GIL while a query runs). Deferred pull records are committed first,
+        so the readers see them.
+
+        Args:
+            accounts: Accounts to count (defaults to all with pulled UIDs)
+
+        Returns:
+            Dict of account -> `get_stats` result
+        """
+        self.flush()
+        if accounts is None:
+            accounts = [a for (a,) in self.conn.execute("""
+                SELECT DISTINCT f.account FROM pull_counts c JOIN folders f ON f.id = c.folder_id
+            """)]
+        accounts = list(accounts)
+        if self._parquet_is_current() or not self._readers:
+            return {account: self.get_stats(account) for account in accounts}
+
+        def stats(account: str) -> dict:
+            with self._readers.checkout() as conn:
+                return self._folder_stats(conn, account)
+
+        with ThreadPoolExecutor(max_workers=min(self._readers.size, len(accounts) or 1)) as pool:
+            return dict(zip(accounts, pool.map(stats, accounts)))
+
+    @staticmethod
+    def _folder_stats(conn: sqlite3.Connection, account: str | None) -> dict:
         if account:
-            cur = self.conn.execute("""
-                SELECT folder, uidvalidity, COUNT(*) as count
-                FROM pulled_uids
-                WHERE account = ?
-                GROUP BY folder, uidvalidity
+            cur = conn.execute("""
+                SELECT f.name, SUM(c.cnt) FROM pull_counts c JOIN folders f ON f.id = c.folder_id
+                WHERE f.account = ?
+                GROUP BY f.name
             """, (account,))
         else:
-            cur = self.conn.execute("""
-                SELECT account, folder, uidvalidity, COUNT(*) as count
-                FROM pulled_uids
-                GROUP BY account, folder, uidvalidity
+            cur = conn.execute("""
+                SELECT f.name, SUM(c.cnt) FROM pull_counts c JOIN folders f ON f.id = c.folder_id
+                GROUP BY f.name
             """)
-
-        for row in cur:
-            folder = row["folder"]
-            count = row["count"]
-            stats["total"] += count
-            if folder not in stats["folders"]:
-                stats["folders"][folder] = 0
-            stats["folders"][folder] += count
-
-        return stats
+        folders = dict(cur.fetchall())
+        return {"total": sum(folders.values()), "folders": folders}
 
 
 def get_uids_db(root: Path | None = None) -> UidsDB:
@@ -1,6 +1,6 @@
 #!/usr/bin/env -S uv run
 # /// script
-# dependencies = ["fastapi", "uvicorn", "sse-starlette"]
+# dependencies = ["fastapi", "uvicorn", "sse-starlette", "fast-mail-parser", "orjson"]
 # ///
 """Web UI for EML status monitoring.
 
@@ -9,25 +9,440 @@ Or directly: python -m eml.web
 """
 
 import asyncio
+import base64
 import email
+import hashlib
+import heapq
+import io
 import json
+import logging
+import mmap
 import os
+import quopri
 import re
 import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime
+from email.message import Message
+from functools import lru_cache, partial, wraps
 from pathlib import Path
+from typing import AsyncIterator, Callable, Iterator
 from urllib.parse import quote
 
+from anyio import CapacityLimiter, to_thread
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, Response, StreamingResponse
 import uvicorn
 
-from .config import get_eml_root
-from .index import FileIndex
-from .pulls import get_pulls_db
+from .config import EML_DIR, get_eml_root
+from .db import READER_PRAGMAS, apply_pragmas, connect_readonly
+from .index import FileIndex, IndexedFile
+from .pulls import PullsDB, get_pulls_db
 
+# Optional native (Rust) MIME parser, much faster than the stdlib `email`
+# package for headers/bodies; handlers fall back to `email` without it
+try:
+    from fast_mail_parser import ParseError, parse_email
+except ImportError:
+    parse_email = None
 
-app = FastAPI(title="EML Status")
+# Optional native JSON serializer for responses; stdlib `json` without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumpb(obj) -> bytes:
+    """Serialize `obj` to UTF-8 JSON, with datetimes as ISO 8601 strings."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, default=_json_default, ensure_ascii=False).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it's installed."""
+
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content)
+
+
+log = logging.getLogger(__name__)
+
+app = FastAPI(title="EML Status", default_response_class=FastJSONResponse)
+
+# Worker threads for handlers' blocking SQLite/file I/O, separate from (and
+# larger than) the default threadpool shared with the rest of the app
+IO_LIMITER = CapacityLimiter(64)
+
+# The SSE change poll gets its own token, so slow handlers occupying every
+# IO_LIMITER slot (e.g. big folder scans) can't stall live updates
+STREAM_LIMITER = CapacityLimiter(1)
+
+
+def threaded(handler):
+    """Turn a blocking handler into an async endpoint that runs it on `IO_LIMITER`.
+
+    The event loop stays free while the handler waits on SQLite or the
+    filesystem. The original function stays reachable as `__wrapped__`.
+    """
+    @wraps(handler)
+    async def endpoint(*args, **kwargs):
+        return await to_thread.run_sync(partial(handler, *args, **kwargs), limiter=IO_LIMITER)
+    return endpoint
+
+
+def ttl_cache(ttl: int, maxsize: int = 256):
+    """Reuse a handler's JSON response for `ttl` seconds per set of arguments.
+
+    For slowly-changing endpoints polled by the UI: concurrent identical
+    requests wait for the first instead of each hitting the database, and
+    responses carry a matching Cache-Control. Error responses aren't cached.
+    """
+    def decorator(handler):
+        cache: dict[tuple, tuple[float, Response]] = {}
+        locks: dict[tuple, threading.Lock] = {}
+        guard = threading.Lock()
+
+        @wraps(handler)
+        def cached(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            with guard:
+                lock = locks.setdefault(key, threading.Lock())
+            with lock:
+                hit = cache.get(key)
+                if hit and hit[0] > time.monotonic():
+                    return hit[1]
+                result = handler(*args, **kwargs)
+                if isinstance(result, Response):
+                    return result
+                response = FastJSONResponse(
+                    jsonable_encoder(result), headers={"Cache-Control": f"public, max-age={ttl}"},
+                )
+                with guard:
+                    if len(cache) >= maxsize:
+                        cache.clear()
+                        locks.clear()
+                    cache[key] = (time.monotonic() + ttl, response)
+                return response
+        return cached
+    return decorator
+
+
+def parse_fast(data: bytes):
+    """Parse a message with fast_mail_parser, or None if unavailable/unparseable."""
+    if parse_email is None:
+        return None
+    try:
+        return parse_email(data)
+    except ParseError:
+        return None
+
+
+def fast_header(mail, name: str, default: str = "") -> str:
+    """Case-insensitive header lookup on a fast_mail_parser result."""
+    name = name.lower()
+    for key, value in mail.headers.items():
+        if key.lower() == name:
+            return value
+    return default
+
+
+# Inline-image references rewritten by /api/email
+CID_RE = re.compile(r'cid:([^"\'>\s]+)')
+ATTACHMENT_IMG_RE = re.compile(r'<img[^>]+src="(/api/attachment/[^"]+)"[^>]*>')
+
+# A Content-Disposition header, including folded continuation lines
+DISPOSITION_RE = re.compile(
+    rb'^Content-Disposition:[^\r\n]*(?:\r?\n[ \t][^\r\n]*)*', re.IGNORECASE | re.MULTILINE,
+)
+
+# Characters outside the base64 alphabet (line breaks etc.), skipped when decoding
+BASE64_JUNK_RE = re.compile(r'[^A-Za-z0-9+/]')
+
+# Headers returned by /api/email: response key -> header name
+EMAIL_HEADERS = {
+    "from": "From",
+    "to": "To",
+    "cc": "Cc",
+    "date": "Date",
+    "subject": "Subject",
+    "message_id": "Message-ID",
+    "in_reply_to": "In-Reply-To",
+    "references": "References",
+}
+
+
+# Larger attachments aren't kept in the parsed-email cache; they're decoded
+# from the file again and streamed when requested
+MAX_CACHED_ATTACHMENT = 1 << 20
+STREAM_CHUNK_SIZE = 1 << 16
+
+# Once streamed, large attachments are kept decoded on disk (in .eml/) up to
+# this total size, least recently used evicted first
+ATTACHMENT_CACHE_DIR = "attachments"
+ATTACHMENT_CACHE_BYTES = 512 << 20
+
+
+@dataclass(frozen=True)
+class EmailAttachment:
+    """A named MIME part of a parsed email."""
+    filename: str
+    content_type: str
+    content_id: str | None  # without angle brackets
+    size: int
+    payload: bytes | None  # None when too large to cache; see stream_attachment
+
+    @classmethod
+    def of(
+        cls, filename: str, content_type: str, content_id: str | None,
+        size: int, decode: Callable[[], bytes],
+    ):
+        """Build one, only calling `decode` for payloads small enough to cache."""
+        if size > MAX_CACHED_ATTACHMENT:
+            return cls(filename, content_type, content_id, size, None)
+        payload = decode()
+        return cls(filename, content_type, content_id, len(payload), payload)
+
+
+@dataclass(frozen=True)
+class ParsedEmail:
+    """What the email endpoints need from an .eml file, parsed once."""
+    headers: dict[str, str]
+    body_html: str
+    body_plain: str
+    attachments: tuple[EmailAttachment, ...]
+
+
+def load_email(path: Path) -> ParsedEmail:
+    """Parse an .eml file, reusing the result while the file is unchanged.
+
+    The UI fetches an email and then each of its inline images; caching by
+    (path, mtime, size) parses the file once for all of those requests.
+    """
+    path = path.resolve()
+    st = path.stat()
+    return _parse_email_file(str(path), st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=128)
+def _parse_email_file(path: str, mtime_ns: int, size: int) -> ParsedEmail:
+    from email import policy
+
+    data = Path(path).read_bytes()
+    mail = parse_fast(data)
+    if mail is not None and not any("cid:" in html for html in mail.text_html):
+        # No inline images to map (Content-IDs need the stdlib parser)
+        headers = {key: fast_header(mail, name) for key, name in EMAIL_HEADERS.items()}
+        headers["subject"] = headers["subject"] or "(no subject)"
+        return ParsedEmail(
+            headers=headers,
+            body_html=mail.text_html[0] if mail.text_html else "",
+            body_plain=mail.text_plain[0] if mail.text_plain else "",
+            attachments=tuple(
+                EmailAttachment.of(a.filename, a.mimetype, None, len(a.content), partial(bytes, a.content))
+                for a in mail.attachments
+                if a.filename
+            ),
+        )
+
+    msg = email.message_from_bytes(data, policy=policy.default)
+    headers = {key: msg.get(name, "") for key, name in EMAIL_HEADERS.items()}
+    headers["subject"] = headers["subject"] or "(no subject)"
+
+    # Get body (prefer HTML, fall back to plain)
+    body_html = ""
+    body_plain = ""
+    attachments = []
+    if msg.is_multipart():
+        for part in msg.walk():
+            if part.is_multipart():
+                continue  # Containers hold no body text or attachment payload
+            ct = part.get_content_type()
+            if ct == "text/html" and not body_html:
+                try:
+                    body_html = part.get_content()
+                except Exception:
+                    pass
+            elif ct == "text/plain" and not body_plain:
+                try:
+                    body_plain = part.get_content()
+                except Exception:
+                    pass
+            filename = part.get_filename()
+            if filename:
+                # Content-ID is usually <xxx>, strip angle brackets
+                content_id = part.get("Content-ID", "")
+                attachments.append(EmailAttachment.of(
+                    filename,
+                    ct,
+                    content_id.strip("<>") if content_id else None,
+                    decoded_size(part),
+                    lambda part=part: part.get_payload(decode=True) or b"",
+                ))
+    else:
+        ct = msg.get_content_type()
+        try:
+            content = msg.get_content()
+            if ct == "text/html":
+                body_html = content
+            else:
+                body_plain = content
+        except Exception:
+            body_plain = "(could not decode body)"
+
+    return ParsedEmail(headers, body_html, body_plain, tuple(attachments))
+
+
+def find_attachment(path: Path, filename: str) -> Message | None:
+    """The MIME part of an .eml file that `load_email` lists as `filename`."""
+    from email import policy
+
+    with path.open("rb") as f:
+        msg = email.message_from_binary_file(f, policy=policy.default)
+    return next(
+        (p for p in msg.walk() if not p.is_multipart() and p.get_filename() == filename),
+        None,
+    )
+
+
+def _payload_slices(text: str) -> Iterator[str]:
+    """Slices of `text` of at least STREAM_CHUNK_SIZE characters, ending at line breaks."""
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start + STREAM_CHUNK_SIZE) + 1 or len(text)
+        yield text[start:end]
+        start = end
+
+
+def stream_attachment(part: Message) -> Iterator[bytes]:
+    """Decode a MIME part's payload in chunks.
+
+    Base64 and quoted-printable bodies are decoded a slice at a time, so
+    the decoded payload is never held in memory whole (the encoded text is
+    already in the parsed message).
+    """
+    encoding = part.get("Content-Transfer-Encoding", "").strip().lower()
+    if encoding not in ("base64", "quoted-printable"):
+        payload = part.get_payload(decode=True) or b""
+        for i in range(0, len(payload), STREAM_CHUNK_SIZE):
+            yield payload[i:i + STREAM_CHUNK_SIZE]
+        return
+
+    rest = ""
+    for text in _payload_slices(part.get_payload()):
+        if encoding == "base64":
+            # Decode whole 4-character groups; carry the remainder over
+            text = rest + BASE64_JUNK_RE.sub("", text)
+            cut = len(text) - len(text) % 4
+            rest = text[cut:]
+            yield base64.b64decode(text[:cut])
+        else:
+            yield quopri.decodestring(text.encode("ascii", "replace"))
+    if rest and len(rest) != 1:
+        yield base64.b64decode(rest + "=" * (-len(rest) % 4))
+
+
+def decoded_size(part: Message) -> int:
+    """Size of a MIME part's decoded payload, as `stream_attachment` yields it.
+
+    Base64 sizes are computed from the encoded length, without decoding.
+    """
+    encoding = part.get("Content-Transfer-Encoding", "").strip().lower()
+    if encoding != "base64":
+        return sum(len(chunk) for chunk in stream_attachment(part))
+    n = len(BASE64_JUNK_RE.sub("", part.get_payload()))
+    # A trailing group of 2 or 3 characters decodes to 1 or 2 bytes (1 is invalid, dropped)
+    return n // 4 * 3 + (0, 0, 1, 2)[n % 4]
+
+
+def attachment_cache_path(root: Path, eml_path: Path, filename: str) -> Path:
+    """Where a decoded large attachment is cached, keyed to the file's version."""
+    eml_path = eml_path.resolve()
+    st = eml_path.stat()
+    key = f"{eml_path}\0{st.st_mtime_ns}\0{st.st_size}\0{filename}"
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return root / EML_DIR / ATTACHMENT_CACHE_DIR / f"{digest}.bin"
+
+
+def cache_stream(chunks: Iterator[bytes], cache_path: Path, size: int) -> Iterator[bytes]:
+    """Pass `chunks` through, saving them to `cache_path` once complete.
+
+    Later requests serve the cached file with FileResponse (sendfile) and
+    skip decoding. The file is only moved into place if the stream ran to
+    the end and produced `size` bytes; an interrupted or short download
+    leaves nothing behind.
+    """
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        written = 0
+        with tmp.open("wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+                yield chunk
+        if written == size:
+            os.replace(tmp, cache_path)
+            evict_attachment_cache(cache_path.parent)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def evict_attachment_cache(cache_dir: Path, max_bytes: int = ATTACHMENT_CACHE_BYTES) -> None:
+    """Delete least-recently-used cached attachments beyond `max_bytes`."""
+    entries = []
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if entry.name.endswith(".bin"):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def cache_headers(path: Path) -> dict[str, str]:
+    """Caching headers for a response derived only from the file at `path`."""
+    st = path.stat()
+    return {
+        "ETag": f'W/"{st.st_mtime_ns:x}-{st.st_size:x}"',
+        "Cache-Control": "private, max-age=300, must-revalidate",
+    }
+
+
+def not_modified(request: Request, headers: dict[str, str]) -> Response | None:
+    """A 304 response if the client's If-None-Match covers our ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    etag = headers["ETag"].removeprefix("W/")
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if etag in tags or "*" in tags:
+        return Response(status_code=304, headers=headers)
+    return None
 
 
 def get_index_db(root: Path) -> FileIndex:
@@ -35,6 +450,71 @@ def get_index_db(root: Path) -> FileIndex:
     return FileIndex(root / ".eml")
 
 
+# Per-thread connected databases, reused across requests by the worker
+# threads that run handlers (sqlite3 connections belong to the thread that
+# opened them; a thread's databases are closed when it exits)
+_thread_dbs = threading.local()
+
+
+def _thread_db(factory: Callable[[Path], PullsDB | FileIndex], root: Path) -> PullsDB | FileIndex:
+    dbs = _thread_dbs.__dict__.setdefault("dbs", {})
+    db = factory(root)
+
+    def state() -> tuple[bool, bool]:
+        return db.db_path.exists(), getattr(db, "has_uids_db", False)
+
+    # Reconnect when a database file appears after caching
+    cached = dbs.get((factory, root))
+    if cached and cached[1] == state():
+        return cached[0]
+    if cached:
+        cached[0].disconnect()
+    db.connect()
+    dbs[(factory, root)] = (db, state())
+    return db
+
+
+def _thread_readonly_conn(path: Path) -> sqlite3.Connection:
+    """This thread's read-only connection to the database at `path` (must exist).
+
+    Reopened if the file is replaced (e.g. deleted and recreated).
+    """
+    conns = _thread_dbs.__dict__.setdefault("readonly", {})
+    ino = path.stat().st_ino
+    cached = conns.get(path)
+    if cached and cached[1] == ino:
+        return cached[0]
+    if cached:
+        cached[0].close()
+    conn = connect_readonly(path)
+    conn.row_factory = sqlite3.Row
+    apply_pragmas(conn, READER_PRAGMAS)
+    conns[path] = (conn, ino)
+    return conn
+
+
+@contextmanager
+def pulls_db(root: Path) -> Iterator[PullsDB]:
+    """This thread's connected PullsDB for `root`, left open for reuse."""
+    db = _thread_db(get_pulls_db, root)
+    try:
+        yield db
+    finally:
+        # Don't hold the write lock (or hide writes) between requests
+        db.flush_pulls()
+
+
+@contextmanager
+def index_db(root: Path) -> Iterator[FileIndex]:
+    """This thread's connected FileIndex for `root`, left open for reuse."""
+    db = _thread_db(get_index_db, root)
+    try:
+        yield db
+    finally:
+        if db.conn.in_transaction:
+            db.conn.commit()
+
+
 def extract_folder(path: str) -> str:
     """Extract folder name from path (e.g., 'Inbox/2023/...' -> 'Inbox')."""
     parts = path.split("/")
@@ -49,16 +529,41 @@ def get_root() -> Path:
         return Path.cwd()
 
 
+# (time, ISO string) of the last `now_iso` refresh
+_now_iso_cache = (0.0, "")
+
+
+def now_iso(resolution: float = 0.1) -> str:
+    """The current local time in ISO format, reformatted at most every `resolution` seconds."""
+    global _now_iso_cache
+    t = time.time()
+    if t - _now_iso_cache[0] >= resolution:
+        _now_iso_cache = (t, datetime.fromtimestamp(t).isoformat())
+    return _now_iso_cache[1]
+
+
+@lru_cache(maxsize=8)
+def resolved_root(root: Path) -> Path:
+    """`root.resolve()`, computed once per root rather than once per request."""
+    return root.resolve()
+
+
 @app.get("/api/health")
+@threaded
 def api_health():
     """Check database health and provide rebuild suggestions."""
     root = get_root()
     eml_dir = root / ".eml"
     warnings = []
 
+    # One stat per file: None if missing
+    stats = {
+        key: _stat_or_none(eml_dir / name)
+        for key, name in (("index_db", "index.db"), ("uids_db", "uids.db"), ("uids_parquet", "uids.parquet"))
+    }
+
     # Check index.db
-    index_db = eml_dir / "index.db"
-    if not index_db.exists():
+    if stats["index_db"] is None:
         warnings.append({
             "type": "missing_index",
             "message": "index.db not found",
@@ -66,9 +571,7 @@ def api_health():
         })
 
     # Check uids.db and parquet
-    uids_db = eml_dir / "uids.db"
-    uids_parquet = eml_dir / "uids.parquet"
-    if uids_parquet.exists() and not uids_db.exists():
+    if stats["uids_parquet"] is not None and stats["uids_db"] is None:
         warnings.append({
             "type": "uids_pending_rebuild",
             "message": "uids.db will auto-rebuild from parquet on next access",
@@ -79,18 +582,26 @@ def api_health():
         "root": str(root),
         "warnings": warnings,
         "databases": {
-            "index_db": {"exists": index_db.exists(), "size": index_db.stat().st_size if index_db.exists() else 0},
-            "uids_db": {"exists": uids_db.exists(), "size": uids_db.stat().st_size if uids_db.exists() else 0},
-            "uids_parquet": {"exists": uids_parquet.exists(), "size": uids_parquet.stat().st_size if uids_parquet.exists() else 0},
+            key: {"exists": st is not None, "size": st.st_size if st else 0}
+            for key, st in stats.items()
         },
     }
 
 
+def _stat_or_none(path: Path) -> os.stat_result | None:
+    try:
+        return path.stat()
+    except FileNotFoundError:
+        return None
+
+
 @app.get("/api/folders")
+@threaded
+@ttl_cache(5)
 def api_folders(account: str | None = None):
     """Get list of folders with activity."""
     root = get_root()
-    with get_pulls_db(root) as db:
+    with pulls_db(root) as db:
         folders = db.get_folders_with_activity(account=account)
         return {
             "folders": [
@@ -101,6 +612,7 @@ def api_folders(account: str | None = None):
 
 
 @app.get("/api/status")
+@threaded
 def api_status(account: str = "y", folder: str | None = None):
     """Get UID status summary. If folder is None, aggregate across all folders."""
     root = get_root()
@@ -108,20 +620,14 @@ def api_status(account: str = "y", folder: str | None = None):
     if not pulls_db_path.exists():
         return JSONResponse({"error": "No pulls.db found"}, status_code=404)
 
-    with get_pulls_db(root) as db:
+    with pulls_db(root) as db:
         if folder is None:
             # Aggregate across all folders for this account
-            cur = db.conn.execute(
-                "SELECT SUM(cnt) FROM (SELECT COUNT(*) as cnt FROM server_uids WHERE account = ? GROUP BY folder)",
-                (account,)
-            )
-            server_count = cur.fetchone()[0] or 0
-
-            cur = db.conn.execute(
-                "SELECT SUM(cnt) FROM (SELECT COUNT(*) as cnt FROM pulled_messages WHERE account = ? GROUP BY folder)",
-                (account,)
-            )
-            pulled_count = cur.fetchone()[0] or 0
+            server_count, pulled_count = db.conn.execute(
+                """SELECT (SELECT COUNT(*) FROM server_uids WHERE account = ?),
+                          (SELECT COUNT(*) FROM pulled_messages WHERE account = ?)""",
+                (account, account)
+            ).fetchone()
 
             # For aggregated view, we can't easily compute unpulled without iterating folders
             # Just show the difference
@@ -135,19 +641,14 @@ def api_status(account: str = "y", folder: str | None = None):
                 "pulled_uids": pulled_count,
                 "unpulled_uids": unpulled_count,
                 "no_message_id": 0,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now_iso(),
             }
 
         # Single folder case
         uidvalidity = db.get_uidvalidity(account, folder)
         if not uidvalidity:
             # Try server_folders
-            cur = db.conn.execute(
-                "SELECT uidvalidity FROM server_folders WHERE account = ? AND folder = ?",
-                (account, folder)
-            )
-            row = cur.fetchone()
-            uidvalidity = row["uidvalidity"] if row else None
+            uidvalidity = db.get_server_folder_uidvalidity(account, folder)
 
         if not uidvalidity:
             return JSONResponse({"error": f"No data for {account}/{folder}"}, status_code=404)
@@ -165,11 +666,12 @@ def api_status(account: str = "y", folder: str | None = None):
             "pulled_uids": pulled_count,
             "unpulled_uids": len(unpulled_uids),
             "no_message_id": len(no_mid_uids),
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now_iso(),
         }
 
 
 @app.get("/api/folder-stats")
+@threaded
 def api_folder_stats(account: str = "y"):
     """Get per-folder UID stats: pulled vs server counts for each folder."""
     root = get_root()
@@ -178,23 +680,13 @@ def api_folder_stats(account: str = "y"):
     if not pulls_db_path.exists() and not uids_db_path.exists():
         return JSONResponse({"error": "No pulls.db or uids.db found"}, status_code=404)
 
-    with get_pulls_db(root) as db:
+    with pulls_db(root) as db:
         # Determine which connection to use for UID queries
         # PullsDB delegates to UidsDB when uids.db exists
         uids_conn = db.uids_db.conn if db.uids_db else db.conn
 
         # Get pulled counts per folder (from uids.db if available)
-        cur = uids_conn.execute(
-            """
-            SELECT folder, COUNT(*) as pulled
-            FROM pulled_uids
-            WHERE account = ?
-            GROUP BY folder
-            ORDER BY pulled DESC
-            """,
-            (account,)
-        )
-        pulled_by_folder = {row["folder"]: row["pulled"] for row in cur.fetchall()}
+        pulled_by_folder = db.get_stats(account)["folders"]
 
         # Get server UID counts per folder (from uids.db if available)
         cur = uids_conn.execute(
@@ -206,7 +698,7 @@ def api_folder_stats(account: str = "y"):
             """,
             (account,)
         )
-        server_by_folder = {row["folder"]: row["server"] for row in cur.fetchall()}
+        server_by_folder = {row[0]: row[1] for row in cur.fetchall()}
 
         # Combine into list
         all_folders = set(pulled_by_folder.keys()) | set(server_by_folder.keys())
@@ -230,10 +722,12 @@ def api_folder_stats(account: str = "y"):
 
 
 @app.get("/api/histogram")
+@threaded
+@ttl_cache(5)
 def api_histogram(account: str | None = None, folder: str | None = None, hours: int = 24):
     """Get hourly activity histogram with new vs deduped vs failed breakdown."""
     root = get_root()
-    with get_pulls_db(root) as db:
+    with pulls_db(root) as db:
         data = db.get_activity_by_hour(account=account, folder=folder, limit_hours=hours)
         return {
             "hours": hours,
@@ -242,10 +736,11 @@ def api_histogram(account: str | None = None, folder: str | None = None, hours:
 
 
 @app.get("/api/recent")
+@threaded
 def api_recent(limit: int = 20, account: str | None = None, folder: str | None = None):
     """Get recent activity (all pulls, including skipped/deduped and failures)."""
     root = get_root()
-    with get_pulls_db(root) as db:
+    with pulls_db(root) as db:
         # Get recent pulls - new files, deduped, and failures
         # with_path_only=False includes skipped (deduped) and failed entries
         pulls = db.get_recent_pulls(limit=limit, account=account, folder=folder, with_path_only=False)
@@ -255,7 +750,7 @@ def api_recent(limit: int = 20, account: str | None = None, folder: str | None =
                     "uid": p.uid,
                     "folder": p.folder,
                     "path": p.local_path,
-                    "pulled_at": p.pulled_at.isoformat(),
+                    "pulled_at": p.pulled_at,
                     "status": p.status,  # 'new', 'skipped', or 'failed'
                     "subject": p.subject,
                     "msg_date": p.msg_date,
@@ -266,18 +761,16 @@ def api_recent(limit: int = 20, account: str | None = None, folder: str | None =
 
 
 @app.get("/api/email/{path:path}")
-def api_email(path: str):
+@threaded
+def api_email(path: str, request: Request, response: Response):
     """Get email content as JSON."""
-    from email import policy
-
     root = get_root()
     file_path = root / path
 
     # Security: ensure path is within root
     try:
         file_path = file_path.resolve()
-        root_resolved = root.resolve()
-        if not str(file_path).startswith(str(root_resolved)):
+        if not file_path.is_relative_to(resolved_root(root)):
             return JSONResponse({"error": "Access denied"}, status_code=403)
     except Exception:
         return JSONResponse({"error": "Invalid path"}, status_code=400)
@@ -285,68 +778,18 @@ def api_email(path: str):
     if not file_path.exists() or not file_path.suffix == ".eml":
         return JSONResponse({"error": "Email not found"}, status_code=404)
 
-    # Parse email
-    with open(file_path, "rb") as f:
-        msg = email.message_from_binary_file(f, policy=policy.default)
-
-    # Extract headers
-    headers = {
-        "from": msg.get("From", ""),
-        "to": msg.get("To", ""),
-        "cc": msg.get("Cc", ""),
-        "date": msg.get("Date", ""),
-        "subject": msg.get("Subject", "(no subject)"),
-        "message_id": msg.get("Message-ID", ""),
-        "in_reply_to": msg.get("In-Reply-To", ""),
-        "references": msg.get("References", ""),
-    }
+    headers = cache_headers(file_path)
+    if cached := not_modified(request, headers):
+        return cached
+    response.headers.update(headers)
 
-    # Get body (prefer HTML, fall back to plain)
-    body_html = ""
-    body_plain = ""
-    if msg.is_multipart():
-        for part in msg.walk():
-            ct = part.get_content_type()
-            if ct == "text/html" and not body_html:
-                try:
-                    body_html = part.get_content()
-                except Exception:
-                    pass
-            elif ct == "text/plain" and not body_plain:
-                try:
-                    body_plain = part.get_content()
-                except Exception:
-                    pass
-    else:
-        ct = msg.get_content_type()
-        try:
-            content = msg.get_content()
-            if ct == "text/html":
-                body_html = content
-            else:
-                body_plain = content
-        except Exception:
-            body_plain = "(could not decode body)"
+    parsed = load_email(file_path)
+    body_html = parsed.body_html
 
-    # Get attachments and build cid map for inline images
-    attachments = []
-    cid_map: dict[str, str] = {}  # cid -> filename
-    if msg.is_multipart():
-        for part in msg.walk():
-            filename = part.get_filename()
-            if filename:
-                payload = part.get_payload(decode=True)
-                attachments.append({
-                    "filename": filename,
-                    "content_type": part.get_content_type(),
-                    "size": len(payload) if payload else 0,
-                })
-                # Extract Content-ID for cid: URL mapping
-                content_id = part.get("Content-ID", "")
-                if content_id:
-                    # Content-ID is usually <xxx>, strip angle brackets
-                    cid = content_id.strip("<>")
-                    cid_map[cid] = filename
+    # Build cid map for inline images
+    cid_map: dict[str, str] = {  # cid -> filename
+        a.content_id: a.filename for a in parsed.attachments if a.content_id
+    }
 
     # Rewrite cid: URLs in HTML to use our attachment API
     if body_html and cid_map:
@@ -357,7 +800,7 @@ def api_email(path: str):
                 return f"/api/attachment/{path}/{quote(filename)}"
             return match.group(0)  # Return unchanged if not found
 
-        body_html = re.sub(r'cid:([^"\'>\s]+)', replace_cid, body_html)
+        body_html = CID_RE.sub(replace_cid, body_html)
 
         # Wrap images with our attachment URLs in clickable links
         def wrap_img_in_link(match: re.Match) -> str:
@@ -368,48 +811,70 @@ def api_email(path: str):
                 return f'<a href="{src}" target="_blank" rel="noopener noreferrer">{img_tag}</a>'
             return img_tag
 
-        body_html = re.sub(r'<img[^>]+src="(/api/attachment/[^"]+)"[^>]*>', wrap_img_in_link, body_html)
+        body_html = ATTACHMENT_IMG_RE.sub(wrap_img_in_link, body_html)
 
     return {
         "path": path,
-        "headers": headers,
+        "headers": parsed.headers,
         "body_html": body_html,
-        "body_plain": body_plain,
-        "attachments": attachments,
+        "body_plain": parsed.body_plain,
+        "attachments": [
+            {"filename": a.filename, "content_type": a.content_type, "size": a.size}
+            for a in parsed.attachments
+        ],
     }
 
 
 @app.get("/api/attachment/{path:path}/{filename}")
-def api_attachment(path: str, filename: str):
+@threaded
+def api_attachment(path: str, filename: str, request: Request):
     """Get an attachment from an email."""
     root = get_root()
     eml_path = root / path
+
+    # Security: ensure path is within root
+    try:
+        eml_path = eml_path.resolve()
+        if not eml_path.is_relative_to(resolved_root(root)):
+            return JSONResponse({"error": "Access denied"}, status_code=403)
+    except Exception:
+        return JSONResponse({"error": "Invalid path"}, status_code=400)
+
     if not eml_path.exists():
         return JSONResponse({"error": f"Email not found: {path}"}, status_code=404)
 
-    with open(eml_path, "rb") as f:
-        msg = email.message_from_binary_file(f)
-
-    # Find the attachment
-    if msg.is_multipart():
-        for part in msg.walk():
-            part_filename = part.get_filename()
-            if part_filename == filename:
-                payload = part.get_payload(decode=True)
-                content_type = part.get_content_type()
-                if payload:
-                    return Response(
-                        content=payload,
-                        media_type=content_type,
-                        headers={
-                            "Content-Disposition": f'inline; filename="{filename}"',
-                        },
-                    )
+    headers = cache_headers(eml_path)
+    if cached := not_modified(request, headers):
+        return cached
+    headers["Content-Disposition"] = f'inline; filename="{filename}"'
+    for a in load_email(eml_path).attachments:
+        if a.filename == filename and a.size:
+            if a.payload is None:
+                cache_path = attachment_cache_path(root, eml_path, filename)
+                st = _stat_or_none(cache_path)
+                if st is not None:
+                    if st.st_size == a.size:
+                        os.utime(cache_path)  # Mark recently used
+                        return FileResponse(cache_path, media_type=a.content_type, headers=headers)
+                    cache_path.unlink(missing_ok=True)  # Incomplete; decode it again
+                part = find_attachment(eml_path, filename)
+                if part is None:
+                    break
+                # Sized from the part being streamed (the fast parser's size may differ)
+                size = decoded_size(part)
+                headers["Content-Length"] = str(size)
+                return StreamingResponse(
+                    cache_stream(stream_attachment(part), cache_path, size),
+                    media_type=a.content_type,
+                    headers=headers,
+                )
+            return Response(content=a.payload, media_type=a.content_type, headers=headers)
 
     return JSONResponse({"error": f"Attachment not found: {filename}"}, status_code=404)
 
 
 @app.get("/api/sync-runs")
+@threaded
 def api_sync_runs(
     limit: int = 20,
     offset: int = 0,
@@ -419,7 +884,7 @@ def api_sync_runs(
 ):
     """Get recent sync runs (pull/push operations) with pagination."""
     root = get_root()
-    with get_pulls_db(root) as db:
+    with pulls_db(root) as db:
         runs = db.get_recent_sync_runs(
             limit=limit,
             offset=offset,
@@ -435,8 +900,8 @@ def api_sync_runs(
                     "operation": r.operation,
                     "account": r.account,
                     "folder": r.folder,
-                    "started_at": r.started_at.isoformat(),
-                    "ended_at": r.ended_at.isoformat() if r.ended_at else None,
+                    "started_at": r.started_at,
+                    "ended_at": r.ended_at,
                     "status": r.status,
                     "total": r.total,
                     "fetched": r.fetched,
@@ -453,10 +918,11 @@ def api_sync_runs(
 
 
 @app.get("/api/sync-runs/{run_id}")
+@threaded
 def api_sync_run_detail(run_id: int, message_status: str | None = None, limit: int = 100):
     """Get details of a specific sync run, including messages processed."""
     root = get_root()
-    with get_pulls_db(root) as db:
+    with pulls_db(root) as db:
         run = db.get_sync_run(run_id)
         if not run:
             return JSONResponse({"error": f"Sync run {run_id} not found"}, status_code=404)
@@ -469,8 +935,8 @@ def api_sync_run_detail(run_id: int, message_status: str | None = None, limit: i
                 "operation": run.operation,
                 "account": run.account,
                 "folder": run.folder,
-                "started_at": run.started_at.isoformat(),
-                "ended_at": run.ended_at.isoformat() if run.ended_at else None,
+                "started_at": run.started_at,
+                "ended_at": run.ended_at,
                 "status": run.status,
                 "total": run.total,
                 "fetched": run.fetched,
@@ -484,7 +950,7 @@ def api_sync_run_detail(run_id: int, message_status: str | None = None, limit: i
                     "folder": m.folder,
                     "message_id": m.message_id,
                     "local_path": m.local_path,
-                    "pulled_at": m.pulled_at.isoformat(),
+                    "pulled_at": m.pulled_at,
                     "status": m.status,
                     "content_hash": m.content_hash[:16] + "..." if m.content_hash else None,
                     "error_message": m.error_message,
@@ -495,19 +961,15 @@ def api_sync_run_detail(run_id: int, message_status: str | None = None, limit: i
 
 
 @app.get("/api/folder/{account}/{folder}")
+@threaded
 def api_folder_detail(account: str, folder: str, recent_limit: int = 50, runs_limit: int = 10):
     """Get folder detail: recent messages and sync runs for a specific folder."""
     root = get_root()
-    with get_pulls_db(root) as db:
+    with pulls_db(root) as db:
         # Get status
         uidvalidity = db.get_uidvalidity(account, folder)
         if not uidvalidity:
-            cur = db.conn.execute(
-                "SELECT uidvalidity FROM server_folders WHERE account = ? AND folder = ?",
-                (account, folder)
-            )
-            row = cur.fetchone()
-            uidvalidity = row["uidvalidity"] if row else None
+            uidvalidity = db.get_server_folder_uidvalidity(account, folder)
 
         server_count = db.get_server_uid_count(account, folder) if uidvalidity else 0
         pulled_count = db.get_pulled_count(account, folder, uidvalidity) if uidvalidity else 0
@@ -533,7 +995,7 @@ def api_folder_detail(account: str, folder: str, recent_limit: int = 50, runs_li
                     "uid": p.uid,
                     "folder": p.folder,
                     "path": p.local_path,
-                    "pulled_at": p.pulled_at.isoformat(),
+                    "pulled_at": p.pulled_at,
                     "is_new": p.status != "skipped",
                     "subject": p.subject,
                     "msg_date": p.msg_date,
@@ -544,8 +1006,8 @@ def api_folder_detail(account: str, folder: str, recent_limit: int = 50, runs_li
                 {
                     "id": r.id,
                     "operation": r.operation,
-                    "started_at": r.started_at.isoformat(),
-                    "ended_at": r.ended_at.isoformat() if r.ended_at else None,
+                    "started_at": r.started_at,
+                    "ended_at": r.ended_at,
                     "status": r.status,
                     "total": r.total,
                     "fetched": r.fetched,
@@ -558,6 +1020,7 @@ def api_folder_detail(account: str, folder: str, recent_limit: int = 50, runs_li
 
 
 @app.get("/api/search")
+@threaded
 def api_search(
     q: str,
     limit: int = 50,
@@ -577,7 +1040,7 @@ def api_search(
     Returns paginated results with total count for pagination UI.
     """
     root = get_root()
-    with get_index_db(root) as db:
+    with index_db(root) as db:
         try:
             total = db.search_count(query=q, folder=folder)
             results = db.search(query=q, limit=limit, offset=offset, folder=folder)
@@ -596,7 +1059,7 @@ def api_search(
                     "message_id": m.message_id,
                     "subject": m.subject,
                     "local_path": m.path,
-                    "msg_date": m.date.isoformat() if m.date else None,
+                    "msg_date": m.date,
                     "from_addr": m.from_addr,
                     "to_addr": m.to_addr,
                     "thread_id": m.thread_id,
@@ -608,6 +1071,7 @@ def api_search(
 
 
 @app.get("/api/thread/{message_id:path}")
+@threaded
 def api_thread(message_id: str, limit: int = 100):
     """Get all messages in a thread by Message-ID.
 
@@ -615,7 +1079,7 @@ def api_thread(message_id: str, limit: int = 100):
     in that thread using index.db.
     """
     root = get_root()
-    with get_index_db(root) as db:
+    with index_db(root) as db:
         # First, find the message by message_id to get its thread_id
         file = db.get_by_message_id(message_id)
         if not file:
@@ -642,7 +1106,7 @@ def api_thread(message_id: str, limit: int = 100):
                     "thread_id": m.thread_id,
                     "thread_slug": m.thread_slug,
                     "local_path": m.path,
-                    "msg_date": m.date.isoformat() if m.date else None,
+                    "msg_date": m.date,
                     "in_reply_to": m.in_reply_to,
                     "references": m.references,
                     "from_addr": m.from_addr,
@@ -654,13 +1118,14 @@ def api_thread(message_id: str, limit: int = 100):
 
 
 @app.get("/api/thread-by-id/{thread_id:path}")
+@threaded
 def api_thread_by_id(thread_id: str, limit: int = 100):
     """Get all messages in a thread by thread_id directly using index.db.
 
     This is more efficient than /api/thread which looks up by message_id first.
     """
     root = get_root()
-    with get_index_db(root) as db:
+    with index_db(root) as db:
         messages = db.get_thread(thread_id=thread_id, limit=limit)
         thread_slug = messages[0].thread_slug if messages else None
         return {
@@ -675,7 +1140,7 @@ def api_thread_by_id(thread_id: str, limit: int = 100):
                     "thread_id": m.thread_id,
                     "thread_slug": m.thread_slug,
                     "local_path": m.path,
-                    "msg_date": m.date.isoformat() if m.date else None,
+                    "msg_date": m.date,
                     "in_reply_to": m.in_reply_to,
                     "references": m.references,
                     "from_addr": m.from_addr,
@@ -687,65 +1152,90 @@ def api_thread_by_id(thread_id: str, limit: int = 100):
 
 
 def count_attachments(root: Path, local_path: str | None) -> int:
-    """Count attachments in an .eml file."""
+    """Count attachments in an .eml file.
+
+    Scans the raw bytes for Content-Disposition headers naming a file rather
+    than parsing the MIME tree; index.db stores the parsed count, so this is
+    only the fallback for files indexed before that was tracked.
+    """
     if not local_path:
         return 0
-    eml_path = root / local_path
-    if not eml_path.exists():
-        return 0
     try:
-        with open(eml_path, "rb") as f:
-            msg = email.message_from_binary_file(f)
-        count = 0
-        if msg.is_multipart():
-            for part in msg.walk():
-                if part.get_filename():
-                    count += 1
-        return count
-    except Exception:
+        path = (root / local_path).resolve()
+        st = path.stat()
+        return _scan_attachment_count(str(path), st.st_mtime_ns, st.st_size)
+    except (OSError, ValueError):
         return 0
 
 
+def attachment_counts(root: Path, files: list[IndexedFile]) -> list[int]:
+    """Attachment counts for `files`, scanning unrecorded ones concurrently."""
+    counts = [f.attachment_count for f in files]
+    missing = [i for i, count in enumerate(counts) if count is None]
+    if len(missing) > 1:
+        with ThreadPoolExecutor(max_workers=min(8, len(missing))) as pool:
+            scanned = pool.map(lambda i: count_attachments(root, files[i].path), missing)
+            for i, count in zip(missing, scanned):
+                counts[i] = count
+    elif missing:
+        counts[missing[0]] = count_attachments(root, files[missing[0]].path)
+    return counts
+
+
+@lru_cache(maxsize=1024)
+def _scan_attachment_count(path: str, mtime_ns: int, size: int) -> int:
+    if not size:
+        return 0
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return sum(
+            1 for m in DISPOSITION_RE.finditer(mm)
+            if b"filename" in m.group().lower()
+        )
+
+
 @app.get("/api/thread-by-slug/{slug}")
+@threaded
 def api_thread_by_slug(slug: str, limit: int = 100):
     """Get all messages in a thread by thread_slug using index.db.
 
     This is the preferred endpoint for thread URLs.
     """
     root = get_root()
-    with get_index_db(root) as db:
+    with index_db(root) as db:
         messages = db.get_thread_by_slug(slug=slug, limit=limit)
         if not messages:
             return JSONResponse({"error": "Thread not found"}, status_code=404)
-        return {
-            "thread_slug": slug,
-            "thread_id": messages[0].thread_id,
-            "count": len(messages),
-            "messages": [
-                {
-                    "folder": extract_folder(m.path),
-                    "subject": m.subject,
-                    "message_id": m.message_id,
-                    "thread_id": m.thread_id,
-                    "thread_slug": m.thread_slug,
-                    "local_path": m.path,
-                    "msg_date": m.date.isoformat() if m.date else None,
-                    "in_reply_to": m.in_reply_to,
-                    "references": m.references,
-                    "from_addr": m.from_addr,
-                    "to_addr": m.to_addr,
-                    "attachment_count": count_attachments(root, m.path),
-                }
-                for m in messages
-            ],
-        }
+    counts = attachment_counts(root, messages)
+    return {
+        "thread_slug": slug,
+        "thread_id": messages[0].thread_id,
+        "count": len(messages),
+        "messages": [
+            {
+                "folder": extract_folder(m.path),
+                "subject": m.subject,
+                "message_id": m.message_id,
+                "thread_id": m.thread_id,
+                "thread_slug": m.thread_slug,
+                "local_path": m.path,
+                "msg_date": m.date,
+                "in_reply_to": m.in_reply_to,
+                "references": m.references,
+                "from_addr": m.from_addr,
+                "to_addr": m.to_addr,
+                "attachment_count": count,
+            }
+            for m, count in zip(messages, counts)
+        ],
+    }
 
 
 @app.get("/api/replies/{message_id:path}")
+@threaded
 def api_replies(message_id: str, limit: int = 100):
     """Get direct replies to a message using index.db."""
     root = get_root()
-    with get_index_db(root) as db:
+    with index_db(root) as db:
         messages = db.get_replies(message_id=message_id, limit=limit)
         return {
             "message_id": message_id,
@@ -755,7 +1245,7 @@ def api_replies(message_id: str, limit: int = 100):
                     "folder": extract_folder(m.path),
                     "message_id": m.message_id,
                     "local_path": m.path,
-                    "msg_date": m.date.isoformat() if m.date else None,
+                    "msg_date": m.date,
                     "in_reply_to": m.in_reply_to,
                     "from_addr": m.from_addr,
                     "to_addr": m.to_addr,
@@ -766,15 +1256,17 @@ def api_replies(message_id: str, limit: int = 100):
 
 
 @app.post("/api/fts/rebuild")
+@threaded
 def api_rebuild_fts():
     """Rebuild the full-text search index from index.db."""
     root = get_root()
-    with get_index_db(root) as db:
+    with index_db(root) as db:
         count = db.rebuild_fts()
         return {"status": "ok", "indexed": count}
 
 
 @app.post("/api/sync-runs/cleanup-stale")
+@threaded
 def api_cleanup_stale_runs(max_age_minutes: int = 60):
     """Mark stale running sync runs as aborted.
 
@@ -782,7 +1274,7 @@ def api_cleanup_stale_runs(max_age_minutes: int = 60):
         max_age_minutes: Consider runs stale if started more than this many minutes ago (default: 60)
     """
     root = get_root()
-    with get_pulls_db(root) as db:
+    with pulls_db(root) as db:
         count = db.cleanup_stale_runs(max_age_minutes)
         return {"status": "ok", "cleaned": count}
 
@@ -802,35 +1294,74 @@ def _find_folder_roots(account_path: Path) -> list[Path]:
     folder path is "Inbox/Subfolder" and it contains "2023/09/11/*.eml".
     """
     folder_roots = []
+    stack = [(account_path, 0)]
+    while stack:
+        path, depth = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                subdirs = [
+                    entry.name for entry in it
+                    if not entry.name.startswith(".") and entry.is_dir()
+                ]
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+
+        if any(_is_year_dir(name) for name in subdirs):
+            # This is a folder root
+            folder_roots.append(path)
+        elif depth < 10:  # Bounds symlink cycles
+            # Keep looking in subdirectories (reversed: pop in listing order)
+            stack.extend((path / name, depth + 1) for name in reversed(subdirs))
 
-    def walk(path: Path, depth: int = 0):
-        if depth > 10:  # Safety limit
-            return
+    return folder_roots
 
-        if not path.is_dir():
-            return
 
-        # Check if this directory contains year subdirectories
-        has_year_child = any(
-            _is_year_dir(child.name) and child.is_dir()
-            for child in path.iterdir()
-            if not child.name.startswith(".")
-        )
+def read_headers(path: str | Path, chunk_size: int = 16384):
+    """Parse just the header block of an .eml file.
 
-        if has_year_child:
-            # This is a folder root
-            folder_roots.append(path)
-        else:
-            # Keep looking in subdirectories
-            for child in path.iterdir():
-                if child.is_dir() and not child.name.startswith("."):
-                    walk(child, depth + 1)
+    Reads the first `chunk_size` bytes, which hold the headers of nearly
+    every message, so large bodies/attachments are never read or parsed;
+    reads the whole file only when the header block runs past that.
+    """
+    from email import policy
+    from email.parser import BytesHeaderParser
 
-    walk(account_path)
-    return folder_roots
+    with open(path, "rb") as f:
+        data = f.read(chunk_size)
+        if len(data) == chunk_size and b"\n\n" not in data and b"\r\n\r\n" not in data:
+            data += f.read()
+    return BytesHeaderParser(policy=policy.default).parsebytes(data)
+
+
+def _scandir_emls(folder_root: Path) -> Iterator[os.DirEntry]:
+    """Yield the .eml files under `folder_root` as `os.DirEntry`s.
+
+    Entries cache their `stat()`, so callers needing mtime and size pay one
+    syscall per file; no Path objects are built. Unreadable directories are
+    skipped.
+    """
+    stack = [str(folder_root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    # Suffix first: a plain string check, before any d_type lookup
+                    if entry.name.endswith(".eml") and entry.is_file(follow_symlinks=False):
+                        yield entry
+                    elif entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+        except PermissionError:
+            continue
+
+
+def _count_emls(folder_root: Path) -> int:
+    """Count .eml files under `folder_root`."""
+    return sum(1 for _ in _scandir_emls(folder_root))
 
 
 @app.get("/api/fs-folders")
+@threaded
+@ttl_cache(5)
 def api_fs_folders(account: str | None = None):
     """Get folders from filesystem layout (not pulls.db).
 
@@ -859,7 +1390,7 @@ def api_fs_folders(account: str | None = None):
 
         for folder_path in root_folder_roots:
             folder_name = str(folder_path.relative_to(root))
-            eml_count = len(list(folder_path.rglob("*.eml")))
+            eml_count = _count_emls(folder_path)
             if eml_count > 0:
                 folders.append({
                     "account": default_account,
@@ -879,7 +1410,7 @@ def api_fs_folders(account: str | None = None):
             # Find folder roots (directories with YYYY children)
             for folder_path in _find_folder_roots(path):
                 folder_name = str(folder_path.relative_to(path))
-                eml_count = len(list(folder_path.rglob("*.eml")))
+                eml_count = _count_emls(folder_path)
                 if eml_count > 0:
                     folders.append({
                         "account": acct,
@@ -895,6 +1426,7 @@ def api_fs_folders(account: str | None = None):
 
 
 @app.get("/api/fs-emails/{account}/{folder:path}")
+@threaded
 def api_fs_emails(
     account: str,
     folder: str,
@@ -911,8 +1443,6 @@ def api_fs_emails(
         offset: Offset for pagination
         sort: Sort order ("date_desc", "date_asc", "name")
     """
-    from email import policy
-
     root = get_root()
     # For single-account repos, account="_" means folder is directly under root
     if account == "_":
@@ -923,7 +1453,7 @@ def api_fs_emails(
     # Security check
     try:
         folder_path = folder_path.resolve()
-        if not str(folder_path).startswith(str(root.resolve())):
+        if not folder_path.is_relative_to(resolved_root(root)):
             return JSONResponse({"error": "Access denied"}, status_code=403)
     except Exception:
         return JSONResponse({"error": "Invalid path"}, status_code=400)
@@ -932,45 +1462,65 @@ def api_fs_emails(
         return JSONResponse({"error": "Folder not found"}, status_code=404)
 
     # Find all .eml files recursively
-    eml_files = list(folder_path.rglob("*.eml"))
+    eml_files = list(_scandir_emls(folder_path))
 
-    # Sort files
+    total = len(eml_files)
+
+    # Select the requested page; date orders only partially sort, keeping
+    # the first `offset + limit` files (same result as sorting, then slicing)
+    end = max(offset + limit, 0)
     if sort == "date_desc":
-        eml_files.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+        eml_files = heapq.nlargest(end, eml_files, key=lambda e: e.stat().st_mtime)
     elif sort == "date_asc":
-        eml_files.sort(key=lambda p: p.stat().st_mtime)
+        eml_files = heapq.nsmallest(end, eml_files, key=lambda e: e.stat().st_mtime)
     else:  # name
-        eml_files.sort(key=lambda p: p.name)
+        eml_files.sort(key=lambda e: e.name)
+    eml_files = eml_files[offset:end]
 
-    total = len(eml_files)
-    eml_files = eml_files[offset : offset + limit]
-
-    # Parse headers from each email
+    # Parse headers from each email, reusing index.db's cache of unchanged files
     emails = []
-    for path in eml_files:
-        rel_path = str(path.relative_to(root))
-        try:
-            with open(path, "rb") as f:
-                # Only parse headers for speed
-                msg = email.message_from_binary_file(f, policy=policy.default)
+    # Entry paths all extend the resolved folder path, so the root-relative
+    # path is a plain slice (no per-file relpath normalization)
+    root_len = len(os.path.join(resolved_root(root), ""))
+    rel_paths = [entry.path[root_len:] for entry in eml_files]
+    with index_db(root) as db:
+        cached = db.get_cached_headers(rel_paths)
+        parsed = []
+        for entry, rel_path in zip(eml_files, rel_paths):
+            st = entry.stat()
+            row = cached.get(rel_path)
+            if row and row["mtime_ns"] == st.st_mtime_ns and row["size"] == st.st_size:
+                subject, from_addr, to_addr, date = (
+                    row["subject"], row["from_addr"], row["to_addr"], row["date"]
+                )
+            else:
+                try:
+                    msg = read_headers(entry.path)
+                except Exception as e:
+                    emails.append({
+                        "path": rel_path,
+                        "subject": f"(error: {e})",
+                        "from": "",
+                        "to": "",
+                        "date": "",
+                        "size": st.st_size,
+                    })
+                    continue
+                subject, from_addr, to_addr, date = (
+                    str(msg.get(name, default))
+                    for name, default in (("Subject", "(no subject)"), ("From", ""), ("To", ""), ("Date", ""))
+                )
+                parsed.append((rel_path, st.st_mtime_ns, st.st_size, subject, from_addr, to_addr, date))
 
             emails.append({
                 "path": rel_path,
-                "subject": msg.get("Subject", "(no subject)"),
-                "from": msg.get("From", ""),
-                "to": msg.get("To", ""),
-                "date": msg.get("Date", ""),
-                "size": path.stat().st_size,
-            })
-        except Exception as e:
-            emails.append({
-                "path": rel_path,
-                "subject": f"(error: {e})",
-                "from": "",
-                "to": "",
-                "date": "",
-                "size": path.stat().st_size,
+                "subject": subject,
+                "from": from_addr,
+                "to": to_addr,
+                "date": date,
+                "size": st.st_size,
             })
+        db.cache_headers(parsed)
 
     return {
         "account": account,
@@ -983,11 +1533,14 @@ def api_fs_emails(
 
 
 @app.get("/api/fs-threads/{account}/{folder:path}")
+@threaded
 def api_fs_threads(
     account: str,
     folder: str,
     limit: int = 50,
     offset: int = 0,
+    after_date: str | None = None,
+    after_tid: str | None = None,
 ):
     """List threads (conversations) in a folder from index.db.
 
@@ -999,70 +1552,51 @@ def api_fs_threads(
         folder: Folder path (e.g., "Inbox")
         limit: Max threads to return
         offset: Offset for pagination
+        after_date: Keyset pagination: return threads after this one (pass the
+            previous page's `next` cursor; `offset` is then ignored)
+        after_tid: Thread key accompanying `after_date`
     """
     root = get_root()
-    index_db = root / ".eml" / "index.db"
+    index_db_path = root / ".eml" / "index.db"
 
-    if not index_db.exists():
+    if not index_db_path.exists():
         return JSONResponse(
             {"error": "index.db not found. Run 'eml rebuild-index' first."},
             status_code=404
         )
 
-    # Build folder path pattern for SQL LIKE
-    if account == "_":
-        folder_pattern = f"{folder}/%"
-    else:
-        folder_pattern = f"{account}/{folder}/%"
+    # Paths under the folder, as a range over files.path's unique index
+    # (unlike LIKE, no case folding or wildcard characters in folder names)
+    prefix = f"{folder}/" if account == "_" else f"{account}/{folder}/"
+    path_range = (prefix, prefix[:-1] + chr(ord("/") + 1))
 
-    conn = sqlite3.connect(index_db)
-    conn.row_factory = sqlite3.Row
-
-    # Get total thread count
-    count_sql = """
-        SELECT COUNT(DISTINCT COALESCE(thread_id, path)) as cnt
-        FROM files
-        WHERE path LIKE ?
-    """
-    total = conn.execute(count_sql, (folder_pattern,)).fetchone()["cnt"]
-
-    # Get threads: latest message per thread_id, ordered by max date
-    # For messages without thread_id, treat each as its own thread
+    # One pass over the folder's files: with MAX(date), SQLite takes the bare
+    # columns from the row holding the max, i.e. each thread's latest message.
+    # Messages without thread_id are their own thread.
     threads_sql = """
-        WITH thread_stats AS (
+        SELECT * FROM (
             SELECT
+                path, subject, from_addr, to_addr, date, size, thread_id, thread_slug,
                 COALESCE(thread_id, path) as tid,
+                COALESCE(MAX(date), '') as latest_date,
                 COUNT(*) as msg_count,
-                MAX(date) as latest_date,
                 GROUP_CONCAT(DISTINCT from_addr) as participants
             FROM files
-            WHERE path LIKE ?
+            WHERE path >= ? AND path < ?
             GROUP BY COALESCE(thread_id, path)
-        ),
-        latest_messages AS (
-            SELECT
-                f.*,
-                ts.msg_count,
-                ts.participants,
-                ROW_NUMBER() OVER (
-                    PARTITION BY COALESCE(f.thread_id, f.path)
-                    ORDER BY f.date DESC
-                ) as rn
-            FROM files f
-            JOIN thread_stats ts ON COALESCE(f.thread_id, f.path) = ts.tid
-            WHERE f.path LIKE ?
         )
-        SELECT
-            path, subject, from_addr, to_addr, date, size,
-            thread_id, thread_slug, msg_count, participants
-        FROM latest_messages
-        WHERE rn = 1
-        ORDER BY date DESC
-        LIMIT ? OFFSET ?
     """
-
-    rows = conn.execute(threads_sql, (folder_pattern, folder_pattern, limit, offset)).fetchall()
-    conn.close()
+    params: list = [*path_range]
+    if after_date is not None and after_tid is not None:
+        threads_sql += " WHERE (latest_date, tid) < (?, ?)"
+        params += [after_date, after_tid]
+        offset = 0
+    threads_sql += " ORDER BY latest_date DESC, tid DESC LIMIT ? OFFSET ?"
+    params += [limit, offset]
+
+    with index_db(root) as db:
+        total = _thread_count(db, root, path_range)
+        rows = db.conn.execute(threads_sql, params).fetchall()
 
     threads = []
     for row in rows:
@@ -1086,10 +1620,44 @@ def api_fs_threads(
         "offset": offset,
         "limit": limit,
         "threads": threads,
+        # Cursor for the following page (None on the last page)
+        "next": (
+            {"after_date": rows[-1]["latest_date"], "after_tid": rows[-1]["tid"]}
+            if len(rows) == limit else None
+        ),
     }
 
 
+# (root, path range) -> (files signature, thread count), see _thread_count
+_thread_counts: dict[tuple[Path, tuple[str, str]], tuple[tuple, int]] = {}
+
+
+def _thread_count(db: FileIndex, root: Path, path_range: tuple[str, str]) -> int:
+    """Count threads among files in `path_range`, reusing the last count.
+
+    The count (a DISTINCT over thread_id, read from each row) is recomputed
+    only when index.db's files version changes (any insert, delete, or
+    path/thread_id update), or the range's max rowid or file count does
+    (which a path-index scan checks without touching the table; this guards
+    against a rebuilt index.db reaching the same version).
+    """
+    signature = (db.files_version(), *db.conn.execute(
+        "SELECT MAX(rowid), COUNT(*) FROM files WHERE path >= ? AND path < ?", path_range,
+    ).fetchone())
+    key = (root, path_range)
+    cached = _thread_counts.get(key)
+    if cached and cached[0] == signature:
+        return cached[1]
+    count = db.conn.execute(
+        "SELECT COUNT(DISTINCT COALESCE(thread_id, path)) FROM files WHERE path >= ? AND path < ?",
+        path_range,
+    ).fetchone()[0]
+    _thread_counts[key] = (signature, count)
+    return count
+
+
 @app.get("/api/sync-status")
+@threaded
 def api_sync_status():
     """Get current sync operation status from SQLite."""
     root = get_root()
@@ -1098,11 +1666,8 @@ def api_sync_status():
         return {"running": False}
 
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        cur = conn.execute("SELECT * FROM sync_status WHERE id = 1")
-        row = cur.fetchone()
-        conn.close()
+        conn = _thread_readonly_conn(db_path)
+        row = conn.execute("SELECT * FROM sync_status WHERE id = 1").fetchone()
 
         if not row:
             return {"running": False}
@@ -1135,74 +1700,160 @@ def api_sync_status():
         return {"running": False, "error": str(e)}
 
 
-@app.get("/api/stream")
-async def api_stream(request: Request):
-    """Server-Sent Events stream for real-time updates."""
-    from sse_starlette.sse import EventSourceResponse
+class StreamBroadcaster:
+    """Polls for changes once for all /api/stream clients and fans events out.
 
-    async def event_generator():
-        last_pulled_at = None
-        last_sync_hash = None
+    The poll runs only while someone is subscribed; each subscriber gets
+    the latest event of each kind on joining, then changes as they happen.
+    Each tick first stats the watched database files, and only queries them
+    when one changed (or every `full_interval` seconds, which also catches a
+    sync process dying without updating its status).
+    """
 
-        while True:
-            if await request.is_disconnected():
-                break
+    # Files whose mtime/size change when pulls or sync progress are written
+    WATCHED = ("pulls.db", "pulls.db-wal", "sync-status.db")
+    # (max(pulled_at), count) of an empty pulled_messages; sends no events
+    NO_PULLS = (None, 0)
+    # Constant "event:" line and "data:" field prefix of each event's frame
+    FRAME_PREFIXES = {
+        event: f"event: {event}\r\ndata: ".encode()
+        for event in ("status", "recent", "sync")
+    }
 
-            root = get_root()
-            events = []
+    def __init__(self, interval: float = 1.0, full_interval: float = 10.0):
+        self.interval = interval
+        self.full_interval = full_interval
+        self._subscribers: set[asyncio.Queue] = set()
+        self._latest: dict[str, bytes] = {}
+        self._task: asyncio.Task | None = None
+        self._last_pull_hash = self.NO_PULLS
+        self._last_sync_hash = None
+        self._last_files = None
+        self._next_full_poll = 0.0
+
+    def _files_changed(self, root: Path) -> bool:
+        files = tuple(
+            (st.st_mtime_ns, st.st_size) if (st := _stat_or_none(root / EML_DIR / name)) else None
+            for name in self.WATCHED
+        )
+        now = time.monotonic()
+        if files == self._last_files and now < self._next_full_poll:
+            return False
+        self._last_files = files
+        self._next_full_poll = now + self.full_interval
+        return True
+
+    def _frame(self, event: str, data) -> tuple[str, bytes]:
+        """Encode an SSE frame once, rather than per subscriber."""
+        return event, b"".join((self.FRAME_PREFIXES[event], dumpb(data), b"\r\n\r\n"))
+
+    def _poll(self) -> list[tuple[str, bytes]]:
+        root = get_root()
+        if not self._files_changed(root):
+            return []
+        events = []
+
+        # Check for pull changes by (max(pulled_at), count): the count also
+        # catches deletions, and rewrites that leave the latest time alone.
+        # Separate subqueries keep MAX() a single seek on idx_pulled_at.
+        try:
+            with pulls_db(root) as db:
+                cur = db.conn.execute("""
+                    SELECT
+                        (SELECT MAX(pulled_at) FROM pulled_messages),
+                        (SELECT COUNT(*) FROM pulled_messages)
+                """)
+                cur.row_factory = None
+                pull_hash = cur.fetchone()
+
+                if pull_hash != self._last_pull_hash:
+                    self._last_pull_hash = pull_hash
+                    # Get latest stats
+                    events.append(self._frame("status", api_status.__wrapped__()))
+                    events.append(self._frame("recent", api_recent.__wrapped__()))
+        except Exception:
+            pass
 
-            # Check for new pulls by comparing max(pulled_at)
-            try:
-                with get_pulls_db(root) as db:
-                    cur = db.conn.execute("SELECT MAX(pulled_at) as max_at FROM pulled_messages")
-                    row = cur.fetchone()
-                    current_max = row["max_at"] if row else None
-
-                    if current_max and current_max != last_pulled_at:
-                        last_pulled_at = current_max
-                        # Get latest stats
-                        events.append({
-                            "event": "status",
-                            "data": json.dumps(api_status())
-                        })
-                        events.append({
-                            "event": "recent",
-                            "data": json.dumps(api_recent())
-                        })
-            except Exception:
-                pass
+        # Check for sync status changes
+        try:
+            sync = api_sync_status.__wrapped__()
+            sync_hash = (sync.get("completed", 0), sync.get("skipped", 0), sync.get("running", False))
+            if sync_hash != self._last_sync_hash:
+                self._last_sync_hash = sync_hash
+                events.append(self._frame("sync", sync))
+        except Exception:
+            pass
+        return events
 
-            # Check for sync status changes
+    async def _run(self) -> None:
+        while self._subscribers:
             try:
-                sync = api_sync_status()
-                sync_hash = f"{sync.get('completed', 0)}:{sync.get('skipped', 0)}:{sync.get('running', False)}"
-                if sync_hash != last_sync_hash:
-                    last_sync_hash = sync_hash
-                    events.append({
-                        "event": "sync",
-                        "data": json.dumps(sync)
-                    })
+                events = await to_thread.run_sync(self._poll, limiter=STREAM_LIMITER)
             except Exception:
-                pass
+                # Keep polling; ending the task would silently stall every client
+                log.exception("Polling for /api/stream events failed")
+                events = []
+            for event, frame in events:
+                self._latest[event] = frame
+                for queue in self._subscribers:
+                    queue.put_nowait(frame)
+            await asyncio.sleep(self.interval)
+        self._task = None
+
+    async def subscribe(self) -> AsyncIterator[bytes]:
+        """Yield encoded event frames until the consumer stops iterating."""
+        if self._task is None or self._task.done():
+            # Nothing was watching (or the poll task died); start from a clean slate
+            self._latest.clear()
+            self._last_pull_hash = self.NO_PULLS
+            self._last_sync_hash = self._last_files = None
+            self._task = asyncio.create_task(self._run())
+        queue: asyncio.Queue = asyncio.Queue()
+        for frame in self._latest.values():
+            queue.put_nowait(frame)
+        self._subscribers.add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers.discard(queue)
+
+
+stream_broadcaster = StreamBroadcaster()
 
-            for event in events:
-                yield event
 
-            await asyncio.sleep(1)  # Poll every second
+@app.get("/api/stream")
+async def api_stream():
+    """Server-Sent Events stream for real-time updates."""
+    from sse_starlette.sse import EventSourceResponse
 
-    return EventSourceResponse(event_generator())
+    return EventSourceResponse(stream_broadcaster.subscribe())
 
 
 @app.get("/", response_class=HTMLResponse)
-def dashboard():
+@threaded
+def dashboard(request: Request):
     """Serve the React build."""
     ui_dist = Path(__file__).parent.parent.parent / "ui" / "dist" / "index.html"
-    if not ui_dist.exists():
+    st = _stat_or_none(ui_dist)
+    if st is None:
         return HTMLResponse(
             "<h1>UI not built</h1><p>Run <code>cd ui && pnpm build</code> to build the React frontend.</p>",
             status_code=503,
         )
-    return HTMLResponse(ui_dist.read_text())
+    content, etag = _read_index_html(str(ui_dist), st.st_mtime_ns, st.st_size)
+    # Revalidated on every visit, so a rebuilt UI is picked up immediately
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if cached := not_modified(request, headers):
+        return cached
+    return HTMLResponse(content, headers=headers)
+
+
+@lru_cache(maxsize=1)
+def _read_index_html(path: str, mtime_ns: int, size: int) -> tuple[bytes, str]:
+    """The built index.html and its ETag, re-read only when the file changes."""
+    content = Path(path).read_bytes()
+    return content, f'"{hashlib.blake2b(content, digest_size=8).hexdigest()}"'
 
 
 # Serve static assets from ui/dist if available
@@ -1,6 +1,7 @@
 """Tests for eml CLI commands."""
 
 import os
+import sqlite3
 from pathlib import Path
 
 import pytest
@@ -394,6 +395,25 @@ class TestIndex:
         result = runner.invoke(main, ["index", "-u"])
         assert result.exit_code == 0
 
+    def test_files_version(self, project):
+        """files_version changes on inserts, deletes and in-place re-threading."""
+        from eml.index import FileIndex
+
+        with FileIndex(project / ".eml") as index:
+            versions = [index.files_version()]
+            for path in ("INBOX/a.eml", "INBOX/b.eml"):
+                index.add_file(
+                    path, "h", None, None, "", "", "", "", None, None, None, None, None, 1, 0.0,
+                )
+            versions.append(index.files_version())
+            index.conn.execute("UPDATE files SET thread_id = 't' WHERE path = 'INBOX/a.eml'")
+            versions.append(index.files_version())
+            index.conn.execute("UPDATE files SET subject = 's'")
+            versions.append(index.files_version())
+            index.remove_file("INBOX/b.eml")
+            versions.append(index.files_version())
+        assert versions == [0, 2, 3, 3, 4]
+
     def test_index_requires_init(self, runner, tmp_path, monkeypatch):
         """Index should fail without .eml/ directory."""
         monkeypatch.chdir(tmp_path)
@@ -861,3 +881,62 @@ class TestAttachmentsIngestE2E:
                 msg = email.message_from_binary_file(f)
                 message_ids.add(msg['Message-ID'])
         assert message_ids == {'<photo-001@example.com>', '<photo-002@example.com>'}
+
+
+class TestCompact:
+    def test_compact_pulls_db(self, runner, project):
+        from eml.pulls import PullsDB
+
+        eml_dir = project / ".eml"
+        sqlite3.connect(eml_dir / "pulls.db").close()
+        with PullsDB(eml_dir) as db:
+            for uid in range(200):
+                db.record_pull("acct", "INBOX", 1, uid, f"h{uid}", subject="x" * 500, status="new")
+            db.clear_folder("acct", "INBOX")
+            db.record_pull("acct", "INBOX", 1, 1000, "kept", status="new")
+        result = runner.invoke(main, ["compact"])
+        assert result.exit_code == 0, result.output
+        assert "pulls.db" in result.output
+        with PullsDB(eml_dir) as db:
+            assert db.has_content_hash("kept")
+            assert db.conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+
+class TestStats:
+    """Tests for eml stats / ls over msgs.db."""
+
+    @pytest.fixture
+    def stored(self, project):
+        from datetime import datetime, timezone
+
+        from eml.storage import MessageStorage
+
+        raw = b"Subject: hi\r\n\r\n" + b"hello world " * 1000
+        with MessageStorage(project / ".eml" / "msgs.db") as storage:
+            storage.add_message("<a@x>", raw, date=datetime(2024, 3, 5, 12, tzinfo=timezone.utc), from_addr="a@x", subject="hi", tags=["work"])
+            storage.add_message("<b@x>", raw, date=datetime(2025, 1, 2, 12, tzinfo=timezone.utc), from_addr="b@x", subject="yo")
+        return raw
+
+    def test_stats_date_range(self, runner, stored):
+        result = runner.invoke(main, ["stats"])
+        assert result.exit_code == 0, result.output
+        assert "2024-03-05 → 2025-01-02" in result.output
+
+    def test_stats_uncompressed_sizes(self, runner, stored):
+        """Sizes are of the raw messages, not their compressed bodies."""
+        import humanize
+
+        result = runner.invoke(main, ["stats"])
+        assert result.exit_code == 0, result.output
+        assert f"Total size: {humanize.naturalsize(2 * len(stored))}" in result.output
+        assert f"Avg size: {humanize.naturalsize(len(stored))}" in result.output
+
+    def test_ls_dates(self, runner, stored):
+        result = runner.invoke(main, ["ls"])
+        assert result.exit_code == 0, result.output
+        assert "2025-01-02 | b@x" in result.output
+        assert "2024-03-05 | a@x" in result.output
+        result = runner.invoke(main, ["ls", "-t", "work"])
+        assert result.exit_code == 0, result.output
+        assert "2024-03-05 | a@x" in result.output
+        assert "b@x" not in result.output
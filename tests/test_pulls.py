@@ -0,0 +1,301 @@
+"""Tests for pulls.db tracking."""
+
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+from eml.pulls import PullsDB
+
+
+@pytest.fixture
+def pulls_db(tmp_path):
+    eml_dir = tmp_path / ".eml"
+    eml_dir.mkdir()
+    sqlite3.connect(eml_dir / "pulls.db").close()
+    with PullsDB(eml_dir, readers=2) as db:
+        yield db
+
+
+class TestConnections:
+    def test_reads_use_pool(self, pulls_db):
+        run_id = pulls_db.start_sync_run("pull", "acct", "INBOX", total=3)
+        pulls_db.update_sync_run(run_id, fetched=1)
+        assert pulls_db.conn.in_transaction
+        pulls_db.flush_sync_run()
+        assert not pulls_db.conn.in_transaction
+        with pulls_db._checkout_reader() as conn:
+            assert conn is not pulls_db.conn
+            with pytest.raises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM sync_runs")
+        assert pulls_db.get_sync_run(run_id).status == "running"
+
+    def test_reads_see_uncommitted_writes(self, pulls_db):
+        run_id = pulls_db.start_sync_run("pull", "acct", "INBOX")
+        pulls_db.update_sync_run(run_id, fetched=5)
+        assert pulls_db.conn.in_transaction
+        assert pulls_db.get_sync_run(run_id).fetched == 5
+
+    def test_missing_uids(self, pulls_db):
+        for uid in (2, 4):
+            pulls_db.record_pull("acct", "INBOX", 1, uid, f"h{uid}", status="new")
+        assert pulls_db.missing_uids("acct", "INBOX", 1, [1, 2, 3, 4]) == [1, 3]
+
+    def test_sync_run_lifecycle(self, pulls_db):
+        run_id = pulls_db.start_sync_run("pull", "acct", "INBOX", total=3)
+        pulls_db.update_sync_run(run_id, fetched=2, skipped=1)
+        pulls_db.end_sync_run(run_id, "completed")
+        run = pulls_db.get_sync_run(run_id)
+        assert (run.status, run.fetched, run.skipped) == ("completed", 2, 1)
+        assert [r.id for r in pulls_db.get_recent_sync_runs()] == [run_id]
+        assert pulls_db.count_sync_runs(operation="pull") == 1
+        assert isinstance(run.started_at, datetime) and isinstance(run.ended_at, datetime)
+
+    def test_cleanup_stale_runs(self, pulls_db):
+        old = pulls_db.start_sync_run("pull", "acct", "INBOX")
+        new = pulls_db.start_sync_run("pull", "acct", "Sent")
+        pulls_db.conn.execute("UPDATE sync_runs SET started_at = started_at - 7200 WHERE id = ?", (old,))
+        assert pulls_db.cleanup_stale_runs(max_age_minutes=60) == 1
+        assert pulls_db.get_sync_run(old).status == "aborted"
+        assert pulls_db.get_sync_run(new).status == "running"
+        plan = pulls_db.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM sync_runs WHERE status = 'running' AND started_at < 0"
+        ).fetchall()
+        assert "idx_sync_runs_running" in plan[0][3]
+
+    def test_migrates_iso_timestamps(self, tmp_path):
+        eml_dir = tmp_path / ".eml"
+        eml_dir.mkdir()
+        conn = sqlite3.connect(eml_dir / "pulls.db")
+        conn.executescript("""
+            CREATE TABLE sync_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                operation TEXT NOT NULL, account TEXT NOT NULL, folder TEXT NOT NULL,
+                started_at TEXT NOT NULL, ended_at TEXT,
+                status TEXT NOT NULL DEFAULT 'running',
+                total INTEGER DEFAULT 0, fetched INTEGER DEFAULT 0,
+                skipped INTEGER DEFAULT 0, failed INTEGER DEFAULT 0,
+                error_message TEXT
+            );
+            INSERT INTO sync_runs (id, operation, account, folder, started_at, ended_at, status)
+            VALUES (7, 'pull', 'acct', 'INBOX', '2024-01-02T03:04:05.678901', '2024-01-02T03:05:00', 'completed');
+        """)
+        conn.close()
+        with PullsDB(eml_dir) as db:
+            run = db.get_sync_run(7)
+            assert run.started_at == datetime(2024, 1, 2, 3, 4, 5)
+            assert run.ended_at == datetime(2024, 1, 2, 3, 5)
+            assert db.conn.execute("SELECT typeof(started_at) FROM sync_runs").fetchone()[0] == "integer"
+            assert db.start_sync_run("pull", "acct", "INBOX") == 8
+
+    def test_sync_run_messages_include_optional_columns(self, pulls_db):
+        run_id = pulls_db.start_sync_run("pull", "acct", "INBOX")
+        pulls_db.record_pull(
+            "acct", "INBOX", 1, 1, "h1", message_id="<a@x>", status="new",
+            sync_run_id=run_id, subject="Hi", from_addr="a@x",
+        )
+        [msg] = pulls_db.get_sync_run_messages(run_id)
+        assert (msg.subject, msg.from_addr) == ("Hi", "a@x")
+        assert isinstance(msg.pulled_at, datetime)
+
+    def test_sync_run_queries_use_indexes(self, pulls_db):
+        def plan(sql, params):
+            return " ".join(r[3] for r in pulls_db.conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+        messages = plan(
+            "SELECT * FROM pulled_messages WHERE sync_run_id = ? AND status = ? "
+            "ORDER BY pulled_at DESC LIMIT 10", (1, "new"),
+        )
+        assert "idx_pm_run_status" in messages and "TEMP B-TREE" not in messages
+        runs = plan(
+            "SELECT * FROM sync_runs WHERE account = ? AND operation = ? AND folder = ? "
+            "ORDER BY started_at DESC LIMIT 10", ("a", "pull", "INBOX"),
+        )
+        assert "idx_sync_runs_aof" in runs and "TEMP B-TREE" not in runs
+
+
+class TestWriterThread:
+    @pytest.fixture
+    def db(self, tmp_path):
+        eml_dir = tmp_path / ".eml"
+        eml_dir.mkdir()
+        sqlite3.connect(eml_dir / "pulls.db").close()
+        with PullsDB(eml_dir, readers=2, writer_thread=True) as db:
+            yield db
+
+    def test_writes_from_threads(self, db):
+        def run(i):
+            run_id = db.start_sync_run("pull", "acct", f"F{i}")
+            db.update_sync_run(run_id, fetched=i)
+            db.end_sync_run(run_id, "completed")
+            return run_id
+
+        with ThreadPoolExecutor(4) as pool:
+            run_ids = list(pool.map(run, range(8)))
+        assert db.count_sync_runs() == 8
+        assert [db.get_sync_run(r).fetched for r in run_ids] == list(range(8))
+        assert not db.conn.in_transaction
+
+    def test_pulls_mixed_with_sync_runs(self, db):
+        """Pull records and sync-run writes share the writer thread's connection."""
+        run_id = db.start_sync_run("pull", "acct", "INBOX")
+        for uid in range(1, 4):
+            db.record_pull(
+                "acct", "INBOX", 1, uid, f"h{uid}", message_id=f"<{uid}@x>",
+                subject=f"S{uid}", status="new", sync_run_id=run_id,
+                references="<1@x>" if uid > 1 else None,
+            )
+            db.update_sync_run(run_id, fetched=uid)
+            db.flush_sync_run()
+        with db.transaction():
+            db.record_server_uids("acct", "INBOX", 1, [(1, "<1@x>"), (2, None)])
+            db.record_server_folder("acct", "INBOX", 1, 2)
+        db.end_sync_run(run_id, "completed")
+        db.flush_pulls()
+
+        run = db.get_sync_run(run_id)
+        assert (run.status, run.fetched) == ("completed", 3)
+        assert db.get_pulled_uids("acct", "INBOX", 1) == {1, 2, 3}
+        assert {m.message_id for m in db.get_sync_run_messages(run_id)} == {"<1@x>", "<2@x>", "<3@x>"}
+        assert len({m.thread_slug for m in db.get_thread("<1@x>")}) == 1
+        assert db.get_server_uid_count("acct", "INBOX") == 2
+        assert db.search_count("S2") == 1
+        assert not db.conn.in_transaction
+
+    def test_deferred_update_error_is_raised(self, db):
+        """update_sync_run doesn't wait, but its failure surfaces at the next flush."""
+        run_id = db.start_sync_run("pull", "acct", "INBOX")
+        db.conn.execute("""
+            CREATE TRIGGER fail_update BEFORE UPDATE OF fetched ON sync_runs
+            BEGIN SELECT RAISE(ABORT, 'no updates'); END
+        """)
+        db.conn.commit()
+        db.update_sync_run(run_id, fetched=1)
+        with pytest.raises(sqlite3.IntegrityError, match="no updates"):
+            db.flush_sync_run()
+        db.flush_sync_run()  # Raised once
+
+    def test_failed_write_rolls_back_alone(self, db):
+        run_id = db.start_sync_run("pull", "acct", "INBOX")
+
+        def bad(conn):
+            conn.execute("DELETE FROM sync_runs")
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            db._run_write(bad)
+        assert db.get_sync_run(run_id) is not None
+
+    def test_batches_commit_under_sustained_load(self, tmp_path):
+        """Writes resolve once their batch is full, without waiting for the queue to drain."""
+        import threading
+
+        from eml.db import WriterThread
+
+        path = tmp_path / "w.db"
+        sqlite3.connect(path).execute("CREATE TABLE t (x)").connection.commit()
+        writer = WriterThread(lambda: sqlite3.connect(path, isolation_level=None), max_batch=5)
+        writer.start()
+        gate, held = threading.Event(), threading.Event()
+        futures = [writer.submit(lambda conn: gate.wait())]
+        futures += [writer.submit(lambda conn, i=i: conn.execute("INSERT INTO t VALUES (?)", (i,))) for i in range(9)]
+        futures.append(writer.submit(lambda conn: held.wait()))
+        gate.set()
+        # The first batch commits while the last write (in a later batch) is still running
+        futures[4].result(timeout=5)
+        assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM t").fetchone()[0] >= 4
+        assert not futures[-1].done()
+        held.set()
+        writer.close()
+        assert all(f.done() for f in futures)
+
+    def test_survives_locked_database(self, tmp_path):
+        """A write that can't take the lock fails alone; the thread keeps running."""
+        from eml.db import WriterThread
+
+        path = tmp_path / "w.db"
+        sqlite3.connect(path).execute("CREATE TABLE t (x)").connection.commit()
+        writer = WriterThread(lambda: sqlite3.connect(path, timeout=0.05, isolation_level=None))
+        writer.start()
+        other = sqlite3.connect(path, isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            writer.submit(lambda conn: conn.execute("INSERT INTO t VALUES (1)")).result(timeout=5)
+        other.rollback()
+        writer.submit(lambda conn: conn.execute("INSERT INTO t VALUES (2)")).result(timeout=5)
+        writer.flush()
+        assert writer.is_alive()
+        writer.close()
+        assert other.execute("SELECT x FROM t").fetchall() == [(2,)]
+
+
+class TestThreads:
+    def _pull(self, db, uid, message_id, in_reply_to=None, references=None, msg_date=None):
+        db.record_pull(
+            "acct", "INBOX", 1, uid, f"hash{uid}",
+            message_id=message_id,
+            msg_date=msg_date,
+            status="new",
+            in_reply_to=in_reply_to,
+            references=references,
+        )
+
+    def test_message_refs_populated(self, pulls_db):
+        self._pull(pulls_db, 1, "<c@x>", "<b@x>", "<a@x> <b@x>")
+        refs = pulls_db.conn.execute(
+            "SELECT ref_id FROM message_refs WHERE message_id = '<c@x>' ORDER BY ref_id"
+        ).fetchall()
+        assert [r[0] for r in refs] == ["<a@x>", "<b@x>"]
+
+    def test_get_thread_follows_refs(self, pulls_db):
+        self._pull(pulls_db, 1, "<a@x>", msg_date="2024-01-01")
+        self._pull(pulls_db, 2, "<b@x>", "<a@x>", "<a@x>", msg_date="2024-01-02")
+        # Thread root missing from References, so its thread_id differs
+        self._pull(pulls_db, 3, "<c@x>", None, "<other@x> <a@x>", msg_date="2024-01-03")
+        self._pull(pulls_db, 4, "<z@x>", msg_date="2024-01-04")
+        thread = pulls_db.get_thread("<a@x>")
+        assert [m.message_id for m in thread] == ["<a@x>", "<b@x>", "<c@x>"]
+        assert pulls_db.get_thread("<missing@x>") == []
+
+    def test_get_thread_is_transitive(self, pulls_db):
+        self._pull(pulls_db, 1, "<a@x>", msg_date="2024-01-01")
+        # Each reply only names its parent, so thread_ids all differ
+        self._pull(pulls_db, 2, "<b@x>", "<a@x>", msg_date="2024-01-02")
+        self._pull(pulls_db, 3, "<c@x>", "<b@x>", msg_date="2024-01-03")
+        self._pull(pulls_db, 4, "<d@x>", None, "<c@x>", msg_date="2024-01-04")
+        expected = ["<a@x>", "<b@x>", "<c@x>", "<d@x>"]
+        for mid in expected:
+            assert [m.message_id for m in pulls_db.get_thread(mid)] == expected
+
+
+class TestFts:
+    def test_rebuild_fts_since(self, pulls_db):
+        pulls_db.record_pull(
+            "acct", "INBOX", 1, 1, "h1", message_id="<a@x>", subject="Hello",
+            status="new", body_text="kept body",
+        )
+        pulls_db.conn.execute("""
+            INSERT INTO pulled_messages (account, folder, uidvalidity, uid, content_hash,
+                                         message_id, pulled_at, subject)
+            VALUES ('acct', 'INBOX', 1, 2, 'h2', '<b@x>', '2030-01-01T00:00:00', 'Unindexed')
+        """)
+        assert pulls_db.rebuild_fts_since(datetime(2000, 1, 1)) == 1
+        assert pulls_db.rebuild_fts_since(datetime(2000, 1, 1)) == 0
+        assert pulls_db.search_count("kept") == 1
+        assert pulls_db.search_count("Unindexed") == 1
+        pulls_db.optimize_fts()
+
+    def test_search_count(self, pulls_db):
+        for uid in (1, 2, 3):
+            pulls_db.record_pull(
+                "acct", "INBOX" if uid < 3 else "Sent", 1, uid, f"h{uid}",
+                message_id=f"<{uid}@x>", subject=f"budget {uid}", status="new",
+            )
+        assert pulls_db.search_count("budget") == 3
+        assert pulls_db.search_count("budget", folder="INBOX") == 2
+        assert pulls_db.search_count("budget", max_count=2) == -1
+        assert pulls_db.search_count("budget", max_count=3) == 3
+        pulls_db.record_pull(
+            "acct", "INBOX", 1, 4, "h4", message_id="<4@x>", subject="budget 4", status="new",
+        )
+        assert pulls_db.search_count("budget") == 4
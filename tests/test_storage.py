@@ -0,0 +1,465 @@
+"""Tests for SQLite message storage."""
+
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from eml.storage import (
+    AccountStorage,
+    MessageStorage,
+    _iter_messages_sql,
+    clear_eml_dir_cache,
+    find_eml_dir,
+)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    # One pooled reader, so `traced` sees every read
+    with MessageStorage(tmp_path / "msgs.db", readers=1) as s:
+        yield s
+
+
+@contextmanager
+def traced(storage):
+    """Collect SQL run on `storage`'s main connection and pooled reader."""
+    statements = []
+    with storage._readers.checkout() as reader:
+        pass
+    conns = [storage.conn, reader]
+    for conn in conns:
+        conn.set_trace_callback(statements.append)
+    try:
+        yield statements
+    finally:
+        for conn in conns:
+            conn.set_trace_callback(None)
+
+
+class TestConnection:
+    def test_pragmas(self, storage):
+        def pragma(name):
+            return storage.conn.execute(f"PRAGMA {name}").fetchone()[0]
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("temp_store") == 2  # MEMORY
+        assert pragma("cache_size") == -64000
+
+    def test_reads_use_pool(self, storage):
+        storage.add_message("<a@x>", b"raw", tags=["work"])
+        with storage._checkout_reader() as conn:
+            assert conn is not storage.conn
+            assert conn.execute("PRAGMA cache_size").fetchone()[0] == -64000
+            with pytest.raises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM messages")
+        assert storage.count() == 1
+
+    def test_reads_see_uncommitted_writes(self, storage):
+        storage.add_message("<a@x>", b"raw", tags=["work"], commit=False)
+        assert storage.conn.in_transaction
+        assert storage.count(tag="work") == 1
+        assert storage.get_message("<a@x>").tags == ("work",)
+
+    def test_open_readonly_in_thread(self, storage):
+        storage.add_message("<a@x>", b"raw")
+        conn = storage.open_readonly()
+        try:
+            with ThreadPoolExecutor(1) as pool:
+                count = pool.submit(lambda: conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0])
+                assert count.result() == 1
+        finally:
+            conn.close()
+
+
+class TestBatchedWrites:
+    def test_add_messages(self, storage):
+        storage.add_message("<old@x>", b"raw-old")
+        storage.add_messages([
+            ("<a@x>", datetime(2024, 1, 1), "a@x", "b@x", "", "First", b"raw-a", "INBOX", "1", ["work"]),
+            ("<b@x>", None, "b@x", "a@x", "", "Second", b"raw-b", "INBOX", "2", None),
+            ("<old@x>", None, "", "", "", "Dupe", b"raw-new", "INBOX", "3", ["work"]),
+        ])
+        assert storage.count() == 3
+        assert storage.get_message("<a@x>").raw == b"raw-a"
+        assert storage.get_message("<old@x>").raw == b"raw-old"
+        assert storage.count(tag="work") == 2
+        dates = {m.message_id: m.date for m in storage.iter_messages()}
+        assert dates == {"<a@x>": datetime(2024, 1, 1).astimezone(timezone.utc), "<b@x>": None, "<old@x>": None}
+        assert dates["<a@x>"].tzinfo is timezone.utc
+        in_range = storage.iter_messages(start_date=datetime(2023, 12, 31), end_date=datetime(2024, 1, 2))
+        assert [m.message_id for m in in_range] == ["<a@x>"]
+        assert storage.conn.execute("SELECT typeof(date) FROM messages WHERE message_id = '<a@x>'").fetchone()[0] == "integer"
+
+    def test_dates_read_back_as_utc(self, storage):
+        sent = datetime(2024, 1, 1, 9, 30, tzinfo=timezone(timedelta(hours=5)))
+        storage.add_message("<a@x>", b"raw-a", date=sent)
+        date = storage.get_message("<a@x>").date
+        assert date == sent and date.tzinfo is timezone.utc
+        assert date.hour == 4
+
+    def test_add_message_returns_row_id(self, storage):
+        first = storage.add_message("<a@x>", b"raw-a")
+        second = storage.add_message("<b@x>", b"raw-b")
+        assert (storage.get_message("<a@x>").id, storage.get_message("<b@x>").id) == (first, second)
+        assert storage.get_raw(second) == b"raw-b"
+
+    def test_add_tags(self, storage):
+        storage.add_message("<a@x>", b"raw", tags=["work"])
+        storage.add_tags("<a@x>", ["work", "urgent", "later"])
+        assert storage.get_tags("<a@x>") == ("later", "urgent", "work")
+
+    def test_tags_column_follows_message_tags(self, storage):
+        storage.add_tag("<a@x>", "early")  # before the message is stored
+        storage.add_message("<a@x>", b"raw", tags=["work"])
+        storage.add_messages([("<b@x>", None, "", "", "", "", b"raw", None, None, ["y", "x"])])
+        storage.remove_tag("<a@x>", "work")
+        tags = {m.message_id: m.tags for m in storage.iter_messages()}
+        assert tags == {"<a@x>": ("early",), "<b@x>": ("x", "y")}
+        assert storage.get_message("<a@x>").tags == ("early",)
+
+    def test_batch(self, storage):
+        commits = []
+        storage.conn.set_trace_callback(lambda sql: commits.append(sql) if sql == "COMMIT" else None)
+        with storage.batch():
+            storage.add_message("<a@x>", b"raw", tags=["work"])
+            with storage.batch():
+                storage.add_tag("<a@x>", "later")
+            storage.mark_pushed("<a@x>", "imap", "u", "INBOX")
+            storage.set_sync_state("imap", "u", "INBOX", 1, 10)
+            assert storage.conn.in_transaction
+        storage.conn.set_trace_callback(None)
+        assert commits == ["COMMIT"]
+        assert storage.get_tags("<a@x>") == ("later", "work")
+        assert storage.is_pushed("<a@x>", "imap", "u", "INBOX")
+
+    def test_batch_rolls_back(self, storage):
+        with pytest.raises(ValueError):
+            with storage.batch():
+                storage.add_message("<a@x>", b"raw")
+                storage.mark_pushed("<a@x>", "imap", "u", "INBOX")
+                raise ValueError("boom")
+        assert not storage.conn.in_transaction
+        assert not storage.has_message("<a@x>")
+        assert not storage.is_pushed("<a@x>", "imap", "u", "INBOX")
+
+    def test_deferred_commit_flushed_on_disconnect(self, tmp_path):
+        path = tmp_path / "msgs.db"
+        with MessageStorage(path) as storage:
+            storage.add_message("<a@x>", b"raw", commit=False)
+            storage.mark_pushed("<a@x>", "imap", "u", "INBOX", commit=False)
+            assert storage.conn.in_transaction
+        with MessageStorage(path) as storage:
+            assert storage.has_message("<a@x>")
+            assert storage.is_pushed("<a@x>", "imap", "u", "INBOX")
+
+    def test_mark_pushed_bulk(self, storage):
+        storage.add_message("<a@x>", b"raw-a")
+        storage.add_message("<b@x>", b"raw-b")
+        storage.mark_pushed_bulk([
+            ("<a@x>", "imap", "u", "INBOX"),
+            ("<a@x>", "imap", "u", "INBOX"),
+        ])
+        assert storage.count_pushed("imap", "u", "INBOX") == 1
+        unpushed = [m.message_id for m in storage.iter_unpushed("imap", "u", "INBOX")]
+        assert unpushed == ["<b@x>"]
+
+    def test_bulk_probes(self, storage):
+        storage.add_message("<a@x>", b"raw-a")
+        storage.add_message("<b@x>", b"raw-b")
+        storage.mark_pushed("<a@x>", "imap", "u", "INBOX")
+        # More ids than SQLite's historical 999-variable limit
+        candidates = ["<a@x>", "<b@x>"] + [f"<{i}@y>" for i in range(1200)]
+        with traced(storage) as statements:
+            assert storage.existing_message_ids(candidates) == {"<a@x>", "<b@x>"}
+        assert len(statements) == 1
+        assert storage.pushed_message_ids(candidates, "imap", "u", "INBOX") == {"<a@x>"}
+        assert storage.pushed_message_ids(candidates, "imap", "u", "Sent") == set()
+
+    def test_counts_use_covering_indexes(self, storage):
+        storage.add_message("<a@x>", b"a", tags=["work"])
+        storage.add_message("<b@x>", b"b")
+        storage.mark_pushed("<a@x>", "imap", "u", "INBOX")
+        assert storage.count() == 2
+        assert storage.count(tag="work") == 1
+        assert storage.count_pushed("imap", "u", "INBOX") == 1
+        with traced(storage) as statements:
+            storage.count(tag="work")
+            storage.count_pushed("imap", "u", "INBOX")
+        assert len(statements) == 2
+        for sql in statements:
+            steps = [r[3] for r in storage.conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+            # Index searches only; the messages side of the tag join is covered
+            assert steps and all(step.startswith("SEARCH") for step in steps)
+            assert all("COVERING INDEX" in step for step in steps if " m " in step or "push_state" in step)
+
+    def test_count_tag_skips_unstored_messages(self, storage):
+        """Tags added before their message is stored aren't counted until it is."""
+        storage.add_message("<a@x>", b"a", tags=["work"])
+        storage.add_tag("<later@x>", "work")
+        assert storage.count(tag="work") == 1
+        storage.add_message("<later@x>", b"b")
+        assert storage.count(tag="work") == 2
+
+    def test_unpushed_probe_uses_covering_index(self, storage):
+        plan = " ".join(r[3] for r in storage.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT 1 FROM push_state "
+            "WHERE message_id = ? AND dest_type = ? AND dest_user = ? AND dest_folder = ?",
+            ("<a@x>", "imap", "u", "INBOX"),
+        ))
+        assert "COVERING INDEX sqlite_autoindex_push_state_1" in plan
+
+    def test_iter_unpushed_anti_join(self, storage):
+        storage.add_message("<a@x>", b"a", date=datetime(2024, 1, 2), tags=["work"])
+        storage.add_message("<b@x>", b"b", date=datetime(2024, 1, 1), tags=["work"])
+        storage.add_message("<c@x>", b"c", date=datetime(2024, 1, 3))
+        storage.mark_pushed("<b@x>", "imap", "u", "INBOX")
+        storage.mark_pushed("<a@x>", "imap", "u", "Sent")
+        def unpushed(**kw):
+            return [m.message_id for m in storage.iter_unpushed("imap", "u", "INBOX", **kw)]
+        assert unpushed() == ["<a@x>", "<c@x>"]
+        assert unpushed(tag="work") == ["<a@x>"]
+        with traced(storage) as statements:
+            unpushed(tag="work")
+        plan = " ".join(r[3] for r in storage.conn.execute(f"EXPLAIN QUERY PLAN {statements[0]}"))
+        assert "CORRELATED" not in plan and "LEFT-JOIN" in plan
+
+
+class TestKnownCache:
+    def test_hits_skip_sql(self, storage):
+        storage.add_message("<a@x>", b"raw")
+        storage.mark_pushed("<a@x>", "imap", "u", "INBOX")
+        with traced(storage) as statements:
+            assert storage.has_message("<a@x>")
+            assert storage.is_pushed("<a@x>", "imap", "u", "INBOX")
+            assert statements == []
+            assert not storage.has_message("<b@x>")
+            assert not storage.is_pushed("<a@x>", "imap", "u", "Sent")
+            assert len(statements) == 2
+
+    def test_misses_are_not_cached(self, tmp_path):
+        path = tmp_path / "msgs.db"
+        with MessageStorage(path) as reader, MessageStorage(path) as writer:
+            assert not reader.has_message("<a@x>")
+            writer.add_message("<a@x>", b"raw")
+            writer.mark_pushed_bulk([("<a@x>", "imap", "u", "INBOX")])
+            assert reader.has_message("<a@x>")
+            assert reader.is_pushed("<a@x>", "imap", "u", "INBOX")
+
+    def test_lru_bound(self, storage, monkeypatch):
+        monkeypatch.setattr("eml.storage.KNOWN_CACHE_SIZE", 2)
+        for i in range(3):
+            storage.add_message(f"<{i}@x>", b"raw")
+        assert list(storage._known_mids) == ["<1@x>", "<2@x>"]
+        assert storage.has_message("<0@x>")
+        assert list(storage._known_mids) == ["<2@x>", "<0@x>"]
+
+
+class TestBodies:
+    def test_iter_messages_omits_raw(self, storage):
+        row_id = storage.add_message("<a@x>", b"raw-a", subject="Hi")
+        [msg] = storage.iter_messages()
+        assert msg.subject == "Hi" and msg.raw is None
+        assert storage.get_raw(row_id) == b"raw-a"
+        with storage.open_raw(row_id) as blob:
+            assert len(blob) == 5
+            assert blob.read(3) == b"raw"
+        assert storage.raw_size(row_id) == 5
+        assert msg.load_raw() == b"raw-a"
+        assert msg.raw == b"raw-a"
+
+    def test_iter_messages_in_batches(self, storage, monkeypatch):
+        monkeypatch.setattr("eml.storage.FETCH_SIZE", 2)
+        for i in range(5):
+            storage.add_message(f"<{i}@x>", b"raw", date=datetime(2024, 1, i + 1))
+        assert [m.message_id for m in storage.iter_messages()] == [f"<{i}@x>" for i in range(4, -1, -1)]
+        assert len(list(storage.iter_unpushed("imap", "u", "INBOX"))) == 5
+
+    def test_iter_messages_reads_denormalized_tags(self, storage, monkeypatch):
+        monkeypatch.setattr("eml.storage.FETCH_SIZE", 2)
+        for i in range(5):
+            storage.add_message(f"<{i}@x>", b"raw", tags=["b", "a"] if i % 2 else None)
+        with traced(storage) as statements:
+            tags = {m.message_id: m.tags for m in storage.iter_messages()}
+        assert tags == {"<0@x>": (), "<1@x>": ("a", "b"), "<2@x>": (), "<3@x>": ("a", "b"), "<4@x>": ()}
+        assert not any("message_tags" in sql for sql in statements)
+
+    def test_migrates_inline_raw(self, tmp_path):
+        path = tmp_path / "msgs.db"
+        conn = sqlite3.connect(path)
+        conn.executescript("""
+            CREATE TABLE messages (
+                id INTEGER PRIMARY KEY,
+                message_id TEXT UNIQUE NOT NULL,
+                date TEXT, from_addr TEXT, to_addr TEXT, cc_addr TEXT, subject TEXT,
+                raw BLOB NOT NULL,
+                source_folder TEXT, source_uid TEXT,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE INDEX idx_messages_date ON messages(date);
+            CREATE TABLE message_tags (message_id TEXT NOT NULL, tag TEXT NOT NULL, PRIMARY KEY (message_id, tag));
+            INSERT INTO message_tags VALUES ('<a@x>', 'work'), ('<a@x>', 'later'), ('<z@x>', 'orphan');
+            INSERT INTO messages (message_id, subject, raw) VALUES ('<a@x>', 'Old', x'6869');
+            INSERT INTO messages (message_id, date, raw) VALUES
+                ('<b@x>', '2024-01-02T03:04:05', x''),
+                ('<c@x>', '2024-01-02T03:04:05+00:00', x'');
+        """)
+        conn.close()
+        with MessageStorage(path) as storage:
+            assert storage.get_message("<a@x>").raw == b"hi"
+            cols = {r[1]: r[2] for r in storage.conn.execute("PRAGMA table_info(messages)")}
+            assert "raw" not in cols and cols["date"] == "INTEGER"
+            dates = {m.message_id: m.date for m in storage.iter_messages()}
+            assert dates["<a@x>"] is None
+            tags = {m.message_id: m.tags for m in storage.iter_messages()}
+            assert tags == {"<a@x>": ("later", "work"), "<b@x>": (), "<c@x>": ()}
+            assert dates["<b@x>"] == datetime(2024, 1, 2, 3, 4, 5).astimezone(timezone.utc)
+            assert dates["<c@x>"] == datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+            assert storage.conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE name = 'idx_messages_date'"
+            ).fetchone()[0] == 1
+
+    def test_compact(self, storage):
+        bodies = [os.urandom(4096) for _ in range(50)]  # incompressible
+        for i, body in enumerate(bodies):
+            storage.add_message(f"<{i}@x>", body)
+        storage.conn.execute("DELETE FROM message_bodies WHERE id > 1")
+        storage.conn.execute("DELETE FROM messages WHERE id > 1")
+        storage.commit()
+        before, after = storage.compact()
+        assert after < before
+        assert storage.get_message("<0@x>").raw == bodies[0]
+
+    def test_compression(self, storage):
+        body = b"Subject: hi\r\n\r\n" + b"lorem ipsum dolor sit amet\r\n" * 1000
+        row_id = storage.add_message("<a@x>", body)
+        storage.add_messages([("<b@x>", None, "", "", "", "", body, None, None, None)])
+        stored, codec, size = storage.conn.execute(
+            "SELECT length(raw), codec, size FROM message_bodies WHERE id = ?", (row_id,)
+        ).fetchone()
+        assert (codec, size) == ("zstd", len(body)) and stored < len(body) // 10
+        assert storage.get_message("<a@x>").raw == body
+        assert storage.get_message("<b@x>").raw == body
+        assert storage.raw_size(row_id) == len(body)
+        with storage.open_raw(row_id) as f:
+            assert f.read() == body
+        # Incompressible bodies are stored as-is, and still stream from the Blob
+        tiny_id = storage.add_message("<c@x>", b"hi")
+        assert storage.conn.execute(
+            "SELECT codec FROM message_bodies WHERE id = ?", (tiny_id,)
+        ).fetchone()[0] is None
+        with storage.open_raw(tiny_id) as blob:
+            assert isinstance(blob, sqlite3.Blob) and blob.read() == b"hi"
+
+    def test_adds_codec_columns(self, tmp_path):
+        path = tmp_path / "msgs.db"
+        with MessageStorage(path) as storage:
+            row_id = storage.add_message("<a@x>", b"hi")
+            storage.conn.executescript("""
+                ALTER TABLE message_bodies DROP COLUMN codec;
+                ALTER TABLE message_bodies DROP COLUMN size;
+            """)
+        with MessageStorage(path) as storage:
+            assert storage.get_raw(row_id) == b"hi"
+            assert storage.raw_size(row_id) == 2
+            body = b"compressible " * 100
+            assert storage.get_raw(storage.add_message("<b@x>", body)) == body
+
+
+class TestAddressSearch:
+    def test_from_addr_filter(self, storage):
+        storage.add_message("<a@x>", b"a", from_addr="Bob <bob.smith@example.com>")
+        storage.add_message("<b@x>", b"b", from_addr="alice@example.org")
+        def froms(q):
+            return sorted(m.message_id for m in storage.iter_messages(from_addr=q))
+        assert froms("example.com") == ["<a@x>"]
+        assert froms("example") == ["<a@x>", "<b@x>"]
+        assert froms("ali") == ["<b@x>"]
+        assert froms('"quoted"') == []
+        assert froms("@") == ["<a@x>", "<b@x>"]
+
+    def test_subject_filter(self, storage):
+        storage.add_message("<a@x>", b"a", subject="Quarterly budget review", from_addr="bob@example.com")
+        storage.add_message("<b@x>", b"b", subject="Budget: $50 cut", from_addr="alice@example.org")
+        storage.add_message("<c@x>", b"c", subject="Lunch", from_addr="bob@example.com")
+        def subjects(**kw):
+            return sorted(m.message_id for m in storage.iter_messages(**kw))
+        assert subjects(subject="budg") == ["<a@x>", "<b@x>"]
+        assert subjects(subject="budget", from_addr="bob") == ["<a@x>"]
+        assert subjects(subject="$") == ["<b@x>"]
+        storage.conn.execute("UPDATE messages SET subject = 'Dinner' WHERE message_id = '<c@x>'")
+        assert subjects(subject="lunch") == []
+        assert subjects(subject="dinner") == ["<c@x>"]
+
+    def test_query_built_once_per_filter_shape(self, storage):
+        _iter_messages_sql.cache_clear()
+        for q in ("bob", "alice", "@", "%"):
+            list(storage.iter_messages(from_addr=q, limit=5))
+        info = _iter_messages_sql.cache_info()
+        assert (info.misses, info.hits) == (2, 2)
+
+    def test_indexes_existing_messages(self, tmp_path):
+        path = tmp_path / "msgs.db"
+        with MessageStorage(path) as storage:
+            storage.add_message("<a@x>", b"a", from_addr="bob@example.com")
+            # Pre-subject address index, which gets replaced
+            storage.conn.executescript("""
+                DROP TRIGGER messages_fts_ai;
+                DROP TABLE messages_fts;
+                CREATE VIRTUAL TABLE messages_addr_fts USING fts5(
+                    from_addr, to_addr, cc_addr, content='messages', content_rowid='id'
+                );
+            """)
+        with MessageStorage(path) as storage:
+            assert [m.message_id for m in storage.iter_messages(from_addr="bob")] == ["<a@x>"]
+            assert storage.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name LIKE 'messages_addr%'"
+            ).fetchone() is None
+
+
+class TestSyncState:
+    def test_set_sync_states(self, storage):
+        storage.set_sync_state("imap", "u", "INBOX", 1, 10)
+        storage.set_sync_states([
+            ("imap", "u", "INBOX", 1, 20),
+            ("imap", "u", "Sent", 2, 5),
+        ])
+        assert storage.get_sync_state("imap", "u", "INBOX") == (1, 20)
+        assert storage.get_sync_state("imap", "u", "Sent") == (2, 5)
+
+
+class TestAccountStorage:
+    def test_roundtrip(self, tmp_path):
+        with AccountStorage(tmp_path / "accts.db") as accts:
+            accts.add("b", "gmail", "b@x", "pw")
+            accts.add("a", "zoho", "a@x", "pw")
+            acct = accts.get("a")
+            assert (acct.name, acct.type, acct.user) == ("a", "zoho", "a@x")
+            assert isinstance(acct.created_at, datetime)
+            assert [a.name for a in accts.list()] == ["a", "b"]
+            assert accts.get("c") is None
+
+
+class TestFindEmlDir:
+    def test_caches_hits(self, tmp_path, monkeypatch):
+        sub = tmp_path / "a" / "b"
+        sub.mkdir(parents=True)
+        assert find_eml_dir(sub) is None
+        (tmp_path / ".eml").mkdir()
+        assert find_eml_dir(sub) == tmp_path / ".eml"
+        # Hits are re-validated with a single stat
+        checked = []
+        real_is_dir = type(tmp_path).is_dir
+        def is_dir(self):
+            checked.append(self)
+            return real_is_dir(self)
+        monkeypatch.setattr(type(tmp_path), "is_dir", is_dir)
+        assert find_eml_dir(sub) == tmp_path / ".eml"
+        assert checked == [tmp_path / ".eml"]
+        # Nested project created later is found once the cache is cleared
+        (sub / ".eml").mkdir()
+        clear_eml_dir_cache()
+        assert find_eml_dir(sub) == sub / ".eml"
@@ -0,0 +1,441 @@
+"""Tests for uids.db tracking."""
+
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+import pytest
+
+from eml.layouts.path_template import content_hash
+from eml.parquet import export_uids_to_parquet, import_uids_from_parquet
+from eml.uids import FOLDER_ID, PULL_COMMIT_INTERVAL, ContentHashFilter, PulledUID, UidsDB
+
+
+@pytest.fixture
+def uids_db(tmp_path):
+    with UidsDB(tmp_path / ".eml") as db:
+        yield db
+
+
+def committed_count(db):
+    conn = sqlite3.connect(db.db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM pulled_uids").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class TestPulledUids:
+    def test_record_pull_defers_commit(self, uids_db):
+        for uid in range(1, PULL_COMMIT_INTERVAL):
+            uids_db.record_pull("acct", "INBOX", 1, uid, f"h{uid}")
+        assert uids_db.get_pulled_count("acct", "INBOX", 1) == PULL_COMMIT_INTERVAL - 1
+        assert committed_count(uids_db) == 0
+        uids_db.record_pull("acct", "INBOX", 1, PULL_COMMIT_INTERVAL, "h")
+        assert committed_count(uids_db) == PULL_COMMIT_INTERVAL
+        uids_db.record_pull("acct", "INBOX", 1, PULL_COMMIT_INTERVAL + 1, "h")
+        uids_db.flush()
+        assert committed_count(uids_db) == PULL_COMMIT_INTERVAL + 1
+
+    def test_disconnect_commits(self, tmp_path):
+        with UidsDB(tmp_path / ".eml") as db:
+            db.record_pull("acct", "INBOX", 1, 7, "h7", message_id="<a@x>")
+        assert committed_count(db) == 1
+
+    def test_record_pulls(self, uids_db):
+        now = datetime.now()
+        uids_db.record_pulls(
+            PulledUID("acct", "INBOX", 1, uid, f"h{uid}", None, None, now) for uid in (1, 2, 3)
+        )
+        assert committed_count(uids_db) == 3
+        assert uids_db.get_pulled_uids("acct", "INBOX", 1) == {1, 2, 3}
+        assert uids_db.has_content_hash("h2")
+
+    def test_missing_uids(self, uids_db):
+        for uid in (2, 4):
+            uids_db.record_pull("acct", "INBOX", 1, uid, f"h{uid}")
+        uids_db.record_pull("acct", "INBOX", 2, 5, "h5")  # other UIDVALIDITY
+        assert uids_db.missing_uids("acct", "INBOX", 1, [5, 4, 3, 2, 1]) == [5, 3, 1]
+        assert uids_db.missing_uids("acct", "INBOX", 1, []) == []
+
+    def test_pulled_cache(self, uids_db):
+        uids_db.record_pull("acct", "INBOX", 1, 1, "h1")
+        assert uids_db.get_pulled_uids("acct", "INBOX", 1) == {1}
+        statements = []
+        uids_db.conn.set_trace_callback(statements.append)
+        uids_db.record_pull("acct", "INBOX", 1, 2, "h2")
+        uids_db.record_pulls([PulledUID("acct", "INBOX", 1, 3, "h3", None, None, datetime.now())])
+        assert uids_db.is_pulled("acct", "INBOX", 1, 3) and not uids_db.is_pulled("acct", "INBOX", 1, 4)
+        assert uids_db.get_pulled_uids("acct", "INBOX", 1) == {1, 2, 3}
+        uids_db.conn.set_trace_callback(None)
+        assert not any(sql.lstrip().startswith("SELECT") for sql in statements)
+        assert uids_db.clear_folder("acct", "INBOX") == 3
+        assert uids_db.get_pulled_uids("acct", "INBOX", 1) == set()
+
+    def test_repull_updates_in_place(self, uids_db):
+        uids_db.record_pull("acct", "INBOX", 1, 1, "h1", message_id="<a@x>")
+        rowid = uids_db.conn.execute("SELECT rowid FROM pulled_uids").fetchone()[0]
+        uids_db.record_pull("acct", "INBOX", 1, 1, "h2", local_path="a.eml")
+        assert uids_db.conn.execute(
+            "SELECT rowid, message_id, local_path FROM pulled_uids"
+        ).fetchall() == [(rowid, None, "a.eml")]
+        assert uids_db.has_content_hash("h2") and not uids_db.has_content_hash("h1")
+        uids_db.record_server_folder("acct", "INBOX", 1, 10)
+        uids_db.record_server_folder("acct", "INBOX", 2, 20)
+        assert uids_db.get_server_folder_info("acct", "INBOX")[:2] == (2, 20)
+
+    def test_unpulled_uids_is_index_only(self, uids_db):
+        uids_db.record_server_uids("acct", "INBOX", 1, [(1, None), (2, None), (3, None)])
+        uids_db.record_pull("acct", "INBOX", 1, 2, "h2")
+        assert uids_db.get_unpulled_uids("acct", "INBOX", 1) == {1, 3}
+        plan = uids_db.conn.execute(f"""
+            EXPLAIN QUERY PLAN SELECT s.uid FROM server_uids s
+            LEFT JOIN pulled_uids p
+                ON p.folder_id = {FOLDER_ID}
+                AND s.uidvalidity = p.uidvalidity AND s.uid = p.uid
+            WHERE s.account = ? AND s.folder = ? AND s.uidvalidity = ? AND p.uid IS NULL
+        """, ("acct", "INBOX", "acct", "INBOX", 1)).fetchall()
+        searches = [row[3] for row in plan if row[3].startswith("SEARCH")]
+        assert len(searches) == 3 and all("COVERING INDEX sqlite_autoindex" in p for p in searches)
+
+    def test_folder_lookups(self, uids_db):
+        uids_db.record_pull("acct", "INBOX", 7, 1, "h1", local_path="a.eml")
+        uids_db.record_server_folder("acct", "INBOX", 7, 42)
+        uidvalidity, count, last_checked = uids_db.get_server_folder_info("acct", "INBOX")
+        assert (uidvalidity, count) == (7, 42) and isinstance(last_checked, datetime)
+        assert uids_db.get_server_folder_info("acct", "Sent") is None
+        assert uids_db.get_uidvalidity("acct", "INBOX") == 7
+        assert uids_db.get_uidvalidity("acct", "Sent") is None
+        for uid in (1, 2):
+            uids_db.record_pull("acct", "INBOX", 8, uid, f"h8-{uid}")
+        assert uids_db.get_uidvalidity("acct", "INBOX") == 8
+        assert uids_db.get_path_by_content_hash("h1") == "a.eml"
+
+    def test_pull_counts(self, uids_db):
+        def counts():
+            return uids_db.conn.execute("""
+                SELECT f.account, f.name, c.uidvalidity, c.cnt
+                FROM pull_counts c JOIN folders f ON f.id = c.folder_id ORDER BY 1, 2, 3
+            """).fetchall()
+        for uid in (1, 2, 3):
+            uids_db.record_pull("acct", "INBOX", 1, uid, f"h{uid}")
+        uids_db.record_pull("acct", "INBOX", 1, 3, "h3-again")
+        uids_db.record_pull("acct", "INBOX", 2, 1, "h4")
+        uids_db.record_pull("acct", "Sent", 1, 1, "h5")
+        assert counts() == [("acct", "INBOX", 1, 3), ("acct", "INBOX", 2, 1), ("acct", "Sent", 1, 1)]
+        assert uids_db.get_pulled_count("acct", "INBOX") == 4
+        assert uids_db.get_pulled_count("acct", "INBOX", 2) == 1
+        assert uids_db.get_pulled_count("acct", "Trash") == 0
+        assert uids_db.clear_folder("acct", "INBOX", 1) == 3
+        uids_db.conn.execute(
+            "UPDATE pulled_uids SET folder_id = ? WHERE folder_id = ?",
+            (uids_db._folder_id("acct", "Archive"), uids_db._folder_id("acct", "Sent")),
+        )
+        assert counts() == [("acct", "Archive", 1, 1), ("acct", "INBOX", 2, 1)]
+        assert uids_db.get_stats() == {"total": 2, "folders": {"Archive": 1, "INBOX": 1}}
+
+    def test_migrates_to_folder_ids(self, tmp_path):
+        eml_dir = tmp_path / ".eml"
+        eml_dir.mkdir()
+        conn = sqlite3.connect(eml_dir / "uids.db")
+        conn.executescript("""
+            CREATE TABLE pulled_uids (
+                account TEXT NOT NULL, folder TEXT NOT NULL,
+                uidvalidity INTEGER NOT NULL, uid INTEGER NOT NULL,
+                content_hash BLOB NOT NULL, message_id TEXT, local_path TEXT,
+                pulled_at INTEGER NOT NULL,
+                PRIMARY KEY (account, folder, uidvalidity, uid)
+            );
+            CREATE TABLE pull_counts (
+                account TEXT NOT NULL, folder TEXT NOT NULL, uidvalidity INTEGER NOT NULL,
+                cnt INTEGER NOT NULL, PRIMARY KEY (account, folder, uidvalidity)
+            );
+            INSERT INTO pulled_uids VALUES
+                ('acct', 'INBOX', 1, 1, x'01', '<a@x>', 'a.eml', 0),
+                ('acct', 'INBOX', 1, 2, x'02', NULL, NULL, 0),
+                ('other', 'INBOX', 1, 1, x'03', NULL, NULL, 0);
+            PRAGMA user_version = 1;
+        """)
+        conn.close()
+        with UidsDB(eml_dir) as db:
+            cols = [r[1] for r in db.conn.execute("PRAGMA table_info(pulled_uids)")]
+            assert cols[:3] == ["folder_id", "uidvalidity", "uid"]
+            assert db.get_pulled_uids("acct", "INBOX", 1) == {1, 2}
+            assert db.get_stats_parallel() == {
+                "acct": {"total": 2, "folders": {"INBOX": 2}},
+                "other": {"total": 1, "folders": {"INBOX": 1}},
+            }
+            db.record_pull("other", "INBOX", 1, 2, "h")
+            assert db.get_pulled_count("other", "INBOX") == 2
+            assert db.conn.execute("SELECT COUNT(*) FROM folders").fetchone()[0] == 2
+
+    def test_backfills_pull_counts(self, tmp_path):
+        eml_dir = tmp_path / ".eml"
+        with UidsDB(eml_dir) as db:
+            for uid in (1, 2):
+                db.record_pull("acct", "INBOX", 1, uid, f"h{uid}")
+            db.conn.execute("DROP TABLE pull_counts")
+        with UidsDB(eml_dir) as db:
+            assert db.get_stats() == {"total": 2, "folders": {"INBOX": 2}}
+            assert db.get_folders_with_activity() == [("acct", "INBOX", 2)]
+
+    def test_server_uid_counts(self, tmp_path):
+        eml_dir = tmp_path / ".eml"
+        with UidsDB(eml_dir) as db:
+            db.record_server_uids("acct", "INBOX", 1, [(1, None), (2, "<b@x>")])
+            db.record_server_uids("acct", "INBOX", 1, [(2, "<b2@x>"), (3, None)])
+            db.record_server_uids("acct", "INBOX", 2, [(1, None)])
+            db.conn.execute("DELETE FROM server_uids WHERE folder = 'INBOX' AND uid = 1")
+            assert db.get_server_uid_count("acct", "INBOX") == 2
+            assert db.get_server_uid_count("acct", "Sent") == 0
+            db.conn.execute("DROP TABLE server_uid_counts")
+        with UidsDB(eml_dir) as db:
+            assert db.get_server_uid_count("acct", "INBOX") == 2
+
+    def test_server_state_transaction(self, uids_db):
+        with uids_db.transaction():
+            for folder in ("INBOX", "Sent"):
+                uids_db.record_server_uids("acct", folder, 1, [(1, None), (2, "<b@x>")])
+                uids_db.record_server_folder("acct", folder, 1, 2)
+            assert uids_db.conn.in_transaction
+        assert not uids_db.conn.in_transaction
+        with pytest.raises(ValueError):
+            with uids_db.transaction():
+                uids_db.record_server_folder("acct", "Trash", 1, 5)
+                raise ValueError("boom")
+        assert uids_db.get_server_folder_info("acct", "Trash") is None
+        assert uids_db.get_server_folder_uidvalidity("acct", "Trash") is None
+        assert uids_db.get_server_folder_uidvalidity("acct", "Sent") == 1
+        assert uids_db.get_server_uids("acct", "Sent", 1) == {1, 2}
+
+    def test_migrates_iso_timestamps(self, tmp_path):
+        eml_dir = tmp_path / ".eml"
+        eml_dir.mkdir()
+        conn = sqlite3.connect(eml_dir / "uids.db")
+        conn.executescript("""
+            CREATE TABLE server_folders (
+                account TEXT NOT NULL, folder TEXT NOT NULL,
+                uidvalidity INTEGER NOT NULL, message_count INTEGER,
+                last_checked TEXT NOT NULL,
+                PRIMARY KEY (account, folder)
+            );
+            INSERT INTO server_folders VALUES ('acct', 'INBOX', 7, 42, '2024-01-02T03:04:05.678901');
+        """)
+        conn.close()
+        with UidsDB(eml_dir) as db:
+            assert db.get_server_folder_info("acct", "INBOX") == (7, 42, datetime(2024, 1, 2, 3, 4, 5))
+            assert db.conn.execute("SELECT typeof(last_checked) FROM server_folders").fetchone()[0] == "integer"
+            db.record_server_folder("acct", "Sent", 7, 1)
+            assert db.get_server_folder_info("acct", "Sent") is not None
+
+    def test_get_stats_parallel(self, tmp_path):
+        with UidsDB(tmp_path / ".eml", readers=2) as db:
+            for i, account in enumerate(("a", "b", "c")):
+                for uid in range(i + 1):
+                    db.record_pull(account, "INBOX", 1, uid, f"{account}{uid}")
+            db.record_pull("a", "Sent", 1, 1, "a-sent")
+            assert db.conn.in_transaction
+            with db._checkout_reader() as conn:
+                assert conn is db.conn
+            stats = db.get_stats_parallel()
+            assert stats == {account: db.get_stats(account) for account in ("a", "b", "c")}
+            assert stats["a"] == {"total": 2, "folders": {"INBOX": 1, "Sent": 1}}
+            assert db.get_stats_parallel(["b"]) == {"b": {"total": 2, "folders": {"INBOX": 2}}}
+            with db._checkout_reader() as conn:
+                assert conn is not db.conn
+                with pytest.raises(sqlite3.OperationalError):
+                    conn.execute("DELETE FROM pulled_uids")
+
+    def test_connection_pragmas(self, uids_db):
+        def pragma(name):
+            return uids_db.conn.execute(f"PRAGMA {name}").fetchone()[0]
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("temp_store") == 2  # MEMORY
+        assert pragma("cache_size") == -64000
+
+
+class TestContentHashes:
+    def test_stored_as_digest(self, uids_db):
+        sha = content_hash(b"raw")
+        uids_db.record_pull("acct", "INBOX", 1, 1, sha, local_path="a.eml")
+        uids_db.record_pull("acct", "INBOX", 1, 2, "not-hex")
+        stored = [r[0] for r in uids_db.conn.execute("SELECT content_hash FROM pulled_uids ORDER BY uid")]
+        assert stored == [bytes.fromhex(sha), "not-hex"]
+        assert uids_db.has_content_hash(sha) and uids_db.has_content_hash("not-hex")
+        assert uids_db.get_path_by_content_hash(sha) == "a.eml"
+        assert uids_db.get_all_content_hashes() == {sha, "not-hex"}
+
+    def test_migrates_hex_text(self, tmp_path):
+        eml_dir = tmp_path / ".eml"
+        eml_dir.mkdir()
+        sha = content_hash(b"raw")
+        conn = sqlite3.connect(eml_dir / "uids.db")
+        conn.executescript(f"""
+            CREATE TABLE pulled_uids (
+                account TEXT NOT NULL, folder TEXT NOT NULL,
+                uidvalidity INTEGER NOT NULL, uid INTEGER NOT NULL,
+                content_hash TEXT NOT NULL, message_id TEXT, local_path TEXT,
+                pulled_at TEXT NOT NULL,
+                PRIMARY KEY (account, folder, uidvalidity, uid)
+            );
+            INSERT INTO pulled_uids VALUES ('acct', 'INBOX', 1, 1, '{sha}', NULL, NULL, '2024-01-01');
+        """)
+        conn.close()
+        with UidsDB(eml_dir) as db:
+            assert db.conn.execute("SELECT typeof(content_hash) FROM pulled_uids").fetchone()[0] == "blob"
+            assert db.conn.execute("SELECT typeof(pulled_at) FROM pulled_uids").fetchone()[0] == "integer"
+            assert db.has_content_hash(sha)
+
+    def test_parquet_round_trip_in_batches(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("eml.parquet.BATCH_SIZE", 3)
+        eml_dir = tmp_path / ".eml"
+        hashes = {uid: content_hash(str(uid).encode()) for uid in range(10)}
+        with UidsDB(eml_dir) as db:
+            db.record_pulls(
+                PulledUID("acct", "INBOX", 1, uid, sha, None, None, datetime.now())
+                for uid, sha in hashes.items()
+            )
+        path = export_uids_to_parquet(eml_dir)
+        (eml_dir / "uids.db").unlink()
+        assert import_uids_from_parquet(eml_dir, path) == 10
+        with UidsDB(eml_dir) as db:
+            assert db.get_pulled_uids("acct", "INBOX", 1) == set(hashes)
+            assert db.get_all_content_hashes() == set(hashes.values())
+
+    def test_dedup_filter(self, tmp_path):
+        eml_dir = tmp_path / ".eml"
+        hashes = [content_hash(str(i).encode()) for i in range(500)]
+        with UidsDB(eml_dir) as db:
+            for uid, sha in enumerate(hashes):
+                db.record_pull("acct", "INBOX", 1, uid, sha)
+            db.record_pull("acct", "INBOX", 1, 500, "not-hex")
+            db.flush()
+            from_sqlite = db.build_dedup_filter()
+            export_uids_to_parquet(eml_dir)
+            assert db._parquet_is_current()
+            from_parquet = db.build_dedup_filter()
+        others = [content_hash(f"other{i}".encode()) for i in range(2000)]
+        for dedup in (from_sqlite, from_parquet):
+            assert all(sha in dedup for sha in hashes) and "not-hex" in dedup
+            assert sum(sha in dedup for sha in others) < 20
+
+    def test_filter_sizing(self):
+        dedup = ContentHashFilter(100_000)
+        assert dedup.num_probes == 8 and len(dedup._bits) < 200_000
+
+    def test_parquet_round_trip(self, tmp_path):
+        eml_dir = tmp_path / ".eml"
+        sha = content_hash(b"raw")
+        with UidsDB(eml_dir) as db:
+            db.record_pull("acct", "INBOX", 1, 1, sha)
+        path = export_uids_to_parquet(eml_dir)
+        (eml_dir / "uids.db").unlink()
+        assert import_uids_from_parquet(eml_dir, path) == 1
+        with UidsDB(eml_dir) as db:
+            assert db.get_all_content_hashes() == {sha}
+
+
+class TestParquetAnalytics:
+    def _pull_all(self, db):
+        for folder, uids in (("INBOX", (1, 2, 3)), ("Sent", (1,))):
+            for uid in uids:
+                db.record_pull("acct", folder, 1, uid, content_hash(f"{folder}{uid}".encode()))
+        db.record_pull("other", "INBOX", 1, 1, content_hash(b"INBOX1"))
+        db.flush()
+
+    def test_reads_current_parquet(self, uids_db, tmp_path):
+        self._pull_all(uids_db)
+        expected = (
+            uids_db.get_stats(), uids_db.get_stats("acct"),
+            sorted(uids_db.get_folders_with_activity()), uids_db.get_all_content_hashes(),
+        )
+        export_uids_to_parquet(tmp_path / ".eml")
+        assert uids_db._parquet_is_current()
+        assert (
+            uids_db.get_stats(), uids_db.get_stats("acct"),
+            sorted(uids_db.get_folders_with_activity()), uids_db.get_all_content_hashes(),
+        ) == expected
+        assert uids_db.get_folders_with_activity("acct") == [("acct", "INBOX", 3), ("acct", "Sent", 1)]
+
+        uids_db.record_pull("acct", "Sent", 1, 2, "h")
+        assert not uids_db._parquet_is_current()
+        assert uids_db.get_stats("acct") == {"total": 5, "folders": {"INBOX": 3, "Sent": 2}}
+
+    def test_pulled_uids_arrow(self, uids_db, tmp_path):
+        self._pull_all(uids_db)
+        live = uids_db.get_pulled_uids_arrow("acct", "INBOX", 1)
+        export_uids_to_parquet(tmp_path / ".eml")
+        from_parquet = uids_db.get_pulled_uids_arrow("acct", "INBOX", 1)
+        for arr in (live, from_parquet):
+            assert str(arr.type) == "int64"
+            assert sorted(arr.to_pylist()) == [1, 2, 3]
+        assert uids_db.get_pulled_uids("acct", "INBOX", 1) == {1, 2, 3}
+
+    def test_rebuilt_db_is_current(self, tmp_path):
+        eml_dir = tmp_path / ".eml"
+        with UidsDB(eml_dir) as db:
+            self._pull_all(db)
+        export_uids_to_parquet(eml_dir, eml_dir / "elsewhere.parquet")
+        with UidsDB(eml_dir) as db:
+            assert not db._parquet_is_current()
+        export_uids_to_parquet(eml_dir)
+        (eml_dir / "uids.db").unlink()
+        with UidsDB(eml_dir) as db:
+            assert db._parquet_is_current()
+            assert db.get_stats()["total"] == 5
+
+
+class TestParquetRebuild:
+    def test_rebuilds_only_when_content_changes(self, tmp_path, capsys):
+        eml_dir = tmp_path / ".eml"
+        parquet_path = eml_dir / "uids.parquet"
+        with UidsDB(eml_dir) as db:
+            db.record_pull("acct", "INBOX", 1, 1, "h1", message_id="<a@x>")
+        export_uids_to_parquet(eml_dir)
+
+        # Exported after the last write, and touched: same content, no rebuild
+        os.utime(parquet_path, ns=(time.time_ns() + 10**9,) * 2)
+        with UidsDB(eml_dir) as db:
+            assert db._parquet_is_current()
+            assert db.conn.execute("SELECT message_id FROM pulled_uids").fetchone()[0] == "<a@x>"
+            db.record_pull("acct", "INBOX", 1, 2, "h2")
+        with UidsDB(eml_dir) as db:
+            assert db.get_pulled_uids("acct", "INBOX", 1) == {1, 2}
+        assert "Rebuilding" not in capsys.readouterr().err
+
+        # A different uids.parquet (e.g. from another clone) replaces the rows
+        other = tmp_path / "other" / ".eml"
+        with UidsDB(other) as db:
+            db.record_pull("acct", "INBOX", 1, 9, "h9")
+        parquet_path.write_bytes(export_uids_to_parquet(other).read_bytes())
+        with UidsDB(eml_dir) as db:
+            assert db.get_pulled_uids("acct", "INBOX", 1) == {9}
+            assert db._parquet_is_current()
+        assert "Rebuilding" in capsys.readouterr().err
+
+    def test_reconnect_skips_sync_check(self, tmp_path, monkeypatch):
+        eml_dir = tmp_path / ".eml"
+        with UidsDB(eml_dir) as db:
+            db.record_pull("acct", "INBOX", 1, 1, "h1")
+        export_uids_to_parquet(eml_dir)
+        statements = []
+        open_db = UidsDB._open
+
+        def traced_open(self):
+            open_db(self)
+            self._conn.set_trace_callback(statements.append)
+
+        monkeypatch.setattr(UidsDB, "_open", traced_open)
+        with UidsDB(eml_dir):
+            pass
+        assert any("FROM meta" in sql for sql in statements)
+        statements.clear()
+        with UidsDB(eml_dir):
+            pass
+        assert not any("FROM meta" in sql for sql in statements)
+        os.utime(eml_dir / "uids.parquet", ns=(time.time_ns() + 10**9,) * 2)
+        with UidsDB(eml_dir) as db:
+            assert db.get_pulled_uids("acct", "INBOX", 1) == {1}
+        assert any("FROM meta" in sql for sql in statements)
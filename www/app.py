@@ -36,19 +36,19 @@ def index():
         offset = (page - 1) * per_page
 
         # Build query
-        sql = "SELECT * FROM messages WHERE 1=1"
+        where = "WHERE 1=1"
         params = []
 
         if q:
-            sql += " AND (from_addr LIKE ? OR subject LIKE ? OR to_addr LIKE ?)"
+            where += " AND (from_addr LIKE ? OR subject LIKE ? OR to_addr LIKE ?)"
             params.extend([f"%{q}%", f"%{q}%", f"%{q}%"])
 
         # Get total count
-        count_sql = sql.replace("SELECT *", "SELECT COUNT(*)")
-        total = storage.conn.execute(count_sql, params).fetchone()[0]
+        total = storage.conn.execute(f"SELECT COUNT(*) FROM messages {where}", params).fetchone()[0]
 
-        # Get page of results
-        sql += " ORDER BY date DESC LIMIT ? OFFSET ?"
+        # Get page of results (`date` is epoch seconds; the alias converts it to a UTC datetime)
+        sql = f"""SELECT id, date AS "date [EPOCH_UTC]", from_addr, subject FROM messages {where}
+                  ORDER BY date DESC LIMIT ? OFFSET ?"""
         params.extend([per_page, offset])
         rows = storage.conn.execute(sql, params).fetchall()
 
@@ -71,15 +71,13 @@ def message(msg_id: int):
     """View a single message."""
     storage = get_storage()
     try:
-        row = storage.conn.execute(
-            "SELECT * FROM messages WHERE id = ?", (msg_id,)
-        ).fetchone()
-
-        if not row:
+        # Bodies may be stored compressed; get_raw decodes them
+        try:
+            raw = storage.get_raw(msg_id)
+        except KeyError:
             abort(404)
 
         # Parse the raw message for display
-        raw = row["raw"]
         msg = email.message_from_bytes(raw, policy=email_policy)
 
         # Get body (prefer plain text)
@@ -108,7 +106,6 @@ def message(msg_id: int):
 
         return render_template(
             "message.html",
-            msg=row,
             body=body,
             attachments=attachments,
             headers={